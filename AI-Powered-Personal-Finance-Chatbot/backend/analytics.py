@@ -0,0 +1,127 @@
+# backend/analytics.py
+"""Category growth analytics over the monthly rollup.
+
+One grouped query over ``transaction_rollups`` gives expense totals per
+(month, category). They are laid out as a dense month x category matrix
+(months without spend are zero), and growth for every category is computed
+at once with array math, so the cost depends on months x categories and not
+on the number of transactions or a per-category loop.
+"""
+from __future__ import annotations
+
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .lazy import lazy_import
+from .models import DEFAULT_SESSION_ID, TransactionRollup
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DEFAULT_GROWTH_WINDOW = 3
+
+
+class SpendMatrix(NamedTuple):
+    months: List[str]        # contiguous 'YYYY-MM' labels, oldest first
+    categories: List[str]
+    spend: np.ndarray        # shape (len(months), len(categories)), positive amounts
+
+
+def category_month_rows(
+    db: Session, session_id: str = DEFAULT_SESSION_ID, start: Optional[date] = None, end: Optional[date] = None
+) -> list:
+    """(month, category, total) expense rows in one grouped query.
+
+    A date range selects the calendar months it touches; partial months at
+    either end count as whole months.
+    """
+    r = TransactionRollup.__table__.c
+    query = (
+        select(r.month, r.category, func.sum(r.total))
+        .where(r.session_id == session_id, r.sign == -1)
+        .group_by(r.month, r.category)
+    )
+    if start and end:
+        query = query.where(r.month.between(start.strftime('%Y-%m'), end.strftime('%Y-%m')))
+    return db.execute(query).all()
+
+
+def spend_matrix(rows: list) -> SpendMatrix:
+    """Lay out category_month_rows as the dense month x category matrix"""
+    if not rows:
+        return SpendMatrix([], [], np.zeros((0, 0)))
+
+    frame = pd.DataFrame.from_records(rows, columns=["month", "category", "total"])
+    month_codes, distinct_months = pd.factorize(frame["month"])
+    category_codes, category_names = pd.factorize(frame["category"], sort=True)
+    # Months as a running count (year * 12 + month) so each one's row is its offset from the first
+    month_index = np.array([int(m[:4]) * 12 + int(m[5:7]) - 1 for m in distinct_months])
+    first, last = int(month_index.min()), int(month_index.max())
+
+    spend = np.zeros((last - first + 1, len(category_names)))
+    spend[month_index[month_codes] - first, category_codes] = -frame["total"].to_numpy(dtype=float)
+    months = [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(first, last + 1)]
+    return SpendMatrix(months, list(category_names), spend)
+
+
+def category_month_matrix(
+    db: Session, session_id: str = DEFAULT_SESSION_ID, start: Optional[date] = None, end: Optional[date] = None
+) -> SpendMatrix:
+    """Expense totals per month and category: category_month_rows laid out by spend_matrix"""
+    return spend_matrix(category_month_rows(db, session_id, start, end))
+
+
+def growth_rate(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """Relative change per element; NaN where there was no previous spend"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, (current - previous) / previous, np.nan)
+
+
+def _percent(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value) * 100, 2)
+
+
+def effective_window(months: int, window: int = DEFAULT_GROWTH_WINDOW) -> int:
+    """Trailing window actually used: at least one month, and one month must precede it"""
+    return max(1, min(window, months - 1))
+
+
+def category_growth(matrix: SpendMatrix, window: int = DEFAULT_GROWTH_WINDOW) -> List[dict]:
+    """Month-over-month and trailing-window growth of every category, fastest growing first.
+
+    Trailing growth compares average monthly spend over the last ``window``
+    months with the ``window`` months before them (fewer if the data is
+    shorter). Categories with no spend in the earlier period have no growth
+    rate and are ranked after the others by the size of their increase.
+    """
+    months, spend = len(matrix.months), matrix.spend
+    if months < 2:
+        return []
+    window = effective_window(months, window)
+
+    latest, previous = spend[-1], spend[-2]
+    recent = spend[-window:].mean(axis=0)
+    prior = spend[max(0, months - 2 * window):months - window].mean(axis=0)
+    mom = growth_rate(latest, previous)
+    trailing = growth_rate(recent, prior)
+    change = recent - prior
+
+    # np.lexsort's last key is the primary one: known rates first, then rate, then change
+    order = np.lexsort((-change, -np.nan_to_num(trailing, nan=0.0), np.isnan(trailing)))
+    return [
+        {
+            "category": matrix.categories[i],
+            "latest_month": matrix.months[-1],
+            "latest_month_spend": round(float(latest[i]), 2),
+            "previous_month_spend": round(float(previous[i]), 2),
+            "mom_growth_percent": _percent(mom[i]),
+            "trailing_avg_spend": round(float(recent[i]), 2),
+            "prior_avg_spend": round(float(prior[i]), 2),
+            "trailing_growth_percent": _percent(trailing[i]),
+            "trailing_change": round(float(change[i]), 2),
+        }
+        for i in order
+    ]
@@ -0,0 +1,213 @@
+# backend/categorizer.py
+"""Incremental categorizer training: hashed features and a partial_fit Naive Bayes.
+
+HashingVectorizer is stateless, so text from any batch lands in the same
+feature columns without fitting a vocabulary over the whole history, and
+MultinomialNB keeps per-class feature counts that ``partial_fit`` adds to.
+A model remembers the last transaction id and category correction id it has
+seen; an update reads only rows past those watermarks, in id order and in
+chunks, so its cost follows the new data. Categories that appear later are
+added as empty classes before the batch that introduces them.
+
+Only categories from an upload or a user correction are learned from and
+scored against (TRAINABLE_CATEGORY_SOURCES): rows the model categorized
+itself would only teach it its own mistakes. Every HOLDOUT_MODULUS-th
+transaction id is never trained on. Accuracy on the
+newest HOLDOUT_ROWS of those is measured after every update, so the check
+costs the same however long the history is.
+"""
+from __future__ import annotations
+
+import copy
+import os
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .lazy import lazy_import
+from .models import TRAINABLE_CATEGORY_SOURCES, CategoryCorrection, Transaction
+
+np = lazy_import("numpy")
+
+INCREMENTAL_KIND = "hashed_nb"
+HASH_FEATURES = 2 ** 16
+HOLDOUT_MODULUS = int(os.getenv("MODEL_HOLDOUT_MODULUS", "10"))
+HOLDOUT_ROWS = int(os.getenv("MODEL_HOLDOUT_ROWS", "2000"))
+TRAINING_CHUNK_ROWS = int(os.getenv("MODEL_TRAINING_CHUNK_ROWS", "20000"))
+# A fresh model needs at least this many training rows
+MIN_TRAINING_ROWS = 10
+
+
+def training_text(descriptions, merchants) -> List[str]:
+    return [f"{description} {merchant}" for description, merchant in zip(descriptions, merchants)]
+
+
+def predict(categorizer: dict, texts) -> Tuple["np.ndarray", "np.ndarray"]:
+    """(categories, confidences) for model input texts; confidence is the predicted class's probability"""
+    proba = categorizer["model"].predict_proba(categorizer["vectorizer"].transform(texts))
+    best = proba.argmax(axis=1)
+    return categorizer["model"].classes_[best], proba[np.arange(len(best)), best]
+
+
+def not_held_out(id_column):
+    return id_column % HOLDOUT_MODULUS != 0
+
+
+def has_training_label():
+    """Rows whose category is a real label: not Uncategorized and not filled in by the model"""
+    return (Transaction.category != "Uncategorized") & Transaction.category_source.in_(TRAINABLE_CATEGORY_SOURCES)
+
+
+def hashing_vectorizer():
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Non-negative features for MultinomialNB; l2 rows like the TF-IDF model
+    return HashingVectorizer(n_features=HASH_FEATURES, alternate_sign=False, norm="l2")
+
+
+def _writable_copy(model):
+    """A copy to update while readers keep using the original (whose arrays may be read-only memory maps)"""
+    updated = copy.copy(model)
+    updated.class_count_ = np.array(model.class_count_)
+    updated.feature_count_ = np.array(model.feature_count_)
+    return updated
+
+
+def _add_classes(model, labels) -> None:
+    """Give categories the model has not seen yet empty counts, keeping classes_ sorted"""
+    new = np.setdiff1d(labels, model.classes_)
+    if not len(new):
+        return
+    classes = np.union1d(model.classes_, new)
+    rows = np.searchsorted(classes, model.classes_)
+    class_count = np.zeros(len(classes))
+    class_count[rows] = model.class_count_
+    feature_count = np.zeros((len(classes), model.feature_count_.shape[1]))
+    feature_count[rows] = model.feature_count_
+    model.classes_, model.class_count_, model.feature_count_ = classes, class_count, feature_count
+
+
+def _fit_batch(model, vectorizer, texts: List[str], labels: List[str]) -> None:
+    labels = np.asarray(labels, dtype=object)
+    if hasattr(model, "classes_"):
+        _add_classes(model, labels)
+        model.partial_fit(vectorizer.transform(texts), labels)
+    else:
+        model.partial_fit(vectorizer.transform(texts), labels, classes=np.unique(labels))
+
+
+def _new_transactions(db: Session, after_id: int, through_id: int) -> Iterator[Tuple[List[str], List[str]]]:
+    """(texts, categories) of labelled, not held-out rows with after_id < id <= through_id, in chunks"""
+    while after_id < through_id:
+        rows = db.execute(
+            select(Transaction.id, Transaction.description, Transaction.merchant, Transaction.category)
+            .where(
+                Transaction.id > after_id, Transaction.id <= through_id,
+                has_training_label(), not_held_out(Transaction.id),
+            )
+            .order_by(Transaction.id)
+            .limit(TRAINING_CHUNK_ROWS)
+        ).all()
+        if not rows:
+            return
+        after_id = rows[-1][0]
+        yield training_text([r[1] for r in rows], [r[2] for r in rows]), [r[3] for r in rows]
+
+
+def _new_corrections(
+    db: Session, after_id: int, through_id: int, trained_through_id: int
+) -> Iterator[Tuple[List[str], List[str]]]:
+    """Corrections past after_id to rows the model already saw (newer rows carry the fix already)"""
+    while after_id < through_id:
+        rows = db.execute(
+            select(CategoryCorrection.id, Transaction.description, Transaction.merchant, CategoryCorrection.category)
+            .join(Transaction, Transaction.id == CategoryCorrection.transaction_id)
+            .where(
+                CategoryCorrection.id > after_id, CategoryCorrection.id <= through_id,
+                CategoryCorrection.category != "Uncategorized",
+                Transaction.id <= trained_through_id, not_held_out(Transaction.id),
+            )
+            .order_by(CategoryCorrection.id)
+            .limit(TRAINING_CHUNK_ROWS)
+        ).all()
+        if not rows:
+            return
+        after_id = rows[-1][0]
+        yield training_text([r[1] for r in rows], [r[2] for r in rows]), [r[3] for r in rows]
+
+
+def watermark_key(db: Session, transaction_id: int) -> Optional[list]:
+    """Identity of the row at the watermark; it changes if ids were freed and reused since"""
+    row = db.execute(
+        select(Transaction.session_id, Transaction.fingerprint).where(Transaction.id == transaction_id)
+    ).first()
+    return list(row) if row else None
+
+
+def holdout_accuracy(db: Session, model, vectorizer) -> Tuple[Optional[float], int]:
+    """Share of the newest held-out labelled rows the model labels correctly"""
+    rows = db.execute(
+        select(Transaction.description, Transaction.merchant, Transaction.category)
+        .where(Transaction.id % HOLDOUT_MODULUS == 0, has_training_label())
+        .order_by(Transaction.id.desc())
+        .limit(HOLDOUT_ROWS)
+    ).all()
+    if not rows or not hasattr(model, "classes_"):
+        return None, 0
+    predicted = model.predict(vectorizer.transform(training_text([r[0] for r in rows], [r[1] for r in rows])))
+    return float(np.mean(predicted == np.asarray([r[2] for r in rows], dtype=object))), len(rows)
+
+
+def train_incremental(db: Session, base: Optional[dict] = None) -> Optional[dict]:
+    """Extend ``base`` with the rows it has not seen, or build a model from every row.
+
+    Returns the new categorizer fields (model, vectorizer, watermarks, row
+    counts, holdout accuracy), or None when there is nothing new to learn or
+    too little data for a first model. A base of another kind, or whose
+    watermark row was deleted or replaced (ids reused after a clear), is
+    rebuilt from scratch.
+    """
+    from sklearn.naive_bayes import MultinomialNB
+
+    through_id = db.execute(select(func.coalesce(func.max(Transaction.id), 0))).scalar()
+    corrections_through_id = db.execute(select(func.coalesce(func.max(CategoryCorrection.id), 0))).scalar()
+
+    resume = (
+        base is not None and base.get("kind") == INCREMENTAL_KIND
+        and base["trained_through_id"] <= through_id
+        and watermark_key(db, base["trained_through_id"]) == base["watermark_key"]
+    )
+    if resume:
+        model, vectorizer = _writable_copy(base["model"]), base["vectorizer"]
+        after_id, corrections_after_id = base["trained_through_id"], base["corrections_through_id"]
+        total_rows = base["training_rows"]
+        batches = [_new_corrections(db, corrections_after_id, corrections_through_id, after_id),
+                   _new_transactions(db, after_id, through_id)]
+    else:
+        # Current categories already include every correction
+        model, vectorizer, total_rows = MultinomialNB(), hashing_vectorizer(), 0
+        batches = [_new_transactions(db, 0, through_id)]
+
+    new_rows = 0
+    for chunks in batches:
+        for texts, labels in chunks:
+            _fit_batch(model, vectorizer, texts, labels)
+            new_rows += len(labels)
+    if new_rows == 0 or (not resume and new_rows < MIN_TRAINING_ROWS):
+        return None
+
+    accuracy, holdout_rows = holdout_accuracy(db, model, vectorizer)
+    return {
+        "kind": INCREMENTAL_KIND,
+        "model": model,
+        "vectorizer": vectorizer,
+        "trained_through_id": through_id,
+        "watermark_key": watermark_key(db, through_id),
+        "corrections_through_id": corrections_through_id,
+        "training_rows": total_rows + new_rows,
+        "new_rows": new_rows,
+        "incremental": resume,
+        "holdout_accuracy": accuracy,
+        "holdout_rows": holdout_rows,
+    }
@@ -0,0 +1,157 @@
+# backend/category_memo.py
+"""Persistent memo of categorizer predictions for recurring transactions.
+
+Statements repeat the same descriptions every month, so a prediction is
+stored per memo key: the model's input text ("description merchant")
+lowercased with whitespace collapsed. Both vectorizers lowercase and split
+on non-word characters, so every text with the same key gets the same
+features and the same prediction. A row is valid only for the model version
+that wrote it; uploads look up their distinct keys in bulk and run the model
+on the misses alone. A key stored by an older version counts as a miss and
+is re-predicted and overwritten by the upload that looks it up, so a new
+version costs nothing until its keys are used. Keys beyond the newest
+MEMO_MAX_ROWS are deleted by the upload that adds them.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .categorizer import predict
+from .lazy import lazy_import
+from .models import CategoryMemo
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+MEMO_MAX_ROWS = int(os.getenv("CATEGORY_MEMO_MAX_ROWS", "100000"))
+# Keys per IN (...) lookup, under SQLite's default bound-parameter limit
+MEMO_LOOKUP_BATCH = 900
+MEMO_WRITE_BATCH = 5000
+
+
+class MemoStats:
+    """Rows of this process's uploads answered by the memo or by the model, in the shape metrics.register_cache reports.
+
+    The memo's row count is kept here rather than counted per scrape: it is
+    counted once on first use, then moved by the keys this process's uploads
+    add and prune. It misses keys other workers add and keeps keys of
+    rolled-back uploads.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.size: Optional[int] = None
+
+    def record(self, hits: int, misses: int, added: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            if self.size is not None:
+                self.size += added
+
+    def count(self) -> None:
+        """Set the size from the table"""
+        with self._session_factory() as db:
+            size = db.execute(select(func.count()).select_from(CategoryMemo)).scalar()
+        with self._lock:
+            self.size = size
+
+    def stats(self) -> dict:
+        if self.size is None:
+            self.count()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self.size,
+                "maxsize": MEMO_MAX_ROWS,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def memo_keys(descriptions: pd.Series, merchants: pd.Series) -> pd.Series:
+    codes, uniques = pd.factorize(descriptions.astype(str) + " " + merchants.astype(str))
+    keys = pd.Series(uniques, dtype=object).str.lower().str.split().str.join(" ")
+    return pd.Series(keys.to_numpy().take(codes), index=descriptions.index, dtype=object)
+
+
+def lookup_memo(db: Session, keys: Sequence[str], model_version: int) -> Tuple[Dict[str, Tuple[str, float]], int]:
+    """(key -> (category, confidence) for the keys memoized by this model version, keys stored by any version)"""
+    found, stored = {}, 0
+    for offset in range(0, len(keys), MEMO_LOOKUP_BATCH):
+        rows = db.execute(
+            select(CategoryMemo.key, CategoryMemo.category, CategoryMemo.confidence, CategoryMemo.model_version)
+            .where(CategoryMemo.key.in_(keys[offset:offset + MEMO_LOOKUP_BATCH]))
+        ).all()
+        stored += len(rows)
+        found.update((key, (category, confidence)) for key, category, confidence, version in rows if version == model_version)
+    return found, stored
+
+
+def store_memo(db: Session, keys: Sequence[str], categories, confidences, model_version: int) -> None:
+    """Upsert predictions made by ``model_version``. The caller commits."""
+    stmt = insert(CategoryMemo.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["key"],
+        set_={
+            "category": stmt.excluded.category,
+            "confidence": stmt.excluded.confidence,
+            "model_version": stmt.excluded.model_version,
+        },
+    )
+    rows = [
+        {"key": key, "category": category, "confidence": float(confidence), "model_version": model_version}
+        for key, category, confidence in zip(keys, categories, confidences)
+    ]
+    for offset in range(0, len(rows), MEMO_WRITE_BATCH):
+        db.execute(stmt, rows[offset:offset + MEMO_WRITE_BATCH])
+
+
+def categorize_with_memo(
+    db: Session, categorizer: dict, descriptions: pd.Series, merchants: pd.Series, stats: MemoStats
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Memoized ai_categorize_batch: the model only sees distinct keys with no memo row for its version.
+
+    New predictions are stored in ``db``'s transaction, so they are committed
+    with the upload that needed them.
+    """
+    version = categorizer["version"]
+    codes, distinct = pd.factorize(memo_keys(descriptions, merchants))
+    distinct = distinct.tolist()
+    found, stored = lookup_memo(db, distinct, version)
+    missed = np.array([key not in found for key in distinct], dtype=bool)
+    missing = [key for key, miss in zip(distinct, missed) if miss]
+    pruned = 0
+    if missing:
+        categories, confidences = predict(categorizer, missing)
+        store_memo(db, missing, categories, confidences, version)
+        pruned = prune_memo(db)
+        found.update(zip(missing, zip(categories, confidences)))
+    # Counted per row: the share of rows that did not need the model
+    missed_rows = int(np.bincount(codes, minlength=len(distinct))[missed].sum())
+    # Keys stored by an older version are overwritten, not added
+    stats.record(hits=len(codes) - missed_rows, misses=missed_rows, added=len(distinct) - stored - pruned)
+
+    answers = [found[key] for key in distinct]
+    categories = np.array([category for category, _ in answers], dtype=object)
+    confidences = np.array([confidence for _, confidence in answers], dtype=float)
+    return categories.take(codes), confidences.take(codes)
+
+
+def prune_memo(db: Session) -> int:
+    """Drop every key but the newest MEMO_MAX_ROWS first seen. The caller commits."""
+    cutoff = db.execute(
+        select(CategoryMemo.id).order_by(CategoryMemo.id.desc()).offset(MEMO_MAX_ROWS).limit(1)
+    ).scalar()
+    if cutoff is None:
+        return 0
+    return db.execute(delete(CategoryMemo).where(CategoryMemo.id <= cutoff)).rowcount
@@ -1,13 +1,103 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./transactions.db"
+from .metrics import instrument_engine
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./transactions.db")
+
+# Summary, visualization, analytics, dashboard and chat run on an AsyncSession
+# (SQLAlchemy asyncio over aiosqlite) when enabled, instead of holding a
+# threadpool worker for the whole request. Set to 0 to serve them from the sync engine.
+DB_ASYNC_READS = os.getenv("DB_ASYNC_READS", "1") == "1"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL.replace("sqlite:", "sqlite+aiosqlite:", 1)
+
+SQL_METRICS = os.getenv("SQL_METRICS", "1") == "1"
+
+# "performance" (default) enables WAL and the tuned pragmas below;
+# "basic" keeps SQLite's stock settings (rollback journal, small cache).
+DB_PROFILE = os.getenv("DB_PROFILE", "performance")
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB, i.e. 64 MiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+
+# SQLite allows one writer at a time, so the writer pool stays small while
+# readers get enough connections to serve concurrent dashboard/chat requests.
+WRITE_POOL_SIZE = int(os.getenv("DB_WRITE_POOL_SIZE", "2"))
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+
+
+def _apply_performance_profile(target_engine, read_only: bool = False):
+    @event.listens_for(target_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see below) instead of pysqlite's legacy handling
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(target_engine, "begin")
+    def do_begin(conn):
+        # Readers: a real BEGIN makes every statement in a session read one WAL
+        # snapshot. Writers take the write lock up front so busy_timeout applies.
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+
+def _engine_options(url: str, read_only: bool) -> dict:
+    kwargs = {"connect_args": {"check_same_thread": False}} if url.startswith("sqlite") else {}
+    if DB_PROFILE == "performance" and url.startswith("sqlite") and ":memory:" not in url:
+        kwargs.update(
+            pool_size=READ_POOL_SIZE if read_only else WRITE_POOL_SIZE,
+            max_overflow=POOL_MAX_OVERFLOW,
+        )
+    return kwargs
+
+
+def _create_engine(read_only: bool = False):
+    new_engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, read_only))
+    if DB_PROFILE == "performance" and DATABASE_URL.startswith("sqlite"):
+        _apply_performance_profile(new_engine, read_only=read_only)
+    return new_engine
+
+
+def _create_async_read_engine():
+    new_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, read_only=True))
+    if DB_PROFILE == "performance" and ASYNC_DATABASE_URL.startswith("sqlite"):
+        # Pragmas and BEGIN handling are applied by the underlying sync engine's events
+        _apply_performance_profile(new_engine.sync_engine, read_only=True)
+    return new_engine
+
+
+engine = _create_engine()
+read_engine = _create_engine(read_only=True) if DB_PROFILE == "performance" else engine
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_read_engine = _create_async_read_engine() if DB_ASYNC_READS else None
+
+# Statement counts and durations per engine for GET /metrics. Cursor event
+# listeners cost roughly 15-20us per statement; SQL_METRICS=0 leaves them off.
+if SQL_METRICS:
+    instrument_engine(engine, "write")
+    if read_engine is not engine:
+        instrument_engine(read_engine, "read")
+    if async_read_engine is not None:
+        instrument_engine(async_read_engine.sync_engine, "async_read")
+AsyncReadSessionLocal = (
+    async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False) if async_read_engine else None
+)
 Base = declarative_base()
 
 def get_db():
@@ -15,4 +105,17 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Read-only session for query endpoints; never blocked by an upload in WAL mode"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    """Read-only AsyncSession; only available when DB_ASYNC_READS is on"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
\ No newline at end of file
@@ -0,0 +1,156 @@
+# backend/events.py
+"""In-process change feed behind GET /events (server-sent events).
+
+Every data change (upload, clear, budget change, model swap) is published
+once as an event naming the aggregates it invalidated, under the id it got in
+the shared data_changes log, so ids agree across worker processes and
+restarts. Each connected client
+owns a small asyncio queue; publishing from a request thread or a background
+worker hands the event to every subscriber's event loop, so an idle client is
+just a suspended coroutine waiting on its queue. The last CHANGE_FEED_HISTORY
+events are kept so a client that reconnects with Last-Event-ID can replay
+what it missed; for an older or unknown id it gets a resync event instead
+(refetch everything).
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Optional
+
+CHANGE_FEED_HISTORY = int(os.getenv("CHANGE_FEED_HISTORY", "256"))
+# Queued events per client before it is dropped (it reconnects and replays from history)
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "64"))
+# Seconds between keep-alive comments on an idle stream
+CHANGE_FEED_HEARTBEAT_S = float(os.getenv("CHANGE_FEED_HEARTBEAT_S", "25"))
+
+_DISCONNECT = object()
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, session_id: Optional[str]):
+        self.loop = loop
+        self.session_id = session_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CHANGE_FEED_QUEUE_SIZE)
+
+    def wants(self, event: dict) -> bool:
+        # Events without a session (clear_all, model swaps) go to everyone
+        return self.session_id is None or event["session_id"] in (None, self.session_id)
+
+    def offer(self, event) -> None:
+        """Runs on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: end the stream; the client reconnects with Last-Event-ID
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_DISCONNECT)
+
+
+class ChangeFeed:
+    def __init__(self, history: int = CHANGE_FEED_HISTORY):
+        self._history: deque = deque(maxlen=history)
+        self._subscribers: List[_Subscriber] = []
+        self._lock = threading.Lock()
+
+    def seed(self, changes: Iterable[dict]) -> None:
+        """Fill the replay history from the shared change log at startup"""
+        with self._lock:
+            self._history.extend(as_event(change) for change in changes)
+
+    def publish(self, change: dict, version: Optional[float] = None) -> dict:
+        """Push a recorded change to every interested subscriber; safe from any thread.
+
+        ``version`` is the data version after the change (defaults to the
+        change's own time, which is the new version for changes that bump it).
+        """
+        event = as_event(change, version)
+        with self._lock:
+            self._history.append(event)
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                pass  # loop already closed; the stream's finally block unsubscribes it
+        return event
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _subscribe(self, session_id: Optional[str], last_event_id: Optional[str]):
+        """Register a subscriber; returns it with the events to replay (None = resync needed)"""
+        subscriber = _Subscriber(asyncio.get_running_loop(), session_id)
+        with self._lock:
+            # Registered under the same lock as history, so no event falls between replay and live
+            self._subscribers.append(subscriber)
+            history = list(self._history)
+        if not last_event_id:
+            return subscriber, []
+        latest = history[-1]["id"] if history else 0
+        if not last_event_id.isdigit() or int(last_event_id) > latest:
+            return subscriber, [None]  # not an id of this database's change log
+        last = int(last_event_id)
+        if history and last < history[0]["id"] - 1:
+            return subscriber, [None]  # the gap is no longer in history
+        return subscriber, [e for e in history if e["id"] > last and subscriber.wants(e)]
+
+    def _unsubscribe(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def latest_id(self) -> int:
+        with self._lock:
+            return self._history[-1]["id"] if self._history else 0
+
+    async def stream(
+        self, session_id: Optional[str] = None, last_event_id: Optional[str] = None, resync: Optional[dict] = None
+    ) -> AsyncIterator[str]:
+        """SSE frames: replayed events, then live ones, with keep-alive comments while idle.
+
+        ``resync`` is the payload sent when the missed events cannot be
+        replayed; the client should refetch everything.
+        """
+        subscriber, backlog = self._subscribe(session_id, last_event_id)
+        try:
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                if event is None:
+                    yield format_event({**(resync or {}), "id": self.latest_id()}, "resync")
+                else:
+                    yield format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), CHANGE_FEED_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is _DISCONNECT:
+                    return
+                yield format_event(event)
+        finally:
+            self._unsubscribe(subscriber)
+
+
+def as_event(change: dict, version: Optional[float] = None) -> dict:
+    return {
+        "id": change["id"],
+        "reason": change["reason"],
+        "aggregates": change["aggregates"],
+        "session_id": change["session_id"],
+        "version": change["created_at"] if version is None else version,
+        "published_at": change["created_at"],
+    }
+
+
+def format_event(event: dict, name: str = "data_version") -> str:
+    frame = f"event: {name}\ndata: {json.dumps(event)}\n\n"
+    return f"id: {event['id']}\n{frame}" if "id" in event else frame
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,36 @@
+# backend/lazy.py
+"""Deferred imports for the heavy dataframe and ML stacks.
+
+``pd = lazy_import("pandas")`` binds a placeholder module; the real import
+runs on the first attribute access (``pd.DataFrame``) and the placeholder then
+takes over the real module's namespace, so later lookups cost the same as
+with a plain import. Modules using it need ``from __future__ import
+annotations`` so that ``pd.DataFrame`` in signatures is not evaluated at
+import time.
+"""
+import importlib
+import sys
+import types
+from typing import Dict
+
+_placeholders: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        # Only reached for names not in the namespace yet, i.e. before the first load.
+        # import_module holds the import lock, so concurrent first uses load it once
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module itself if it is already imported, else a placeholder that imports it on first use"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return _placeholders.setdefault(name, LazyModule(name))
+
+
+def is_loaded(name: str) -> bool:
+    return name in sys.modules
@@ -0,0 +1,59 @@
+# backend/logs.py
+"""Leveled, structured logging for the backend.
+
+Modules log through ``logging.getLogger(__name__)`` and pass fields as
+``extra={...}``. The "backend" logger writes one line per record to stderr:
+``key=value`` pairs by default, or one JSON object per line with
+LOG_FORMAT=json. LOG_LEVEL (default INFO) sets the threshold.
+"""
+import json
+import logging
+import os
+import sys
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class KeyValueFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        fields = " ".join(f"{key}={value}" for key, value in _fields(record).items())
+        if fields:
+            line += " " + fields
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT) -> logging.Logger:
+    """Attach the stderr handler to the "backend" logger (once)"""
+    logger = logging.getLogger("backend")
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter() if fmt == "json" else KeyValueFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
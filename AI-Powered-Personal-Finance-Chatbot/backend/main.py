@@ -1,67 +1,234 @@
+from __future__ import annotations
+
 import re
 import json
+import asyncio
 import uuid
+import hashlib
 import io
 import time
-from datetime import date, datetime, timedelta
+import tempfile
+import threading
+import functools
+import contextlib
+import importlib
+import inspect
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
 from typing import Tuple, Optional, List, Dict
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Request, BackgroundTasks, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func, text, case
+from sqlalchemy import func, text, case, insert, bindparam, select, exists, update
 from sqlalchemy.orm import Session
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-import joblib
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.util import await_only
+import anyio
 import os
 
 # Absolute imports
-from backend.db import Base, engine, get_db
-from backend.models import Transaction, Budget, UserSession
-from backend.schema import ChatRequest, ChatResponse
+from backend.db import Base, engine, get_db, get_read_db, get_async_read_db, SessionLocal, ReadSessionLocal, DB_ASYNC_READS
+from backend.models import DEFAULT_SESSION_ID, Transaction, TransactionRollup, Budget, UserSession, CategoryCorrection, upgrade_schema
+from backend.analytics import DEFAULT_GROWTH_WINDOW, category_growth, category_month_rows, effective_window, spend_matrix
+from backend.rollups import apply_rollup_delta, clear_rollups, ensure_rollups, load_rollup_rows, rollup_rows_frame, whole_month_range
+from backend.cache import LRUCache
+from backend.categorizer import has_training_label, holdout_accuracy, not_held_out, predict, train_incremental, training_text
+from backend.category_memo import MemoStats, categorize_with_memo
+from backend.events import CHANGE_FEED_HISTORY, change_feed
+from backend.lazy import is_loaded, lazy_import
+from backend.logs import configure_logging
+from backend.metrics import http_request_seconds, http_requests, ingest_stage, register_cache, render_metrics, timed_chunks
+from backend.session_store import decode_frame
+from backend.shared_state import SharedState
+from backend.nlp import QuestionEntities, analyze_question, normalize_category, resolve_time_window
+from backend.schema import CategoryUpdate, ChatRequest, ChatResponse
+
+# pandas, numpy and joblib load on first use, scikit-learn with the first model
+# load or training run, so importing this module (a new worker) stays cheap
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+joblib = lazy_import("joblib")
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # -------------------------
-# CATEGORY ALIASES & AI MODEL
+# AI MODEL
 # -------------------------
-CATEGORY_ALIASES = {
-    "food": ["food", "dining", "groceries", "restaurant", "cafe", "meal", "grocery", "snacks", "dinner", "lunch", "breakfast", "ccd"],
-    "transport": ["transport", "transportation", "uber", "ola", "cab", "taxi", "fuel", "bus", "train", "metro", "petrol", "ride"],
-    "shopping": ["shopping", "amazon", "flipkart", "myntra", "mall", "store", "clothing", "electronics", "purchase", "online"],
-    "bills": ["bills", "utilities", "electricity", "wifi", "phone", "internet", "rent", "water", "mobile", "recharge", "bill", "gas"],
-    "health": ["health", "doctor", "hospital", "pharmacy", "medicine", "healthcare", "gym", "dental"],
-    "entertainment": ["entertainment", "movies", "cinema", "netflix", "game", "concert", "pvr", "ticket", "subscription", "movie", "bowling"],
-    "education": ["education", "school", "college", "tuition", "course", "udemy", "book", "certification"],
-    "investment": ["investment", "stocks", "mutual fund", "dividend", "sip"],
-    "income": ["salary", "income", "freelance", "bonus", "deposit", "payment"]
-}
+# Versioned categorizer artifacts: <MODEL_DIR>/categorizer-v0001.joblib, ...
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_ARTIFACT_PATTERN = re.compile(r"categorizer-v(\d+)\.joblib")
+# Newest versions kept on disk; older checkpoints are deleted after each save
+MODEL_CHECKPOINTS_KEPT = int(os.getenv("MODEL_CHECKPOINTS_KEPT", "5"))
+# "incremental": hashed features + partial_fit, updated after every upload and
+# correction with only the new rows (see categorizer.py). "full": TF-IDF refit
+# over every row, trained once the first data arrives and on POST /model/train.
+MODEL_TRAINING = os.getenv("MODEL_TRAINING", "incremental")
+
+def model_artifact_path(version: int) -> str:
+    return os.path.join(MODEL_DIR, f"categorizer-v{version:04d}.joblib")
+
+def model_versions() -> List[int]:
+    if not os.path.isdir(MODEL_DIR):
+        return []
+    return sorted(int(m.group(1)) for m in map(MODEL_ARTIFACT_PATTERN.fullmatch, os.listdir(MODEL_DIR)) if m)
+
+def latest_model_version() -> int:
+    return max(model_versions(), default=0)
+
+def load_model_artifact(path: str):
+    """Arrays are memory-mapped read-only, so workers using the same version share their pages"""
+    return joblib.load(path, mmap_mode="r")
 
 # Load or create AI model for categorization
 def load_ai_model():
+    """Load the newest versioned categorizer, falling back to the legacy pickles"""
+    version = latest_model_version()
+    if version:
+        return load_model_artifact(model_artifact_path(version))
+
     model_path = "ai_category_model.pkl"
     vectorizer_path = "ai_vectorizer.pkl"
     
     if os.path.exists(model_path) and os.path.exists(vectorizer_path):
-        return joblib.load(model_path), joblib.load(vectorizer_path)
+        return {
+            "model": joblib.load(model_path),
+            "vectorizer": joblib.load(vectorizer_path),
+            "version": 0,
+            "trained_at": None,
+            "training_rows": None,
+            "training_seconds": None,
+        }
     else:
-        return None, None
-
-ai_model, ai_vectorizer = load_ai_model()
-
-# Global timestamp to force frontend refresh
-data_timestamp = time.time()
+        return None
+
+# The active categorizer (model, vectorizer and metadata). It is only ever
+# replaced by a single assignment, so readers that take a local reference keep
+# a consistent model/vectorizer pair while a new version is swapped in.
+# Loaded on first use (refresh_model_from_registry), not at import.
+ai_categorizer = None
+model_loaded = False
+model_load_lock = threading.Lock()
+
+# MODEL_DIR's mtime when this worker last looked for new artifacts; every save adds
+# a file there, so one os.stat tells whether another worker trained a newer model
+model_dir_mtime = None
+
+def refresh_model_from_registry():
+    """The active categorizer: loaded on first call, replaced when another worker saved a newer version"""
+    global ai_categorizer, model_loaded, model_dir_mtime
+    try:
+        mtime = os.stat(MODEL_DIR).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    if model_loaded and mtime == model_dir_mtime:
+        return ai_categorizer
+    with model_load_lock:
+        if not model_loaded:
+            ai_categorizer = ai_categorizer or load_ai_model()
+            model_loaded = True
+        elif mtime != model_dir_mtime:
+            version = latest_model_version()
+            current = ai_categorizer
+            if version and (current is None or version > current["version"]):
+                ai_categorizer = load_model_artifact(model_artifact_path(version))
+                logger.info("categorizer loaded from registry", extra={"version": version})
+        model_dir_mtime = mtime
+    return ai_categorizer
+
+model_training_lock = threading.Lock()
+# queued: another run was requested while one was in progress; full: it must rebuild from scratch
+model_training_state = {"in_progress": False, "queued": False, "full": False, "last_started_at": None, "last_error": None}
+# Hit rate of the persistent prediction memo (category_memo), reported like the in-process caches
+memo_stats = register_cache("category_memo", MemoStats(ReadSessionLocal))
+
+# Global timestamp to force frontend refresh: the time of the latest data change
+# recorded in the shared data_changes log (set at startup, see shared_state)
+data_timestamp = 0.0
+
+# Names of the payloads a change can invalidate, as sent on the /events change feed.
+# Chart names match the /dashboard keys.
+TRANSACTION_AGGREGATES = (
+    "transactions", "by_category", "top_merchants", "monthly_totals", "category_pie", "monthly_trend",
+    "top_merchants_by_total", "top_merchants_by_single", "income_vs_expenses", "spending_alerts", "category_growth",
+)
+# What rows added to a session can change: expenses feed every chart, income only these two
+INCOME_AGGREGATES = ("transactions", "monthly_trend", "income_vs_expenses")
+# A category correction moves an amount between categories; totals, months and merchants stay as they are
+CORRECTION_AGGREGATES = ("transactions", "by_category", "category_pie", "spending_alerts", "category_growth")
+BUDGET_AGGREGATES = ("budgets", "spending_alerts")
+MODEL_AGGREGATES = ("model",)
+
+# Serializes applying changes so data_timestamp and the feed see them in log order
+shared_state_lock = threading.Lock()
+# Set by ensure_started(); None until the schema exists and the change log is attached
+shared_state: Optional[SharedState] = None
+startup_lock = threading.Lock()
+started_at: Optional[float] = None
+
+def ensure_started():
+    """Create or upgrade the schema and attach to the shared change log, once per process.
+
+    Runs on app startup, and on first use for callers that skip it (a
+    TestClient without lifespan, scripts calling the helpers directly).
+    """
+    global shared_state, data_timestamp, started_at
+    if shared_state is not None:
+        return
+    with startup_lock:
+        if shared_state is not None:
+            return
+        Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
+        with SessionLocal() as db:
+            backfill_fingerprints(db)
+            ensure_rollups(db)
+            migrate_session_payloads(db)
+        state = SharedState(engine.url.database)
+        latest_change = state.start()
+        data_timestamp = latest_change["created_at"] if latest_change else 0.0
+        change_feed.seed(state.history(CHANGE_FEED_HISTORY))
+        started_at = time.time()
+        shared_state = state
+
+def apply_change(change: dict):
+    """Bring this worker up to date with a recorded change, its own or another worker's"""
+    global data_timestamp
+    if change["bumps_version"] and change["created_at"] > data_timestamp:
+        data_timestamp = change["created_at"]
+        for cache in (response_cache, date_bounds_cache, chat_answer_cache):
+            cache.clear()
+    change_feed.publish(change, data_timestamp)
+
+def publish_change(reason: str, aggregates: Tuple[str, ...], session_id: Optional[str], bumps_version: bool) -> dict:
+    """Record a change in the shared log (every worker picks it up) and apply it here"""
+    ensure_started()
+    with shared_state_lock:
+        change = shared_state.record(reason, aggregates, session_id, bumps_version)
+        apply_change(change)
+    return change
+
+def sync_shared_state():
+    """Apply changes other workers recorded since the last check; one PRAGMA when there are none"""
+    ensure_started()
+    with shared_state_lock:
+        for change in shared_state.poll():
+            apply_change(change)
+
+def bump_data_version(
+    reason: str, session_id: Optional[str] = DEFAULT_SESSION_ID, aggregates: Tuple[str, ...] = TRANSACTION_AGGREGATES
+) -> float:
+    """Record a data change: new data_timestamp in every worker, caches keyed on the old one dropped, /events notified.
+
+    session_id None means every session changed (clear_all without a session).
+    """
+    publish_change(reason, aggregates, session_id, bumps_version=True)
+    return data_timestamp
 
 # -------------------------
 # UTILS
 # -------------------------
-def normalize_category(text: str) -> str:
-    if not text:
-        return "Uncategorized"
-    t = text.strip().lower()
-    for k, vals in CATEGORY_ALIASES.items():
-        if t == k or any(v in t for v in vals):
-            return k.capitalize()
-    return t.capitalize()
-
 def extract_merchant(description: str) -> str:
     if not description:
         return "Unknown"
@@ -80,121 +247,514 @@ def parse_csv_date(date_str: str) -> date:
             return datetime.strptime(date_str, fmt).date()
         except ValueError:
             continue
-    print(f"Warning: Unable to parse date '{date_str}'. Using today's date.")
+    logger.warning("unparseable date, using today", extra={"value": date_str})
     return date.today()
 
-def parse_time_window(q: str, db: Session = None) -> Tuple[Optional[date], Optional[date]]:
-    ql = q.lower()
-    if db is not None:
-        latest_date = db.query(func.max(Transaction.date)).scalar()
-        if latest_date:
-            today = latest_date
-        else:
-            today = date.today()
-    else:
-        today = date.today()
+# -------------------------
+# VECTORIZED INGESTION
+# -------------------------
+CSV_DATE_FORMATS = ['%d-%m-%Y', '%Y-%m-%d', '%m-%d-%Y', '%d-%m-%y']
 
-    if "last month" in ql:
-        if today.month == 1:
-            last_month = 12
-            year = today.year - 1
-        else:
-            last_month = today.month - 1
-            year = today.year
-        start = date(year, last_month, 1)
-        if last_month == 12:
-            end = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end = date(year, last_month + 1, 1) - timedelta(days=1)
-        return start, end
+def parse_date_column(dates: pd.Series) -> pd.Series:
+    """Column-wide equivalent of parse_csv_date.
 
-    if "this month" in ql:
-        start = today.replace(day=1)
-        if start.month == 12:
-            end = date(start.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end = date(start.year, start.month + 1, 1) - timedelta(days=1)
-        return start, end
-
-    if "this week" in ql:
-        start = today - timedelta(days=today.weekday())
-        return start, start + timedelta(days=6)
-
-    if "last week" in ql:
-        start = today - timedelta(days=today.weekday() + 7)
-        return start, start + timedelta(days=6)
-
-    return None, None
-
-def extract_category(q: str) -> Optional[str]:
-    ql = q.lower()
-    for k, vals in CATEGORY_ALIASES.items():
-        if k in ql or any(v in ql for v in vals):
-            return k.capitalize()
-    if any(word in ql for word in ["food", "restaurant", "grocery", "dinner", "lunch", "snack"]):
-        return "Food"
-    if any(word in ql for word in ["movie", "netflix", "concert", "entertain"]):
-        return "Entertainment"
-    if any(word in ql for word in ["shopping", "amazon", "mall", "store"]):
-        return "Shopping"
-    if any(word in ql for word in ["transport", "petrol", "metro", "uber"]):
-        return "Transport"
-    if any(word in ql for word in ["bill", "electricity", "water", "mobile"]):
-        return "Bills"
-    return None
-
-def parse_topn(q: str, default: int = 3) -> int:
-    m = re.search(r"(top|biggest|highest)\s*(\d+)", q.lower())
-    return int(m.group(2)) if m else default
-
-def classify_intent(q: str) -> str:
-    ql = q.lower()
-    if any(word in ql for word in ["how much", "spent", "spend", "expense", "total", "amount"]) and extract_category(ql):
-        return "sum_by_category"
-    if "growing" in ql or "trend" in ql or "increase" in ql:
-        return "fastest_growing_category"
-    if any(word in ql for word in ["biggest", "top", "highest", "largest"]) and any(word in ql for word in ["expense", "spend", "purchase"]):
-        return "top_expenses"
-    if any(word in ql for word in ["list", "show", "what are", "which"]):
-        return "list_transactions"
-    if any(word in ql for word in ["alert", "overspend", "budget", "limit"]):
-        return "spending_alerts"
-    return "fallback"
-
-def train_ai_categorization_model(db: Session):
-    """Train AI model on existing categorized transactions"""
-    transactions = db.query(Transaction).filter(Transaction.category != "Uncategorized").all()
-    
-    if len(transactions) < 10:
+    Each format is tried over the whole column in one call; only rows that are
+    still unparsed move on to the next format, so a file in a single format is
+    parsed in one pass and mixed files resolve exactly like the per-row path.
+    """
+    cleaned = dates.astype(str).str.strip().str.replace("/", "-", regex=False)
+    parsed = pd.Series(pd.NaT, index=cleaned.index, dtype="datetime64[ns]")
+    remaining = cleaned
+    for fmt in CSV_DATE_FORMATS:
+        if remaining.empty:
+            break
+        attempt = pd.to_datetime(remaining, format=fmt, errors="coerce")
+        ok = attempt.notna()
+        parsed.loc[attempt.index[ok]] = attempt[ok]
+        remaining = remaining[~ok]
+
+    result = parsed.dt.date
+    if not remaining.empty:
+        # Unparseable values keep the per-row fallback (warning + today's date)
+        result.loc[remaining.index] = remaining.map(parse_csv_date)
+    return result
+
+def normalize_category_column(categories: pd.Series) -> pd.Series:
+    """Normalize each distinct raw category once and map the result back."""
+    codes, uniques = pd.factorize(categories.fillna("Uncategorized"))
+    normalized = pd.Index([normalize_category(c) for c in uniques])
+    return pd.Series(normalized.take(codes), index=categories.index, dtype=object)
+
+def extract_merchant_column(descriptions: pd.Series) -> pd.Series:
+    """Vectorized extract_merchant, evaluated over distinct descriptions only."""
+    codes, uniques = pd.factorize(descriptions.fillna("").astype(str))
+    cleaned = (
+        pd.Series(uniques, dtype=object)
+        .str.replace(r"[^A-Za-z0-9\s]", "", regex=True)
+        .str.split(n=2)
+        .str[:2]
+        .str.join(" ")
+        .str.title()
+    )
+    cleaned = cleaned.where(cleaned.str.len() > 0, "Unknown")
+    return pd.Series(cleaned.to_numpy().take(codes), index=descriptions.index, dtype=object)
+
+def normalize_transactions_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized date/category/merchant/amount normalization of an uploaded CSV.
+
+    Produces the same frame as applying parse_csv_date, normalize_category and
+    extract_merchant row by row, including the final dropna on amount/date.
+    """
+    with ingest_stage("date_parse"):
+        df['date'] = parse_date_column(df['date'])
+    with ingest_stage("categorize"):
+        df['category'] = normalize_category_column(df['category'])
+        df['category_source'] = "csv"
+    with ingest_stage("merchant_extract"):
+        df['merchant'] = extract_merchant_column(df['description'])
+    df['amount'] = pd.to_numeric(df['amount'], errors="coerce")
+    return df.dropna(subset=["amount", "date"])
+
+# Rows per executemany batch when loading uploads into the transactions table
+INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", "5000"))
+TRANSACTION_COLUMNS = ["session_id", "date", "description", "merchant", "amount", "category", "category_source", "fingerprint"]
+# Fingerprints looked up per IN (...) query, below SQLite's bound-parameter limit
+FINGERPRINT_LOOKUP_BATCH = 900
+UPLOAD_MODES = ("replace", "append")
+
+def fingerprint_keys(df: pd.DataFrame) -> pd.Series:
+    """Canonical 'YYYY-MM-DD|description|amount' text identifying a transaction's content"""
+    return (
+        pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+        + "|" + df['description'].fillna("").astype(str)
+        + "|" + df['amount'].map("{:.2f}".format)
+    )
+
+def hash_fingerprint(key: str, occurrence: int) -> int:
+    digest = hashlib.blake2b(f"{key}|{occurrence}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+def assign_fingerprints(df: pd.DataFrame, carry: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Add a 'fingerprint' column hashing (date, description, amount, occurrence).
+
+    The occurrence number keeps genuinely repeated rows (two identical coffees
+    on one day) distinct, while overlapping exports of the same statement hash
+    identically. ``carry`` continues occurrence counts from the previous chunk
+    of a streamed file; the counts for this chunk's keys are returned.
+    """
+    keys = fingerprint_keys(df)
+    occurrences = keys.groupby(keys, sort=False).cumcount()
+    if carry:
+        occurrences = occurrences + keys.map(carry).fillna(0).astype(int)
+    df['_fingerprint_key'] = keys
+    df['_occurrence'] = occurrences
+    df['fingerprint'] = [hash_fingerprint(k, o) for k, o in zip(keys, occurrences)]
+    return (occurrences + 1).groupby(keys, sort=False).max().to_dict()
+
+def stored_fingerprints(db: Session, session_id: str, fingerprints) -> Dict[int, int]:
+    """Map of fingerprint -> transaction id for the given fingerprints already stored in a session"""
+    values = list(fingerprints)
+    found = {}
+    for offset in range(0, len(values), FINGERPRINT_LOOKUP_BATCH):
+        batch = values[offset:offset + FINGERPRINT_LOOKUP_BATCH]
+        found.update(
+            db.query(Transaction.fingerprint, Transaction.id)
+            .filter(Transaction.session_id == session_id)
+            .filter(Transaction.fingerprint.in_(batch))
+            .all()
+        )
+    return found
+
+def merge_transactions(
+    db: Session, df: pd.DataFrame, own_since_id: int, session_id: str = DEFAULT_SESSION_ID
+) -> Tuple[int, int, Tuple[str, ...]]:
+    """Insert only rows whose fingerprint is not stored yet. Returns (inserted, duplicates, changed aggregates).
+
+    Rows with id > ``own_since_id`` were written by the current upload (earlier
+    chunks of the same file), so a match against them is not a duplicate: the
+    occurrence number is bumped instead. Cost is one indexed lookup per row.
+    """
+    stored = stored_fingerprints(db, session_id, df['fingerprint'])
+    while True:
+        own = df['fingerprint'].map(lambda fp: stored.get(fp, 0) > own_since_id)
+        if not own.any():
+            break
+        # Shift every row of the colliding keys past the occurrences already written
+        shifted = df['_fingerprint_key'].isin(set(df.loc[own, '_fingerprint_key']))
+        df.loc[shifted, '_occurrence'] += 1
+        df.loc[shifted, 'fingerprint'] = [
+            hash_fingerprint(k, o)
+            for k, o in zip(df.loc[shifted, '_fingerprint_key'], df.loc[shifted, '_occurrence'])
+        ]
+        stored.update(stored_fingerprints(db, session_id, df.loc[shifted, 'fingerprint']))
+
+    is_new = ~df['fingerprint'].isin(stored.keys())
+    inserted = bulk_insert_transactions(db, df[is_new], session_id=session_id)
+    return inserted, int((~is_new).sum()), added_rows_aggregates(df[is_new])
+
+def added_rows_aggregates(df: pd.DataFrame) -> Tuple[str, ...]:
+    """The aggregates that inserting these rows into a session changes; none for an empty frame"""
+    if df.empty:
+        return ()
+    expenses = df['amount'] < 0
+    if not expenses.any():
+        return INCOME_AGGREGATES if (df['amount'] > 0).any() else ("transactions",)
+    # Alerts only look at the current calendar month
+    this_month = pd.Timestamp(date.today().replace(day=1))
+    if (pd.to_datetime(df.loc[expenses, 'date']) >= this_month).any():
+        return TRANSACTION_AGGREGATES
+    return tuple(a for a in TRANSACTION_AGGREGATES if a != "spending_alerts")
+
+def bulk_insert_transactions(
+    db: Session, df: pd.DataFrame, batch_size: int = INSERT_BATCH_SIZE, session_id: str = DEFAULT_SESSION_ID
+) -> int:
+    """Insert a normalized frame into one session with Core executemany, bypassing the ORM unit of work.
+
+    Rows are taken straight from the DataFrame columns in batches of
+    ``batch_size``; no Transaction instances are created. The rollup table is
+    updated in the same transaction. The caller commits.
+    """
+    df = df.assign(session_id=session_id)
+    if 'fingerprint' not in df.columns:
+        assign_fingerprints(df)
+    stmt = insert(Transaction.__table__)
+    frame = df[TRANSACTION_COLUMNS].astype({"amount": float})
+    inserted = 0
+    with ingest_stage("insert"):
+        for offset in range(0, len(frame), batch_size):
+            batch = frame.iloc[offset:offset + batch_size]
+            rows = [
+                dict(zip(TRANSACTION_COLUMNS, values))
+                for values in zip(*(batch[c].tolist() for c in TRANSACTION_COLUMNS))
+            ]
+            db.execute(stmt, rows)
+            inserted += len(rows)
+        apply_rollup_delta(db, frame)
+    return inserted
+
+def backfill_fingerprints(db: Session) -> int:
+    """Fingerprint rows stored before the fingerprint column existed"""
+    rows = (
+        db.query(Transaction.id, Transaction.date, Transaction.description, Transaction.amount)
+        .filter(Transaction.fingerprint.is_(None))
+        .order_by(Transaction.id)
+        .all()
+    )
+    if not rows:
+        return 0
+    frame = pd.DataFrame(rows, columns=["id", "date", "description", "amount"])
+    assign_fingerprints(frame)
+    db.execute(
+        Transaction.__table__.update()
+        .where(Transaction.__table__.c.id == bindparam("row_id"))
+        .values(fingerprint=bindparam("fp")),
+        [{"row_id": i, "fp": fp} for i, fp in zip(frame['id'].tolist(), frame['fingerprint'].tolist())],
+    )
+    db.commit()
+    return len(frame)
+
+def delete_all_transactions(db: Session, session_id: Optional[str] = DEFAULT_SESSION_ID) -> int:
+    """Delete a session's transactions (every session's if session_id is None) with their rollup rows.
+
+    Other sessions are untouched. The caller commits.
+    """
+    clear_rollups(db, session_id)
+    query = db.query(Transaction)
+    corrections = db.query(CategoryCorrection)
+    if session_id is not None:
+        query = query.filter(Transaction.session_id == session_id)
+        corrections = corrections.filter(CategoryCorrection.session_id == session_id)
+    # Freed ids can be reused by the next insert; a correction must not follow its id to a new row
+    corrections.delete()
+    return query.delete()
+
+def require_session(db: Session, session_id: str):
+    """404 for a session id that was never created; the default partition always exists"""
+    if session_id == DEFAULT_SESSION_ID:
+        return
+    if not db.query(exists().where(UserSession.session_id == session_id)).scalar():
+        raise HTTPException(status_code=404, detail="Session not found")
+
+def mark_session_written(db: Session, session_id: Optional[str]):
+    """Record a write to a session's rows (every session's if session_id is None). The caller commits."""
+    stmt = update(UserSession).values(last_activity=datetime.utcnow())
+    if session_id is not None:
+        stmt = stmt.where(UserSession.session_id == session_id)
+    db.execute(stmt)
+
+# Sessions uploaded before transactions were partitioned kept their data only
+# in user_sessions: a JSON payload, later the columnar frame of session_store
+HAS_SESSION_PAYLOAD = UserSession.transactions_frame.isnot(None) | UserSession.transactions_data.isnot(None)
+
+def decode_session_payload(frame: Optional[bytes], data: Optional[str]) -> pd.DataFrame:
+    """A stored session payload as a normalized frame ready for bulk_insert_transactions"""
+    if frame is not None:
+        df = decode_frame(frame)
+    else:
+        df = pd.read_json(io.StringIO(data))
+        df['date'] = pd.to_datetime(df['date'], unit='ms') if df['date'].dtype.kind in "iu" else pd.to_datetime(df['date'])
+    df['date'] = df['date'].dt.date
+    # Session uploads never ran the categorizer, so every category came from the CSV
+    df['category_source'] = "csv"
+    return df[["date", "description", "merchant", "amount", "category", "category_source"]]
+
+def move_session_payload(db: Session, session_id: str) -> int:
+    """Move a session's legacy payload into its transaction rows and drop it; returns the rows moved.
+
+    Rows already in the session were written after the payload and replace
+    it, so the payload is then dropped without moving anything. The caller commits.
+    """
+    payload = (
+        db.query(UserSession.transactions_frame, UserSession.transactions_data)
+        .filter(UserSession.session_id == session_id, HAS_SESSION_PAYLOAD)
+        .first()
+    )
+    if payload is None:
+        return 0
+    moved = 0
+    if not db.query(exists().where(Transaction.session_id == session_id)).scalar():
+        moved = bulk_insert_transactions(db, decode_session_payload(*payload), session_id=session_id)
+    db.execute(
+        update(UserSession).where(UserSession.session_id == session_id)
+        .values(transactions_frame=None, transactions_data=None, row_count=None)
+    )
+    logger.info("session payload moved to transactions", extra={"session_id": session_id, "rows": moved})
+    return moved
+
+def migrate_session_payloads(db: Session) -> int:
+    """Move every legacy session payload into the transactions table, one commit per session"""
+    pending = [s for (s,) in db.query(UserSession.session_id).filter(HAS_SESSION_PAYLOAD).all()]
+    moved = 0
+    for session_id in pending:
+        moved += move_session_payload(db, session_id)
+        db.commit()
+    return moved
+
+# (earliest, latest) transaction date per (session, data version). Every ingest
+# bumps data_timestamp, so entries for older versions are never read again.
+DATE_BOUNDS_CACHE_SIZE = int(os.getenv("DATE_BOUNDS_CACHE_SIZE", "64"))
+date_bounds_cache = register_cache("date_bounds", LRUCache(maxsize=DATE_BOUNDS_CACHE_SIZE))
+
+def dataset_date_bounds(db: Session, session_id: str = DEFAULT_SESSION_ID) -> Tuple[Optional[date], Optional[date]]:
+    """Earliest and latest transaction date of a session, cached per data version"""
+    key = (session_id, data_timestamp)
+    bounds = date_bounds_cache.get(key)
+    if bounds is None:
+        in_session = Transaction.session_id == session_id
+        # Separate scalar subqueries so each is a single probe of the (session_id, date) index
+        bounds = tuple(db.query(
+            select(func.min(Transaction.date)).where(in_session).scalar_subquery(),
+            select(func.max(Transaction.date)).where(in_session).scalar_subquery(),
+        ).one())
+        date_bounds_cache.put(key, bounds)
+    return bounds
+
+def parse_time_window(
+    q: str, db: Session = None, session_id: str = DEFAULT_SESSION_ID, entities: Optional[QuestionEntities] = None
+) -> Tuple[Optional[date], Optional[date]]:
+    """Date window of the question, relative to the latest transaction date (today if there is no data)"""
+    spec = (entities or analyze_question(q)).time_spec
+    if spec is None:
         return None, None
+    latest_date = dataset_date_bounds(db, session_id)[1] if db is not None else None
+    return resolve_time_window(spec, latest_date or date.today())
+
+def fit_tfidf_categorizer(db: Session) -> Optional[dict]:
+    """Full mode: refit TF-IDF + Naive Bayes on every labelled, not held-out row"""
+    rows = (
+        db.query(Transaction.description, Transaction.merchant, Transaction.category)
+        .filter(has_training_label(), not_held_out(Transaction.id))
+        .all()
+    )
     
-    descriptions = [f"{t.description} {t.merchant}" for t in transactions]
-    categories = [t.category for t in transactions]
+    if len(rows) < 10:
+        return None
     
+    descriptions = training_text([r[0] for r in rows], [r[1] for r in rows])
+    categories = [category for _, _, category in rows]
+    
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+
     vectorizer = TfidfVectorizer(max_features=1000)
     X = vectorizer.fit_transform(descriptions)
     
     model = MultinomialNB()
     model.fit(X, categories)
-    
-    joblib.dump(model, "ai_category_model.pkl")
-    joblib.dump(vectorizer, "ai_vectorizer.pkl")
-    
-    return model, vectorizer
+    accuracy, holdout_rows = holdout_accuracy(db, model, vectorizer)
+    return {
+        "kind": "tfidf_nb",
+        "model": model,
+        "vectorizer": vectorizer,
+        "training_rows": len(rows),
+        "new_rows": len(rows),
+        "incremental": False,
+        "holdout_accuracy": accuracy,
+        "holdout_rows": holdout_rows,
+    }
+
+def save_categorizer(categorizer: dict) -> dict:
+    """Write a categorizer as the next free version (a checkpoint) and prune the oldest ones"""
+    # Write to a temporary file, then hard-link it in: readers never see a half-written
+    # artifact, and a worker training at the same time can never overwrite this version
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    tmp_path = os.path.join(MODEL_DIR, f".categorizer-{uuid.uuid4().hex}.tmp")
+    categorizer["version"] = latest_model_version() + 1
+    try:
+        while True:
+            joblib.dump(categorizer, tmp_path)
+            try:
+                os.link(tmp_path, model_artifact_path(categorizer["version"]))
+                break
+            except FileExistsError:
+                categorizer["version"] = latest_model_version() + 1
+    finally:
+        os.remove(tmp_path)
+
+    # Workers still using a pruned version keep their mapping; the file is gone once they move on
+    for version in model_versions()[:-MODEL_CHECKPOINTS_KEPT]:
+        try:
+            os.remove(model_artifact_path(version))
+        except FileNotFoundError:
+            pass
+    return categorizer
+
+def train_ai_categorization_model(db: Session, base: Optional[dict] = None):
+    """Train a categorizer and save it as a new version.
+
+    In incremental mode ``base`` is extended with the rows it has not seen
+    (without one, every row is read once, in chunks); in full mode every
+    categorized row is refit. Returns None when there was nothing to train.
+    """
+    started = time.perf_counter()
+    if MODEL_TRAINING == "incremental":
+        categorizer = train_incremental(db, base)
+    else:
+        categorizer = fit_tfidf_categorizer(db)
+    if categorizer is None:
+        return None
+    categorizer.update(trained_at=datetime.utcnow().isoformat(), training_seconds=time.perf_counter() - started)
+    return save_categorizer(categorizer)
+
+def run_model_training(full: bool):
+    """Background worker: train a new categorizer and swap it in once it is ready.
+
+    Runs again while uploads or corrections keep requesting training, so rows
+    that arrive during a run are picked up by the next one.
+    """
+    global ai_categorizer
+    while True:
+        db = ReadSessionLocal()
+        try:
+            base = None if full else refresh_model_from_registry()
+            categorizer = train_ai_categorization_model(db, base)
+            if categorizer is not None:
+                # Memo rows of older versions are re-predicted by the next upload that looks them up
+                ai_categorizer = categorizer
+                # Stored categories are unchanged; only future uploads use the new model
+                publish_change("model_swap", MODEL_AGGREGATES, None, bumps_version=False)
+                logger.info("categorizer active", extra={
+                    "version": categorizer["version"], "rows": categorizer["training_rows"],
+                    "new_rows": categorizer["new_rows"], "incremental": categorizer["incremental"],
+                    "holdout_accuracy": categorizer["holdout_accuracy"],
+                    "seconds": round(categorizer["training_seconds"], 3),
+                })
+        except Exception as e:
+            logger.exception("model training failed")
+            with model_training_lock:
+                model_training_state["last_error"] = str(e)
+        finally:
+            db.close()
+        with model_training_lock:
+            if not model_training_state["queued"]:
+                model_training_state["in_progress"] = False
+                return
+            full = model_training_state["full"]
+            model_training_state.update(queued=False, full=False, last_started_at=datetime.utcnow().isoformat())
+
+def schedule_model_training(full: bool = False) -> bool:
+    """Start training in a background thread; while a run is in progress, queue one more instead.
+
+    full=True rebuilds from every row rather than extending the active model.
+    Returns whether a new thread was started.
+    """
+    with model_training_lock:
+        if model_training_state["in_progress"]:
+            model_training_state["queued"] = True
+            model_training_state["full"] = model_training_state["full"] or full
+            return False
+        model_training_state.update(in_progress=True, last_started_at=datetime.utcnow().isoformat(), last_error=None)
+    threading.Thread(target=run_model_training, args=(full,), name="model-training", daemon=True).start()
+    return True
+
+def train_after_ingest(replaced: bool = False):
+    """Incremental mode folds every upload and correction into the model; full mode trains only the first time.
+
+    After a replace upload the incremental model is rebuilt from every row:
+    partial_fit cannot forget the replaced rows, so extending it would count
+    them as well as their replacements.
+    """
+    if MODEL_TRAINING == "incremental" or refresh_model_from_registry() is None:
+        schedule_model_training(full=replaced)
 
 def ai_categorize_transaction(description: str, merchant: str):
     """Use AI to categorize uncategorized transactions"""
-    global ai_model, ai_vectorizer
+    categorizer = ai_categorizer
     
-    if ai_model is None or ai_vectorizer is None:
+    if categorizer is None:
         return "Uncategorized"
     
     text_input = f"{description} {merchant}"
-    X = ai_vectorizer.transform([text_input])
-    prediction = ai_model.predict(X)
+    X = categorizer["vectorizer"].transform([text_input])
+    prediction = categorizer["model"].predict(X)
     
     return prediction[0]
 
+# Predictions below this probability leave the row as 'Uncategorized'
+AI_CONFIDENCE_THRESHOLD = float(os.getenv("AI_CONFIDENCE_THRESHOLD", "0.0"))
+
+def ai_categorize_batch(descriptions: pd.Series, merchants: pd.Series):
+    """Predict categories for many transactions in one sparse-matrix pass.
+
+    Returns (categories, confidences) as arrays aligned with the inputs, where
+    confidence is the model's probability for the predicted category.
+    """
+    categorizer = ai_categorizer
+    if categorizer is None:
+        return np.full(len(descriptions), "Uncategorized", dtype=object), np.zeros(len(descriptions))
+
+    return predict(categorizer, descriptions.astype(str) + " " + merchants.astype(str))
+
+def categorize_uncategorized(
+    df: pd.DataFrame, threshold: float = AI_CONFIDENCE_THRESHOLD, db: Optional[Session] = None
+) -> pd.DataFrame:
+    """Fill 'Uncategorized' rows with predictions from the active categorizer, if there is one.
+
+    With ``db``, recurring descriptions are answered from the prediction memo
+    and new predictions are added to it in ``db``'s transaction.
+    """
+    uncategorized_mask = df['category'] == 'Uncategorized'
+    if not uncategorized_mask.any():
+        return df
+
+    categorizer = refresh_model_from_registry()
+    if categorizer is not None:
+        pending = df[uncategorized_mask]
+        with ingest_stage("ai_predict"):
+            if db is None:
+                categories, confidences = ai_categorize_batch(pending['description'], pending['merchant'])
+            else:
+                categories, confidences = categorize_with_memo(
+                    db, categorizer, pending['description'], pending['merchant'], memo_stats
+                )
+        confident = confidences >= threshold
+        df.loc[pending.index[confident], 'category'] = categories[confident]
+        df.loc[pending.index[confident], 'category_source'] = "ai"
+        logger.info("ai categorized", extra={
+            "categorized": int(confident.sum()), "below_threshold": int((~confident).sum()), "threshold": threshold,
+        })
+    return df
+
 def format_currency(amount: float) -> str:
     """Format amount as currency with proper sign"""
     if amount >= 0:
@@ -202,29 +762,144 @@ def format_currency(amount: float) -> str:
     else:
         return f"-₹{abs(amount):,.2f}"
 
+def format_growth(percent: Optional[float]) -> str:
+    return "new" if percent is None else f"{percent:+.1f}%"
+
 # -------------------------
 # APP SETUP
 # -------------------------
-app = FastAPI(title="AI Finance Chatbot")
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    ensure_started()
+    yield
+
+app = FastAPI(title="AI Finance Chatbot", lifespan=lifespan)
+
+# Read-only aggregate endpoints whose responses depend only on path, query and data version
+CACHEABLE_PATH_PREFIXES = ("/summary/", "/visualization/", "/analytics/", "/dashboard")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+response_cache = register_cache("responses", LRUCache(maxsize=RESPONSE_CACHE_SIZE))
+
+async def cached_response(request: Request, call_next):
+    """Serve a cacheable GET from the response cache, answering If-None-Match with 304"""
+    # "_" is the legacy cache-busting parameter; it must not fragment the cache
+    query = tuple(sorted((k, v) for k, v in request.query_params.multi_items() if k != "_"))
+    # /dashboard's spending alerts cover the current month, so the day is part of the key too
+    key = (request.url.path, query, data_timestamp, date.today())
+
+    entry = response_cache.get(key)
+    if entry is None:
+        response = await call_next(request)
+        if response.status_code != 200:
+            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = {
+            "body": body,
+            "media_type": response.media_type or response.headers.get("content-type"),
+            "etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        }
+        response_cache.put(key, entry)
+
+    # Revalidate on every use, but let clients skip the body when nothing changed
+    headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type=entry["media_type"], headers=headers)
 
-# 🚫 Disable caching globally
+# 🚫 Disable caching globally, except for the version-keyed aggregate endpoints
 @app.middleware("http")
 async def no_cache_middleware(request: Request, call_next):
+    # Pick up uploads and clears committed by other workers before serving anything
+    sync_shared_state()
+    if request.method == "GET" and request.url.path.startswith(CACHEABLE_PATH_PREFIXES):
+        return await cached_response(request, call_next)
     response = await call_next(request)
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
     response.headers["Pragma"] = "no-cache"
     response.headers["Expires"] = "0"
     return response
 
+@functools.lru_cache(maxsize=1)
+def static_route_paths() -> frozenset:
+    return frozenset(r.path for r in app.router.routes if "{" not in r.path)
+
+def route_template(request: Request) -> str:
+    """Path template of the route that served the request ('/session/{session_id}/upload'), for metric labels"""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    # Response cache hits never reach the router, but every cacheable path is a static route
+    path = request.url.path
+    return path if path in static_route_paths() else "unmatched"
+
+# Outermost of the two, so response cache hits and 304s are timed too
+@app.middleware("http")
+async def request_metrics_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = route_template(request)
+        http_request_seconds.observe(time.perf_counter() - started, request.method, route)
+        http_requests.inc(request.method, route, str(status))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-Base.metadata.create_all(bind=engine)
+def off_event_loop(db: Session, fn, *args):
+    """fn(*args), on a worker thread when db is a read_endpoint's session running on the event loop.
+
+    For the pandas/NumPy part of a read handler: fn must only take rows
+    already fetched, never the session, whose connection belongs to the loop.
+    """
+    if db.info.get("on_event_loop"):
+        return await_only(anyio.to_thread.run_sync(functools.partial(fn, *args)))
+    return fn(*args)
+
+def read_endpoint(route):
+    """Register a read-only handler written against a sync Session under the given route.
+
+    With DB_ASYNC_READS on, the route is an async def that runs the handler on
+    an AsyncSession via run_sync: its statements are awaited on aiosqlite's
+    connection threads instead of holding a threadpool worker for the whole
+    request. The handler itself then runs on the event loop, so anything
+    heavier than building a response from rows goes through off_event_loop.
+    Otherwise the handler is registered as a plain sync route on get_read_db.
+    The module-level name stays the sync function either way, so it can still
+    be called directly with a Session.
+    """
+    def register(handler):
+        if not DB_ASYNC_READS:
+            route(handler)
+            return handler
+        signature = inspect.signature(handler)
+        parameters = [
+            p.replace(annotation=AsyncSession, default=Depends(get_async_read_db)) if p.name == "db" else p
+            for p in signature.parameters.values()
+        ]
+
+        @functools.wraps(handler)
+        async def endpoint(*args, db: AsyncSession, **kwargs):
+            def call(session: Session):
+                session.info["on_event_loop"] = True
+                return handler(*args, db=session, **kwargs)
+            return await db.run_sync(call)
+
+        endpoint.__signature__ = signature.replace(parameters=parameters)
+        route(endpoint)
+        return handler
+    return register
 
 # -------------------------
 # ROUTES
@@ -233,110 +908,364 @@ Base.metadata.create_all(bind=engine)
 def root():
     return {"message": "🚀 AI Finance Chatbot Backend is running! Use /docs to explore the API."}
 
+# Imported on first use; /ready reports which of them this worker has loaded
+HEAVY_MODULES = ("numpy", "pandas", "joblib", "sklearn.feature_extraction.text", "sklearn.naive_bayes")
+
+@app.get("/ready")
+def readiness(warm: bool = False):
+    """Readiness probe: schema and change log are set up. Reports what this worker has loaded so far.
+
+    warm=true imports the dataframe and ML stacks and loads the categorizer
+    now, so a new worker can be warmed before it takes traffic.
+    """
+    ensure_started()
+    if warm:
+        for name in HEAVY_MODULES:
+            importlib.import_module(name)
+        refresh_model_from_registry()
+    categorizer = ai_categorizer
+    model = categorizer["model"] if categorizer else None
+    return {
+        "ready": True,
+        "started_at": started_at,
+        "modules": {name: is_loaded(name) for name in HEAVY_MODULES},
+        "model": {
+            "loaded": model_loaded,
+            "version": categorizer["version"] if categorizer else None,
+            "memory_mapped": model is not None and isinstance(getattr(model, "feature_log_prob_", None), np.memmap),
+        },
+        "timestamp": data_timestamp,
+    }
+
+def store_upload(
+    db: Session, df: pd.DataFrame, mode: str, session_id: str, categorize: bool = True
+) -> Tuple[int, int, Tuple[str, ...]]:
+    """Write one normalized upload into a session; returns (inserted, duplicates, changed aggregates).
+
+    mode=replace swaps out the session's rows, mode=append skips rows whose
+    fingerprint is already stored. The caller commits.
+    """
+    with ingest_stage("fingerprint"):
+        assign_fingerprints(df)
+    duplicates = moved = 0
+    if mode == "append":
+        # A payload stored after startup (by a worker still on older code) is part of what is appended to
+        moved = move_session_payload(db, session_id)
+        # Drop rows already stored before categorizing or inserting anything
+        stored = stored_fingerprints(db, session_id, df['fingerprint'])
+        is_new = ~df['fingerprint'].isin(stored.keys())
+        duplicates = int((~is_new).sum())
+        df = df[is_new].copy()
+        logger.info("append mode", extra={"new_rows": len(df), "duplicates": duplicates})
+
+    if categorize:
+        # AI Categorization for uncategorized transactions
+        df = categorize_uncategorized(df, db=db)
+
+    if mode == "replace":
+        # Delete the session's transactions to ensure fresh data
+        deleted_count = delete_all_transactions(db, session_id)
+        logger.info("replaced session data", extra={"session_id": session_id, "deleted": deleted_count})
+
+    inserted = bulk_insert_transactions(db, df, session_id=session_id)
+    mark_session_written(db, session_id)
+    changed = TRANSACTION_AGGREGATES if mode == "replace" or moved else added_rows_aggregates(df)
+    return inserted, duplicates, changed
+
+# Upload handlers are plain def: FastAPI runs them on its threadpool, so parsing,
+# categorizing and inserting never hold up the event loop and the reads it serves
 @app.post("/upload_csv")
-async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    global data_timestamp
+def upload_csv(
+    file: UploadFile = File(...), mode: str = "replace", session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_db)
+):
+    """Load a CSV into a session. mode=replace swaps out the session's data; mode=append adds only rows not stored yet"""
+    require_session(db, session_id)
     try:
         if not file.filename or not file.filename.endswith(".csv"):
             return {"ok": False, "error": "Please upload a CSV file."}
+        if mode not in UPLOAD_MODES:
+            return {"ok": False, "error": f"mode must be one of {UPLOAD_MODES}"}
 
         # Read file content
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-        
-        # DEBUG: Print what we received
-        print(f"CSV columns: {df.columns.tolist()}")
-        print(f"First 5 rows:\n{df.head()}")
+        with ingest_stage("read"):
+            df = pd.read_csv(file.file)
         
         # Normalize column names
         df.columns = [c.strip().lower() for c in df.columns]
-        print(f"Normalized columns: {df.columns.tolist()}")
+        logger.debug("csv received", extra={"upload": file.filename, "rows": len(df), "columns": df.columns.tolist()})
         
         # Check for required columns
         expected = {"date", "description", "amount", "category"}
         if not expected.issubset(set(df.columns)):
             return {"ok": False, "error": f"CSV must have columns: {expected}. Found: {df.columns.tolist()}"}
 
-        # Process dates
-        print("Processing dates...")
-        df['date'] = df['date'].apply(parse_csv_date)
-        print(f"Date sample: {df['date'].head()}")
+        # Process dates, categories, merchants and amounts column-wise
+        rows_read = len(df)
+        df = normalize_transactions_frame(df)
+        rejected = rows_read - len(df)
+
+        inserted, duplicates, changed = store_upload(db, df, mode, session_id)
+        with ingest_stage("commit"):
+            db.commit()
         
-        # Process categories
-        print("Processing categories...")
-        df['category'] = df['category'].fillna("Uncategorized").apply(normalize_category)
-        print(f"Category sample: {df['category'].head()}")
-        print(f"Unique categories: {df['category'].unique()}")
+        logger.info("upload inserted", extra={"session_id": session_id, "mode": mode, "inserted": inserted, "rejected": rejected})
         
-        # Process merchants
-        df['merchant'] = df['description'].fillna("").apply(extract_merchant)
-        print(f"Merchant sample: {df['merchant'].head()}")
+        # Update timestamp to force frontend refresh; an append of nothing new changes nothing
+        if changed:
+            bump_data_version("upload", session_id, changed)
+
+        # Train in the background, never in this request
+        train_after_ingest(replaced=mode == "replace")
+
+        return {
+            "ok": True,
+            "rows": inserted,
+            "mode": mode,
+            "session_id": session_id,
+            "inserted": inserted,
+            "duplicates": duplicates,
+            "rejected": rejected,
+            "timestamp": data_timestamp
+        }
         
-        # Process amounts
-        df['amount'] = pd.to_numeric(df['amount'], errors="coerce")
-        df = df.dropna(subset=["amount", "date"])
-        print(f"Amount sample: {df['amount'].head()}")
-        print(f"Amount stats - Min: {df['amount'].min()}, Max: {df['amount'].max()}, Mean: {df['amount'].mean()}")
+    except Exception as e:
+        logger.exception("upload failed")
+        return {"ok": False, "error": f"Upload failed: {str(e)}"}
 
-        # AI Categorization for uncategorized transactions
-        uncategorized_mask = df['category'] == 'Uncategorized'
-        print(f"Uncategorized transactions: {uncategorized_mask.sum()}")
-        
-        if uncategorized_mask.any():
-            global ai_model, ai_vectorizer
-            if ai_model is None:
-                ai_model, ai_vectorizer = train_ai_categorization_model(db)
-            
-            if ai_model is not None:
-                for idx, row in df[uncategorized_mask].iterrows():
-                    predicted_category = ai_categorize_transaction(row['description'], row['merchant'])
-                    df.at[idx, 'category'] = predicted_category
-
-        records = [
-            Transaction(
-                date=row.date,
-                description=row.description,
-                merchant=row.merchant,
-                amount=float(row.amount),
-                category=row.category,
+# -------------------------
+# STREAMING UPLOADS
+# -------------------------
+# Rows normalized, categorized and committed per batch in streaming mode
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "50000"))
+# Bytes read from the request body per await when spooling it to disk
+STREAM_READ_BYTES = 1024 * 1024
+MAX_TRACKED_UPLOAD_JOBS = 100
+
+upload_jobs: "OrderedDict[str, dict]" = OrderedDict()
+upload_jobs_lock = threading.Lock()
+
+def register_upload_job(filename: str, mode: str = "replace", session_id: str = DEFAULT_SESSION_ID) -> str:
+    job_id = str(uuid.uuid4())
+    with upload_jobs_lock:
+        upload_jobs[job_id] = {
+            "status": "queued",
+            "filename": filename,
+            "mode": mode,
+            "session_id": session_id,
+            "rows_read": 0,
+            "rows_processed": 0,
+            "duplicates": 0,
+            "rejected": 0,
+            "chunks_committed": 0,
+            "error": None,
+            "started_at": datetime.utcnow().isoformat(),
+            "finished_at": None,
+        }
+        # Forget the oldest jobs so the registry stays bounded
+        while len(upload_jobs) > MAX_TRACKED_UPLOAD_JOBS:
+            upload_jobs.popitem(last=False)
+    return job_id
+
+def update_upload_job(job_id: str, **fields):
+    with upload_jobs_lock:
+        if job_id in upload_jobs:
+            upload_jobs[job_id].update(fields)
+
+def ingest_csv_stream(
+    job_id: str, path: str, mode: str = "replace", chunk_rows: int = STREAM_CHUNK_ROWS, session_id: str = DEFAULT_SESSION_ID
+):
+    """Normalize, categorize and commit a spooled CSV one chunk at a time.
+
+    Only one chunk of rows is held in memory at once. Each chunk is committed
+    in its own transaction and the job's progress is updated after every commit.
+    """
+    db = SessionLocal()
+    rows_read = rows_processed = duplicates = rejected = 0
+    update_upload_job(job_id, status="running")
+    try:
+        if mode == "append" and move_session_payload(db, session_id):
+            # Committed before own_since_id, so the moved rows count as stored rows, not this job's
+            db.commit()
+            bump_data_version("upload", session_id, TRANSACTION_AGGREGATES)
+        # Rows with a higher id than this were written by this job
+        own_since_id = 0 if mode == "replace" else (db.query(func.max(Transaction.id)).scalar() or 0)
+        carry = None
+        for chunk_no, chunk in enumerate(timed_chunks("read", pd.read_csv(path, chunksize=chunk_rows)), start=1):
+            rows_read += len(chunk)
+            chunk.columns = [c.strip().lower() for c in chunk.columns]
+            normalized = normalize_transactions_frame(chunk)
+            rejected += len(chunk) - len(normalized)
+            with ingest_stage("fingerprint"):
+                carry = assign_fingerprints(normalized, carry)
+            chunk = categorize_uncategorized(normalized, db=db)
+
+            replacing = chunk_no == 1 and mode == "replace"
+            if replacing:
+                # Replace the session's previous dataset, like upload_csv does
+                delete_all_transactions(db, session_id)
+            inserted, skipped, changed = merge_transactions(db, chunk, own_since_id, session_id)
+            mark_session_written(db, session_id)
+            with ingest_stage("commit"):
+                db.commit()
+
+            rows_processed += inserted
+            duplicates += skipped
+            if replacing or changed:
+                bump_data_version("upload", session_id, TRANSACTION_AGGREGATES if replacing else changed)
+            update_upload_job(
+                job_id, rows_read=rows_read, rows_processed=rows_processed,
+                duplicates=duplicates, rejected=rejected, chunks_committed=chunk_no
             )
-            for row in df.itertuples(index=False)
-        ]
 
-        # Delete ALL transactions to ensure fresh data
-        deleted_count = db.query(Transaction).delete()
-        print(f"Deleted {deleted_count} old transactions")
-        
-        db.add_all(records)
-        db.commit()
-        
-        print(f"Inserted {len(records)} new transactions")
-        
-        # Verify insertion
-        new_count = db.query(Transaction).count()
-        print(f"Total transactions in DB after upload: {new_count}")
-        
-        # Update timestamp to force frontend refresh
-        data_timestamp = time.time()
+        update_upload_job(job_id, status="completed", finished_at=datetime.utcnow().isoformat())
+        logger.info("streaming upload completed", extra={
+            "job_id": job_id, "session_id": session_id, "inserted": rows_processed,
+            "duplicates": duplicates, "rejected": rejected, "chunks": chunk_no,
+        })
+        train_after_ingest(replaced=mode == "replace")
+    except Exception as e:
+        db.rollback()
+        logger.exception("streaming upload failed", extra={"job_id": job_id})
+        update_upload_job(job_id, status="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+    finally:
+        db.close()
+        os.remove(path)
+
+@app.post("/upload_csv/stream")
+async def upload_csv_stream(
+    background_tasks: BackgroundTasks, file: UploadFile = File(...), mode: str = "replace", session_id: str = DEFAULT_SESSION_ID,
+    db: Session = Depends(get_read_db)
+):
+    """Streaming variant of /upload_csv: returns a job id immediately and ingests in chunks"""
+    require_session(db, session_id)
+    if not file.filename or not file.filename.endswith(".csv"):
+        return {"ok": False, "error": "Please upload a CSV file."}
+    if mode not in UPLOAD_MODES:
+        return {"ok": False, "error": f"mode must be one of {UPLOAD_MODES}"}
+
+    # Spool the body to disk in fixed-size reads so memory stays flat for any file size
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
+        while chunk := await file.read(STREAM_READ_BYTES):
+            tmp.write(chunk)
 
-        return {"ok": True, "rows": len(records), "timestamp": data_timestamp}
-        
+    try:
+        columns = [c.strip().lower() for c in pd.read_csv(tmp.name, nrows=0).columns]
     except Exception as e:
-        print(f"Upload error: {str(e)}")
+        os.remove(tmp.name)
         return {"ok": False, "error": f"Upload failed: {str(e)}"}
 
+    expected = {"date", "description", "amount", "category"}
+    if not expected.issubset(set(columns)):
+        os.remove(tmp.name)
+        return {"ok": False, "error": f"CSV must have columns: {expected}. Found: {columns}"}
+
+    job_id = register_upload_job(file.filename, mode, session_id)
+    background_tasks.add_task(ingest_csv_stream, job_id, tmp.name, mode, session_id=session_id)
+    return {"ok": True, "job_id": job_id, "status_url": f"/upload/{job_id}/status"}
+
+@app.get("/upload/{job_id}/status")
+def upload_status(job_id: str):
+    with upload_jobs_lock:
+        job = dict(upload_jobs[job_id]) if job_id in upload_jobs else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return {"job_id": job_id, **job, "timestamp": data_timestamp}
+
+# -------------------------
+# CATEGORIZER MODEL
+# -------------------------
+@app.get("/model/status")
+def model_status():
+    categorizer = refresh_model_from_registry()
+    with model_training_lock:
+        training = dict(model_training_state)
+    # Legacy pickles and models saved before incremental training lack the newer fields
+    info = categorizer or {}
+    return {
+        "active_version": info.get("version"),
+        "mode": MODEL_TRAINING,
+        "kind": info.get("kind"),
+        "trained_at": info.get("trained_at"),
+        "training_seconds": info.get("training_seconds"),
+        "training_rows": info.get("training_rows"),
+        "new_rows": info.get("new_rows"),
+        "incremental": info.get("incremental"),
+        "holdout_accuracy": info.get("holdout_accuracy"),
+        "holdout_rows": info.get("holdout_rows"),
+        "memo": memo_stats.stats(),
+        "training": training,
+        "timestamp": data_timestamp
+    }
+
+@app.post("/model/train")
+def trigger_model_training():
+    """Retrain the categorizer from every row in the background; the current model stays active until then"""
+    started = schedule_model_training(full=True)
+    return {"ok": True, "started": started, "message": "Training started" if started else "Training queued after the current run"}
+
+@app.put("/transactions/{transaction_id}/category")
+def correct_category(transaction_id: int, update: CategoryUpdate, db: Session = Depends(get_db)):
+    """Fix one transaction's category. The rollup follows, and incremental training learns the correction."""
+    transaction = db.get(Transaction, transaction_id)
+    if transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    category = normalize_category(update.category)
+    if category != transaction.category:
+        session_id = transaction.session_id
+        before = pd.DataFrame([{
+            "session_id": session_id, "date": transaction.date, "merchant": transaction.merchant,
+            "amount": transaction.amount, "category": transaction.category,
+        }])
+        apply_rollup_delta(db, before, direction=-1)
+        apply_rollup_delta(db, before.assign(category=category))
+        transaction.category = category
+        transaction.category_source = "user"
+        db.add(CategoryCorrection(session_id=session_id, transaction_id=transaction_id, category=category))
+        mark_session_written(db, session_id)
+        # Read nothing from the ORM after this: a refresh would reopen a write transaction
+        db.commit()
+        bump_data_version("correction", session_id, CORRECTION_AGGREGATES)
+        train_after_ingest()
+    return {"ok": True, "id": transaction_id, "category": category, "timestamp": data_timestamp}
+
 # Summary Endpoints with Date Filtering
-@app.get("/summary/by_category")
-def by_category(start_date: Optional[str] = None, end_date: Optional[str] = None, db: Session = Depends(get_db)):
+@read_endpoint(app.get("/summary/by_category"))
+def by_category(
+    start_date: Optional[str] = None, end_date: Optional[str] = None, session_id: str = DEFAULT_SESSION_ID,
+    db: Session = Depends(get_read_db)
+):
     # Query for expenses (filter for negative amounts which represent expenses)
-    query = db.query(Transaction.category, func.sum(Transaction.amount)).filter(Transaction.amount < 0)
-    
     if start_date and end_date:
         start = parse_csv_date(start_date)
         end = parse_csv_date(end_date)
-        query = query.filter(Transaction.date.between(start, end))
-    
-    q = query.group_by(Transaction.category).all()
+        months = whole_month_range(start, end)
+        if months:
+            # Whole-month ranges can still be answered from the rollup
+            q = (
+                db.query(TransactionRollup.category, func.sum(TransactionRollup.total))
+                .filter(TransactionRollup.session_id == session_id)
+                .filter(TransactionRollup.sign == -1)
+                .filter(TransactionRollup.month.between(*months))
+                .group_by(TransactionRollup.category)
+                .all()
+            )
+        else:
+            q = (
+                db.query(Transaction.category, func.sum(Transaction.amount))
+                .filter(Transaction.session_id == session_id)
+                .filter(Transaction.amount < 0)
+                .filter(Transaction.date.between(start, end))
+                .group_by(Transaction.category)
+                .all()
+            )
+    else:
+        q = (
+            db.query(TransactionRollup.category, func.sum(TransactionRollup.total))
+            .filter(TransactionRollup.session_id == session_id)
+            .filter(TransactionRollup.sign == -1)
+            .group_by(TransactionRollup.category)
+            .all()
+        )
     
     # Format the data and ensure values are positive for spending visualization
     result = []
@@ -349,9 +1278,16 @@ def by_category(start_date: Optional[str] = None, end_date: Optional[str] = None
     result.sort(key=lambda x: x['value'], reverse=True)
     return {"data": result, "timestamp": data_timestamp}
 
-@app.get("/summary/top_merchants")
-def top_merchants(limit: int = 5, start_date: Optional[str] = None, end_date: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(Transaction.merchant, func.sum(Transaction.amount).label("total")).filter(Transaction.amount < 0)
+@read_endpoint(app.get("/summary/top_merchants"))
+def top_merchants(
+    limit: int = 5, start_date: Optional[str] = None, end_date: Optional[str] = None, session_id: str = DEFAULT_SESSION_ID,
+    db: Session = Depends(get_read_db)
+):
+    query = (
+        db.query(Transaction.merchant, func.sum(Transaction.amount).label("total"))
+        .filter(Transaction.session_id == session_id)
+        .filter(Transaction.amount < 0)
+    )
     
     if start_date and end_date:
         start = parse_csv_date(start_date)
@@ -361,50 +1297,53 @@ def top_merchants(limit: int = 5, start_date: Optional[str] = None, end_date: Op
     q = query.group_by(Transaction.merchant).order_by(text("total ASC")).limit(limit).all()
     return {"data": [{"label": m, "value": float(abs(v))} for m, v in q], "timestamp": data_timestamp}
 
-@app.get("/summary/monthly_totals")
-def monthly_total_expenses(db: Session = Depends(get_db)):
+@read_endpoint(app.get("/summary/monthly_totals"))
+def monthly_total_expenses(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     q = (
-        db.query(
-            func.strftime('%Y-%m', Transaction.date).label('month'),
-            func.sum(Transaction.amount).label("total")
-        )
-        .filter(Transaction.amount < 0)
-        .group_by('month')
-        .order_by('month')
+        db.query(TransactionRollup.month, func.sum(TransactionRollup.total).label("total"))
+        .filter(TransactionRollup.session_id == session_id)
+        .filter(TransactionRollup.sign == -1)
+        .group_by(TransactionRollup.month)
+        .order_by(TransactionRollup.month)
         .all()
     )
     return {"data": [{"label": m, "value": float(abs(v))} for m, v in q], "timestamp": data_timestamp}
 
 # Visualization Endpoints for Charts
-@app.get("/visualization/category_pie")
-def category_pie_chart_data(db: Session = Depends(get_db)):
+CATEGORY_COLORS = ["#FF6384", "#36A2EB", "#FFCE56", "#4BC0C0", "#9966FF", "#FF9F40", "#FF6384", "#C9CBCF"]
+
+@read_endpoint(app.get("/visualization/category_pie"))
+def category_pie_chart_data(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     """Data for category pie chart - SHOWS ONLY EXPENSES"""
     # Get only expense categories (amount < 0)
     expense_data = (
-        db.query(Transaction.category, func.sum(Transaction.amount).label('total'))
-        .filter(Transaction.amount < 0)
-        .group_by(Transaction.category)
+        db.query(TransactionRollup.category, func.sum(TransactionRollup.total).label('total'))
+        .filter(TransactionRollup.session_id == session_id)
+        .filter(TransactionRollup.sign == -1)
+        .group_by(TransactionRollup.category)
+        .order_by(TransactionRollup.category)
         .all()
     )
     
     return {
         "labels": [item[0] for item in expense_data],
         "values": [abs(float(item[1])) for item in expense_data],
-        "colors": ["#FF6384", "#36A2EB", "#FFCE56", "#4BC0C0", "#9966FF", "#FF9F40", "#FF6384", "#C9CBCF"],
+        "colors": CATEGORY_COLORS,
         "timestamp": data_timestamp
     }
 
-@app.get("/visualization/monthly_trend")
-def monthly_trend_data(db: Session = Depends(get_db)):
+@read_endpoint(app.get("/visualization/monthly_trend"))
+def monthly_trend_data(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     """Data for monthly trend line chart"""
     monthly_data = (
         db.query(
-            func.strftime('%Y-%m', Transaction.date).label('month'),
-            func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label('expenses'),
-            func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label('income')
+            TransactionRollup.month,
+            func.sum(case((TransactionRollup.sign == -1, TransactionRollup.total), else_=0)).label('expenses'),
+            func.sum(case((TransactionRollup.sign == 1, TransactionRollup.total), else_=0)).label('income')
         )
-        .group_by('month')
-        .order_by('month')
+        .filter(TransactionRollup.session_id == session_id)
+        .group_by(TransactionRollup.month)
+        .order_by(TransactionRollup.month)
         .all()
     )
     
@@ -417,14 +1356,15 @@ def monthly_trend_data(db: Session = Depends(get_db)):
 
 # --- NEW MERCHANT ENDPOINTS ---
 
-@app.get("/visualization/top_merchants_by_total_spending")
-def top_merchants_by_total_spending(limit: int = 10, db: Session = Depends(get_db)):
+@read_endpoint(app.get("/visualization/top_merchants_by_total_spending"))
+def top_merchants_by_total_spending(limit: int = 10, session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     """
     NEW: Data for top merchants bar chart based on TOTAL combined spending.
     This aggregates all payments to a single merchant.
     """
     data = (
         db.query(Transaction.merchant, func.sum(Transaction.amount).label('total'))
+        .filter(Transaction.session_id == session_id)
         .filter(Transaction.amount < 0)
         .group_by(Transaction.merchant)
         .order_by(text("total ASC"))  # ASC on negative numbers correctly gets the largest spenders
@@ -437,14 +1377,15 @@ def top_merchants_by_total_spending(limit: int = 10, db: Session = Depends(get_d
         "timestamp": data_timestamp
     }
 
-@app.get("/visualization/top_merchants_by_single_payment")
-def top_merchants_by_single_payment(limit: int = 10, db: Session = Depends(get_db)):
+@read_endpoint(app.get("/visualization/top_merchants_by_single_payment"))
+def top_merchants_by_single_payment(limit: int = 10, session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     """
     NEW: Data for largest SINGLE payments to merchants.
     This shows the biggest individual transactions, without aggregation.
     """
     data = (
         db.query(Transaction.merchant, Transaction.amount, Transaction.date)
+        .filter(Transaction.session_id == session_id)
         .filter(Transaction.amount < 0)
         .order_by(Transaction.amount.asc())  # .asc() gets the most negative (largest) individual payments
         .limit(limit)
@@ -461,15 +1402,16 @@ def top_merchants_by_single_payment(limit: int = 10, db: Session = Depends(get_d
 # --- END OF NEW ENDPOINTS ---
 
 
-@app.get("/visualization/income_vs_expenses")
-def income_vs_expenses_data(db: Session = Depends(get_db)):
+@read_endpoint(app.get("/visualization/income_vs_expenses"))
+def income_vs_expenses_data(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     """Data for income vs expenses overview"""
+    totals = db.query(func.sum(TransactionRollup.total)).filter(TransactionRollup.session_id == session_id)
     # Calculate total income (positive amounts)
-    total_income_result = db.query(func.sum(Transaction.amount)).filter(Transaction.amount > 0).scalar()
+    total_income_result = totals.filter(TransactionRollup.sign == 1).scalar()
     total_income = float(total_income_result) if total_income_result else 0.0
     
     # Calculate total expenses (absolute value of negative amounts)
-    total_expenses_result = db.query(func.sum(Transaction.amount)).filter(Transaction.amount < 0).scalar()
+    total_expenses_result = totals.filter(TransactionRollup.sign == -1).scalar()
     total_expenses = abs(float(total_expenses_result)) if total_expenses_result else 0.0
     
     # Calculate net savings
@@ -482,26 +1424,174 @@ def income_vs_expenses_data(db: Session = Depends(get_db)):
         "timestamp": data_timestamp
     }
 
+# Consolidated dashboard
+@read_endpoint(app.get("/dashboard"))
+def dashboard(
+    start_date: Optional[str] = None, end_date: Optional[str] = None, session_id: str = DEFAULT_SESSION_ID,
+    db: Session = Depends(get_read_db)
+):
+    """Every dashboard payload in one round trip.
+
+    Category, monthly, merchant-total and income/expense payloads are all
+    derived from one rollup read; largest single payments and budgets add one
+    query each. Payload shapes match the individual endpoints.
+    """
+    timestamp = data_timestamp
+    start = end = None
+    if start_date and end_date:
+        start = parse_csv_date(start_date)
+        end = parse_csv_date(end_date)
+
+    rollup_rows = load_rollup_rows(db, session_id, start, end)
+    single_query = (
+        db.query(Transaction.merchant, Transaction.amount, Transaction.date)
+        .filter(Transaction.session_id == session_id)
+        .filter(Transaction.amount < 0)
+    )
+    if start and end:
+        single_query = single_query.filter(Transaction.date.between(start, end))
+    single = single_query.order_by(Transaction.amount.asc()).limit(10).all()
+    # Alerts cover the current calendar month regardless of the requested range
+    month_rows = load_rollup_rows(db, session_id) if start and end else rollup_rows
+    budgets = {b.category: b.monthly_budget for b in active_budgets(db, session_id)}
+    payload = off_event_loop(db, dashboard_payload, rollup_rows, month_rows, single, budgets)
+    payload["timestamp"] = timestamp
+    return payload
+
+def dashboard_payload(rollup_rows: list, month_rows: list, single: list, budgets: Dict[str, float]) -> dict:
+    """The /dashboard aggregates from rows dashboard() fetched, without the session"""
+    rollup = rollup_rows_frame(rollup_rows)
+    expenses = rollup[rollup['sign'] == -1]
+    income = rollup[rollup['sign'] == 1]
+
+    by_cat = expenses.groupby('category', sort=True)['total'].sum()
+    by_month = (
+        rollup.assign(
+            expenses=rollup['total'].where(rollup['sign'] == -1, 0.0),
+            income=rollup['total'].where(rollup['sign'] == 1, 0.0),
+        )
+        .groupby('month', sort=True)[['expenses', 'income']]
+        .sum()
+    )
+    expense_months = expenses.groupby('month', sort=True)['total'].sum()
+    by_merchant = expenses.groupby('merchant')['total'].sum().sort_values(kind='stable')
+
+    current_month = date.today().strftime('%Y-%m')
+    month_rows = rollup if month_rows is rollup_rows else rollup_rows_frame(month_rows)
+    month_rows = month_rows[(month_rows['sign'] == -1) & (month_rows['month'] >= current_month)]
+    monthly_spending = month_rows.groupby('category')['total'].sum().items()
+    alerts = spending_alerts_from(monthly_spending, budgets)
+
+    total_income = float(income['total'].sum())
+    total_expenses = abs(float(expenses['total'].sum()))
+    return {
+        "by_category": {
+            "data": sorted(
+                ({"label": c, "value": float(abs(v))} for c, v in by_cat.items()),
+                key=lambda x: x['value'], reverse=True,
+            )
+        },
+        "top_merchants": {
+            "data": [{"label": m, "value": float(abs(v))} for m, v in by_merchant.head(5).items()]
+        },
+        "monthly_totals": {
+            "data": [{"label": m, "value": float(abs(v))} for m, v in expense_months.items()]
+        },
+        "category_pie": {
+            "labels": list(by_cat.index),
+            "values": [abs(float(v)) for v in by_cat.values],
+            "colors": CATEGORY_COLORS,
+        },
+        "monthly_trend": {
+            "months": list(by_month.index),
+            "expenses": [abs(float(v)) for v in by_month['expenses']],
+            "income": [float(v) for v in by_month['income']],
+        },
+        "top_merchants_by_total": {
+            "labels": list(by_merchant.head(10).index),
+            "amounts": [abs(float(v)) for v in by_merchant.head(10).values],
+        },
+        "top_merchants_by_single": {
+            "labels": [f"{m} ({d.strftime('%d-%b')})" for m, _, d in single],
+            "amounts": [abs(float(a)) for _, a, _ in single],
+        },
+        "income_vs_expenses": {
+            "totalIncome": total_income,
+            "totalExpenses": total_expenses,
+            "netSavings": total_income - total_expenses,
+        },
+        "spending_alerts": alerts,
+    }
+
+# Analytics
+@read_endpoint(app.get("/analytics/category_growth"))
+def category_growth_ranking(
+    window: int = DEFAULT_GROWTH_WINDOW, limit: Optional[int] = None,
+    start_date: Optional[str] = None, end_date: Optional[str] = None, session_id: str = DEFAULT_SESSION_ID,
+    db: Session = Depends(get_read_db)
+):
+    """Expense categories ranked by trailing-window growth, with month-over-month growth"""
+    if window < 1:
+        raise HTTPException(status_code=400, detail="window must be at least 1")
+    start = end = None
+    if start_date and end_date:
+        start = parse_csv_date(start_date)
+        end = parse_csv_date(end_date)
+    rows = category_month_rows(db, session_id, start, end)
+    matrix, ranked = off_event_loop(db, ranked_growth, rows, window)
+    return {
+        "data": ranked[:limit] if limit else ranked,
+        "months": len(matrix.months),
+        "window": effective_window(len(matrix.months), window),
+        "timestamp": data_timestamp
+    }
+
+def ranked_growth(rows: list, window: int = DEFAULT_GROWTH_WINDOW):
+    """(spend matrix, category_growth ranking) for category_month_rows"""
+    matrix = spend_matrix(rows)
+    return matrix, category_growth(matrix, window)
+
 # Budget Management
 @app.post("/budgets")
-def set_budget(category: str, monthly_budget: float, db: Session = Depends(get_db)):
-    budget = db.query(Budget).filter(Budget.category == category).first()
+def set_budget(category: str, monthly_budget: float, session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_db)):
+    budget = db.query(Budget).filter(Budget.session_id == session_id, Budget.category == category).first()
     if budget:
         budget.monthly_budget = monthly_budget
     else:
-        budget = Budget(category=category, monthly_budget=monthly_budget)
+        budget = Budget(session_id=session_id, category=category, monthly_budget=monthly_budget)
         db.add(budget)
     db.commit()
+    # Budgets are not part of any cached payload, so the data version stays as it is
+    publish_change("budget_change", BUDGET_AGGREGATES, session_id, bumps_version=False)
     return {"ok": True, "message": f"Budget set for {category}: {format_currency(monthly_budget)}"}
 
 @app.get("/budgets")
-def get_budgets(db: Session = Depends(get_db)):
-    budgets = db.query(Budget).filter(Budget.is_active == True).all()
+def get_budgets(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
+    budgets = active_budgets(db, session_id)
     return [{"category": b.category, "monthly_budget": b.monthly_budget} for b in budgets]
 
-@app.get("/spending-alerts")
-def get_spending_alerts(db: Session = Depends(get_db)):
+def active_budgets(db: Session, session_id: str = DEFAULT_SESSION_ID) -> List[Budget]:
+    return db.query(Budget).filter(Budget.session_id == session_id, Budget.is_active == True).all()
+
+def spending_alerts_from(monthly_spending, budget_dict: Dict[str, float]) -> List[dict]:
+    """Alerts for (category, total_spent) pairs whose spending exceeds the category budget"""
     alerts = []
+    for category, spent in monthly_spending:
+        budget = budget_dict.get(category)
+        if budget and abs(spent) > budget:
+            overspend_percent = (abs(spent) - budget) / budget * 100
+            alerts.append({
+                "category": category,
+                "budget": budget,
+                "spent": abs(spent),
+                "overspend_amount": abs(spent) - budget,
+                "overspend_percent": overspend_percent
+            })
+    
+    return alerts
+
+@app.get("/spending-alerts")
+def get_spending_alerts(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     today = date.today()
     month_start = today.replace(day=1)
     
@@ -510,28 +1600,16 @@ def get_spending_alerts(db: Session = Depends(get_db)):
             Transaction.category,
             func.sum(Transaction.amount).label('total_spent')
         )
+        .filter(Transaction.session_id == session_id)
         .filter(Transaction.date >= month_start)
         .filter(Transaction.amount < 0)
         .group_by(Transaction.category)
         .all()
     )
     
-    budgets = db.query(Budget).filter(Budget.is_active == True).all()
+    budgets = active_budgets(db, session_id)
     budget_dict = {b.category: b.monthly_budget for b in budgets}
-    
-    for category, spent in monthly_spending:
-        budget = budget_dict.get(category)
-        if budget and abs(spent) > budget:
-            overspend_percent = (abs(spent) - budget) / budget * 100
-            alerts.append({
-                "category": category,
-                "budget": budget,
-                "spent": abs(spent),
-                "overspend_amount": abs(spent) - budget,
-                "overspend_percent": overspend_percent
-            })
-    
-    return alerts
+    return spending_alerts_from(monthly_spending, budget_dict)
 
 # Multiple Users/Sessions Management
 @app.post("/session/create")
@@ -543,29 +1621,33 @@ def create_session(session_name: str = "Default Session", db: Session = Depends(
     return {"session_id": session_id, "session_name": session_name}
 
 @app.get("/sessions")
-def list_sessions(db: Session = Depends(get_db)):
-    sessions = db.query(UserSession).order_by(UserSession.last_activity.desc()).all()
+def list_sessions(db: Session = Depends(get_read_db)):
+    # One probe of the session's rollup index
+    has_rows = exists().where(TransactionRollup.session_id == UserSession.session_id)
+    sessions = db.query(UserSession, has_rows).order_by(UserSession.last_activity.desc()).all()
     return [
         {
             "session_id": s.session_id,
             "session_name": s.session_name,
             "created_at": s.created_at.isoformat(),
             "last_activity": s.last_activity.isoformat(),
-            "has_data": s.transactions_data is not None
+            "has_data": bool(has_data)
         }
-        for s in sessions
+        for s, has_data in sessions
     ]
 
 @app.post("/session/{session_id}/upload")
-async def upload_to_session(session_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    global data_timestamp
-    session = db.query(UserSession).filter(UserSession.session_id == session_id).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+def upload_to_session(
+    session_id: str, file: UploadFile = File(...), mode: str = "replace", db: Session = Depends(get_db)
+):
+    """/upload_csv for a created session: same modes and counts, rows kept uncategorized"""
+    require_session(db, session_id)
+    if mode not in UPLOAD_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {UPLOAD_MODES}")
     
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
+        with ingest_stage("read"):
+            df = pd.read_csv(file.file)
         
         # Process the CSV data
         expected = {"date", "description", "amount", "category"}
@@ -574,66 +1656,57 @@ async def upload_to_session(session_id: str, file: UploadFile = File(...), db: S
         if not expected.issubset(set(df.columns)):
             raise HTTPException(status_code=400, detail=f"CSV must have columns: {expected}")
 
-        df['date'] = df['date'].apply(parse_csv_date)
-        df['category'] = df['category'].fillna("Uncategorized").apply(normalize_category)
-        df['merchant'] = df['description'].fillna("").apply(extract_merchant)
-        df['amount'] = pd.to_numeric(df['amount'], errors="coerce")
-        df = df.dropna(subset=["amount", "date"])
+        rows_read = len(df)
+        df = normalize_transactions_frame(df)
+        rejected = rows_read - len(df)
 
-        # Store in session
-        session.transactions_data = df.to_json()
-        session.last_activity = datetime.utcnow()
-        
-        # Also update the main transactions table (for compatibility with other endpoints)
-        records = [
-            Transaction(
-                date=row.date,
-                description=row.description,
-                merchant=row.merchant,
-                amount=float(row.amount),
-                category=row.category,
-            )
-            for row in df.itertuples(index=False)
-        ]
-        
-        # Delete ALL transactions and replace with new ones
-        db.query(Transaction).delete()
-        db.add_all(records)
-        db.commit()
+        # Only this session's partition of the transactions table is written; other sessions are untouched
+        inserted, duplicates, changed = store_upload(db, df, mode, session_id, categorize=False)
+        with ingest_stage("commit"):
+            db.commit()
         
         # Update timestamp to force frontend refresh
-        data_timestamp = time.time()
+        if changed:
+            bump_data_version("upload", session_id, changed)
+        train_after_ingest(replaced=mode == "replace")
         
-        return {"ok": True, "rows": len(df), "session_id": session_id, "timestamp": data_timestamp}
+        return {
+            "ok": True,
+            "rows": inserted,
+            "mode": mode,
+            "session_id": session_id,
+            "inserted": inserted,
+            "duplicates": duplicates,
+            "rejected": rejected,
+            "timestamp": data_timestamp
+        }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Upload failed: {str(e)}")
 
 @app.get("/session/{session_id}/analytics")
-def get_session_analytics(session_id: str, db: Session = Depends(get_db)):
-    session = db.query(UserSession).filter(UserSession.session_id == session_id).first()
-    if not session or not session.transactions_data:
+def get_session_analytics(session_id: str, db: Session = Depends(get_read_db)):
+    """Totals and per-category and per-month sums of a session, from its rollup rows"""
+    r = TransactionRollup
+    in_session = r.session_id == session_id
+    by_category = db.query(r.category, func.sum(r.total)).filter(in_session).group_by(r.category).order_by(r.category).all()
+    if not by_category:
         raise HTTPException(status_code=404, detail="No data found for session")
-    
-    df = pd.read_json(session.transactions_data)
-    
-    # Calculate comprehensive analytics
-    total_income = df[df['amount'] > 0]['amount'].sum()
-    total_expenses = df[df['amount'] < 0]['amount'].sum()
-    net_balance = total_income + total_expenses
-    
-    category_summary = df.groupby('category')['amount'].sum().reset_index()
-    monthly_summary = df.groupby(df['date'].dt.to_period('M'))['amount'].sum().reset_index()
-    monthly_summary['date'] = monthly_summary['date'].astype(str)
-    
+    by_month = db.query(r.month, func.sum(r.total)).filter(in_session).group_by(r.month).order_by(r.month).all()
+    total_income, total_expenses, count = db.query(
+        func.sum(case((r.sign == 1, r.total), else_=0.0)),
+        func.sum(case((r.sign == -1, r.total), else_=0.0)),
+        func.sum(r.count),
+    ).filter(in_session).one()
+
     return {
         "summary": {
             "total_income": float(total_income),
             "total_expenses": float(total_expenses),
-            "net_balance": float(net_balance),
-            "transaction_count": len(df)
+            "net_balance": float(total_income + total_expenses),
+            "transaction_count": int(count)
         },
-        "by_category": category_summary.to_dict('records'),
-        "by_month": monthly_summary.to_dict('records'),
+        "by_category": [{"category": c, "amount": float(v)} for c, v in by_category],
+        "by_month": [{"date": m, "amount": float(v)} for m, v in by_month],
         "timestamp": data_timestamp
     }
 
@@ -643,20 +1716,24 @@ def delete_session(session_id: str, db: Session = Depends(get_db)):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    delete_all_transactions(db, session_id)
+    db.query(Budget).filter(Budget.session_id == session_id).delete()
     db.delete(session)
     db.commit()
+    bump_data_version("session_deleted", session_id, TRANSACTION_AGGREGATES + ("budgets", "sessions"))
     return {"ok": True, "message": "Session deleted successfully"}
 
 # -------------------------
 # DEBUG ENDPOINTS
 # -------------------------
 @app.get("/debug/transactions")
-def debug_transactions(limit: int = 10, db: Session = Depends(get_db)):
+def debug_transactions(limit: int = 10, session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_read_db)):
     """Debug endpoint to see what transactions are actually in the database"""
-    transactions = db.query(Transaction).order_by(Transaction.date.desc()).limit(limit).all()
+    scoped = db.query(Transaction).filter(Transaction.session_id == session_id)
+    transactions = scoped.order_by(Transaction.date.desc()).limit(limit).all()
     
     return {
-        "count": db.query(Transaction).count(),
+        "count": scoped.count(),
         "transactions": [
             {
                 "date": t.date.isoformat(),
@@ -670,15 +1747,67 @@ def debug_transactions(limit: int = 10, db: Session = Depends(get_db)):
         "timestamp": data_timestamp
     }
 
+@app.get("/debug/cache_stats")
+def debug_cache_stats():
+    """Size and hit/miss counters of the in-process caches"""
+    return {
+        "chat_answers": chat_answer_cache.stats(),
+        "responses": response_cache.stats(),
+        "date_bounds": date_bounds_cache.stats(),
+        "timestamp": data_timestamp
+    }
+
+# Seconds between checks for other workers' changes while /events clients are connected
+CHANGE_POLL_S = float(os.getenv("CHANGE_POLL_S", "1"))
+change_watcher: Optional[asyncio.Task] = None
+
+async def watch_shared_changes():
+    """Forward other workers' changes to this worker's /events clients, even when no request arrives"""
+    global change_watcher
+    try:
+        while True:
+            await asyncio.sleep(CHANGE_POLL_S)
+            if not change_feed.subscriber_count:
+                return
+            sync_shared_state()
+    finally:
+        change_watcher = None
+
+def ensure_change_watcher():
+    global change_watcher
+    if change_watcher is None or change_watcher.done():
+        change_watcher = asyncio.create_task(watch_shared_changes())
+
+@app.get("/events")
+async def events(request: Request, session_id: Optional[str] = None):
+    """Server-sent change feed: one data_version event per upload, clear, budget change or model swap.
+
+    Each event lists the aggregates it changed, so a dashboard refetches only
+    those. Without session_id every session's events are sent. EventSource
+    reconnects with Last-Event-ID and missed events are replayed.
+    """
+    resync = {"reason": "resync", "aggregates": sorted(set(TRANSACTION_AGGREGATES + BUDGET_AGGREGATES + MODEL_AGGREGATES)),
+              "session_id": session_id, "version": data_timestamp}
+    stream = change_feed.stream(session_id, request.headers.get("last-event-id"), resync)
+    ensure_change_watcher()
+    # X-Accel-Buffering stops nginx-style proxies from holding events back
+    return StreamingResponse(stream, media_type="text/event-stream", headers={"X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+def metrics():
+    """Request latency, ingestion stage, SQL and cache metrics in the Prometheus text format"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.delete("/debug/clear_all")
-def debug_clear_all(db: Session = Depends(get_db)):
-    """Debug endpoint to clear all transactions"""
+def debug_clear_all(session_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """Debug endpoint to clear all transactions, or only one session's"""
+    if session_id is not None:
+        require_session(db, session_id)
     try:
-        count = db.query(Transaction).count()
-        db.query(Transaction).delete()
+        count = delete_all_transactions(db, session_id)
+        mark_session_written(db, session_id)
         db.commit()
-        global data_timestamp
-        data_timestamp = time.time()
+        bump_data_version("clear", session_id)
         return {"ok": True, "message": f"All {count} transactions cleared", "timestamp": data_timestamp}
     except Exception as e:
         db.rollback()
@@ -687,14 +1816,40 @@ def debug_clear_all(db: Session = Depends(get_db)):
 # -------------------------
 # CHAT ENDPOINT
 # -------------------------
-@app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest, db: Session = Depends(get_db)):
+# Answers keyed on the resolved question, not its wording, plus the data version.
+# Spending alerts also depend on budgets, which are not part of the data
+# version, so they are always recomputed.
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "512"))
+chat_answer_cache = register_cache("chat_answers", LRUCache(maxsize=CHAT_CACHE_SIZE))
+UNCACHED_INTENTS = {"spending_alerts"}
+TOP_N_INTENTS = {"top_expenses", "fastest_growing_category"}
+
+@read_endpoint(app.post("/chat", response_model=ChatResponse))
+def chat(req: ChatRequest, db: Session = Depends(get_read_db)):
+    # Read the version first so an answer computed during an upload is never filed under the new one
+    version = data_timestamp
     question = req.question.strip().lower()
-    intent = classify_intent(question)
-    start, end = parse_time_window(question, db)
-    category = extract_category(question)
-
-    query = db.query(Transaction)
+    session_id = req.session_id
+    entities = analyze_question(question)
+    intent = entities.intent
+    start, end = parse_time_window(question, db, session_id, entities)
+    category = entities.category
+    n = entities.top_n if entities.top_n is not None else 3
+
+    if intent in UNCACHED_INTENTS:
+        return answer_question(db, session_id, intent, category, start, end, n)
+    key = (session_id, intent, category, start, end, n if intent in TOP_N_INTENTS else None, version)
+    answer = chat_answer_cache.get(key)
+    if answer is None:
+        answer = answer_question(db, session_id, intent, category, start, end, n)
+        chat_answer_cache.put(key, answer)
+    return answer
+
+def answer_question(
+    db: Session, session_id: str, intent: str, category: Optional[str],
+    start: Optional[date], end: Optional[date], n: int
+) -> ChatResponse:
+    query = db.query(Transaction).filter(Transaction.session_id == session_id)
     if start and end:
         query = query.filter(Transaction.date.between(start, end))
     if category:
@@ -708,16 +1863,42 @@ def chat(req: ChatRequest, db: Session = Depends(get_db)):
         return ChatResponse(answer=f"You {verb} {amount_str} on {category}{time_range}")
 
     elif intent == "top_expenses":
-        n = parse_topn(question)
         q = query.filter(Transaction.amount < 0)
-        q = q.order_by(func.abs(Transaction.amount).desc()).limit(n).all()
+        # Expenses are negative, so ascending amount is descending size
+        q = q.order_by(Transaction.amount.asc()).limit(n).all()
         if not q:
             return ChatResponse(answer=f"No expenses found for the given criteria.")
         items = [{"label": f"{t.date} - {t.merchant}: {format_currency(t.amount)}", "value": float(t.amount)} for t in q]
         return ChatResponse(answer=f"Here are your top {len(items)} expenses:", data=items)
 
+    elif intent == "fastest_growing_category":
+        rows = category_month_rows(db, session_id, start, end)
+        matrix, ranked = off_event_loop(db, ranked_growth, rows)
+        if category:
+            ranked = [r for r in ranked if r["category"].lower() == category.lower()]
+        if not ranked:
+            return ChatResponse(answer="I need at least two months of expenses to measure growth.")
+        window = effective_window(len(matrix.months))
+        items = [
+            {
+                "label": f"{r['category']}: {format_growth(r['trailing_growth_percent'])} "
+                         f"({format_currency(r['prior_avg_spend'])} to {format_currency(r['trailing_avg_spend'])} a month)",
+                "value": r["trailing_growth_percent"] or 0.0
+            }
+            for r in ranked[:n]
+        ]
+        leader = ranked[0]
+        period = "month" if window == 1 else f"{window} months"
+        comparison = (
+            f"{format_growth(leader['trailing_growth_percent'])} in average monthly spend over the last {period} "
+            f"up to {leader['latest_month']}, compared with the {period} before."
+        )
+        if category:
+            return ChatResponse(answer=f"{leader['category']}: {comparison}", data=items)
+        return ChatResponse(answer=f"{leader['category']} is growing fastest: {comparison}", data=items)
+
     elif intent == "spending_alerts":
-        alerts = get_spending_alerts(db)
+        alerts = get_spending_alerts(session_id, db)
         if not alerts:
             return ChatResponse(answer="No spending alerts! You're within your budgets.")
         
@@ -740,6 +1921,7 @@ def chat(req: ChatRequest, db: Session = Depends(get_db)):
             total = query.with_entities(func.sum(Transaction.amount)).scalar() or 0.0
             verb = "earned" if total >= 0 else "spent"
             amount_str = format_currency(abs(total))
-            return ChatResponse(answer=f"You {verb} {amount_str} on {category} overall.")
+            time_range = f" from {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}" if start and end else " overall"
+            return ChatResponse(answer=f"You {verb} {amount_str} on {category}{time_range}.")
 
         return ChatResponse(answer="I can help you analyze your spending. Try asking about specific categories or budgets.")
\ No newline at end of file
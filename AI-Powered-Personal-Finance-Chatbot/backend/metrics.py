@@ -0,0 +1,194 @@
+# backend/metrics.py
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are plain thread-safe objects registered in one
+module-level registry; ``render_metrics`` serializes all of them (plus the
+hit/miss counters of every registered LRUCache) for GET /metrics. Values are
+per process, so with several workers each one reports its own.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import event
+
+from .cache import LRUCache
+
+# Seconds; covers cached reads (sub-millisecond) up to multi-minute ingests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+INF_BUCKET = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count per label combination"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.label_names, labels, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_bucket{_labels(self.label_names, labels, INF_BUCKET)} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+REGISTRY: List = []
+CACHES: Dict[str, LRUCache] = {}
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def register_cache(name: str, cache: LRUCache) -> LRUCache:
+    """Report a cache's hits, misses and size under cache="<name>" """
+    CACHES[name] = cache
+    return cache
+
+
+http_request_seconds = register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route")
+))
+http_requests = register(Counter(
+    "http_requests_total", "Requests by route template and status code", ("method", "route", "status")
+))
+ingest_stage_seconds = register(Histogram(
+    "ingest_stage_duration_seconds", "Time spent in each CSV ingestion stage", ("stage",)
+))
+sql_statement_seconds = register(Histogram(
+    "sql_statement_duration_seconds", "SQL statement execution time by engine and statement kind", ("engine", "kind")
+))
+
+
+def ingest_stage(stage: str):
+    """Context manager timing one ingestion stage: read, date_parse, categorize, ..."""
+    return ingest_stage_seconds.time(stage)
+
+
+def timed_chunks(stage: str, chunks: Iterable) -> Iterator:
+    """Yield from ``chunks``, timing each next() (e.g. reading a CSV chunk) as ``stage``"""
+    iterator = iter(chunks)
+    while True:
+        with ingest_stage(stage):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def instrument_engine(target_engine, name: str) -> None:
+    """Time every statement a (sync) engine sends to the database"""
+
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["statement_started"].pop()
+        words = statement.split(None, 1)
+        kind = words[0].upper() if words else "OTHER"
+        sql_statement_seconds.observe(time.perf_counter() - started, name, kind)
+
+    @event.listens_for(target_engine, "handle_error")
+    def drop_timer(context):
+        # A failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("statement_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def _cache_samples() -> Iterator[str]:
+    stats = {name: cache.stats() for name, cache in sorted(CACHES.items())}
+    for metric, key, kind, help in (
+        ("cache_hits_total", "hits", "counter", "Cache lookups answered from the cache"),
+        ("cache_misses_total", "misses", "counter", "Cache lookups that missed"),
+        ("cache_entries", "size", "gauge", "Entries currently held"),
+        ("cache_hit_ratio", "hit_rate", "gauge", "Hits / lookups since start"),
+    ):
+        yield f"# HELP {metric} {help}"
+        yield f"# TYPE {metric} {kind}"
+        for name, values in stats.items():
+            yield f'{metric}{{cache="{_escape(name)}"}} {_number(values[key])}'
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    lines.extend(_cache_samples())
+    return "\n".join(lines) + "\n"
@@ -1,21 +1,78 @@
-from sqlalchemy import Column, Integer, String, Date, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Date, Float, Boolean, DateTime, LargeBinary, Index, Computed, func, inspect, text
+from sqlalchemy.orm import deferred
 from datetime import datetime
 from .db import Base
 
+# Partition used by requests that do not name a session (and by rows stored before partitioning)
+DEFAULT_SESSION_ID = "default"
+
+# Where a transaction's category came from: the uploaded CSV, the categorizer, or a user correction.
+# The categorizer is trained and scored only on labels it did not produce itself.
+CATEGORY_SOURCES = ("csv", "ai", "user")
+TRAINABLE_CATEGORY_SOURCES = ("csv", "user")
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, index=True, nullable=False)
+    # Every index below leads on session_id, so a query only ever touches its own session's rows
+    session_id = Column(String, nullable=False, default=DEFAULT_SESSION_ID, server_default=DEFAULT_SESSION_ID)
+    date = Column(Date, nullable=False)
     description = Column(String, nullable=False)
-    merchant = Column(String, index=True, nullable=False)
+    merchant = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
-    category = Column(String, index=True, nullable=False)
+    category = Column(String, nullable=False)
+    category_source = Column(String, nullable=False, default="csv", server_default="csv")  # see CATEGORY_SOURCES
+    # Virtual YYYY-MM column so monthly grouping can use an index instead of per-row strftime
+    month = Column(String, Computed("strftime('%Y-%m', date)", persisted=False))
+    # Content hash of (date, description, amount, occurrence) used to deduplicate appended uploads
+    fingerprint = Column(Integer)
+
+    # Access paths for the analytics queries, most of which only look at expenses (amount < 0)
+    __table_args__ = (
+        Index("ix_transactions_session_date", "session_id", "date"),
+        Index("ix_transactions_session_expense_merchant", "session_id", "merchant", "amount", sqlite_where=text("amount < 0")),
+        Index("ix_transactions_session_expense_amount", "session_id", "amount", "merchant", "date", sqlite_where=text("amount < 0")),
+        Index("ix_transactions_session_expense_date", "session_id", "date", "category", "merchant", "amount", sqlite_where=text("amount < 0")),
+        Index("ix_transactions_session_month", "session_id", "month", "category", "merchant", "amount"),
+        Index("ix_transactions_session_fingerprint", "session_id", "fingerprint", unique=True),
+    )
+
+# Chat filters on lower(category) and a date range
+Index(
+    "ix_transactions_session_category_lower",
+    Transaction.session_id, func.lower(Transaction.category), Transaction.date, Transaction.amount,
+)
+
+# Unpartitioned indexes from before session_id existed; dropped by upgrade_schema
+OBSOLETE_INDEXES = [
+    "ix_transactions_date", "ix_transactions_merchant", "ix_transactions_category",
+    "ix_transactions_expense_merchant", "ix_transactions_expense_amount", "ix_transactions_expense_date",
+    "ix_transactions_month", "ix_transactions_fingerprint", "ix_transactions_category_lower",
+]
+
+class TransactionRollup(Base):
+    """Per (session, month, category, merchant, sign) sums of transactions, kept in step with ingestion"""
+    __tablename__ = "transaction_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, nullable=False, default=DEFAULT_SESSION_ID)
+    month = Column(String, nullable=False)  # YYYY-MM
+    category = Column(String, nullable=False)
+    merchant = Column(String, nullable=False)
+    sign = Column(Integer, nullable=False)  # -1 expense, 1 income, 0 zero amount
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_transaction_rollups_session_key", "session_id", "month", "category", "merchant", "sign", unique=True),
+    )
 
 class Budget(Base):
     __tablename__ = "budgets"
     
     id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, nullable=False, default=DEFAULT_SESSION_ID, server_default=DEFAULT_SESSION_ID)
     category = Column(String, nullable=False)
     monthly_budget = Column(Float, default=0.0)
     is_active = Column(Boolean, default=True)
@@ -27,6 +84,92 @@ class UserSession(Base):
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True)
     session_name = Column(String, default="Default Session")
-    transactions_data = Column(String)  # JSON string of transactions
+    # Payloads of sessions uploaded before partitioning (JSON, then the columnar
+    # frame of session_store); moved into transactions at startup, then NULL
+    transactions_data = deferred(Column(String))
+    transactions_frame = deferred(Column(LargeBinary))
+    row_count = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_activity = Column(DateTime, default=datetime.utcnow)
+
+class CategoryCorrection(Base):
+    """A user's fix of one transaction's category, read by incremental training in id order"""
+    __tablename__ = "category_corrections"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False, default=DEFAULT_SESSION_ID, index=True)
+    transaction_id = Column(Integer, nullable=False)
+    category = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_activity = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+
+class CategoryMemo(Base):
+    """Categorizer prediction per normalized model input text, valid for one model version (see category_memo)"""
+    __tablename__ = "category_memo"
+
+    id = Column(Integer, primary_key=True)
+    # Lowercased "description merchant" with whitespace collapsed
+    key = Column(String, nullable=False, unique=True)
+    category = Column(String, nullable=False)
+    confidence = Column(Float, nullable=False)
+    model_version = Column(Integer, nullable=False)
+
+class DataChange(Base):
+    """Append-only log of data changes shared by worker processes (see shared_state)"""
+    __tablename__ = "data_changes"
+
+    id = Column(Integer, primary_key=True)
+    reason = Column(String, nullable=False)  # upload, clear, session_deleted, budget_change, correction, model_swap
+    session_id = Column(String)  # NULL: every session
+    aggregates = Column(String, nullable=False)  # JSON list of changed aggregate names
+    bumps_version = Column(Boolean, nullable=False)  # False for changes no cached payload depends on
+    created_at = Column(Float, nullable=False)  # epoch seconds; the data version clients see
+
+def upgrade_schema(bind):
+    """Add columns and indexes introduced after a database file was first created"""
+    columns = {c["name"] for c in inspect(bind).get_columns("transactions")}
+    with bind.begin() as conn:
+        if "session_id" not in columns:
+            # Rows stored before partitioning belong to the default session
+            conn.exec_driver_sql(
+                f"ALTER TABLE transactions ADD COLUMN session_id VARCHAR NOT NULL DEFAULT '{DEFAULT_SESSION_ID}'"
+            )
+        if "month" not in columns:
+            conn.exec_driver_sql(
+                "ALTER TABLE transactions ADD COLUMN month VARCHAR "
+                "GENERATED ALWAYS AS (strftime('%Y-%m', date)) VIRTUAL"
+            )
+        if "fingerprint" not in columns:
+            # Existing rows are fingerprinted at startup (see backfill_fingerprints)
+            conn.exec_driver_sql("ALTER TABLE transactions ADD COLUMN fingerprint INTEGER")
+        if "category_source" not in columns:
+            # Nothing recorded which older categories the model filled in; they count as uploaded
+            conn.exec_driver_sql("ALTER TABLE transactions ADD COLUMN category_source VARCHAR NOT NULL DEFAULT 'csv'")
+        # Read names from sqlite_master: the inspector skips expression indexes
+        existing = set(conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'transactions'"
+        ).scalars())
+        for name in OBSOLETE_INDEXES:
+            if name in existing:
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+        for index in Transaction.__table__.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+    if "session_id" not in {c["name"] for c in inspect(bind).get_columns("transaction_rollups")}:
+        # The rollup is derived data: recreate it keyed by session, ensure_rollups refills it
+        with bind.begin() as conn:
+            TransactionRollup.__table__.drop(conn)
+            TransactionRollup.__table__.create(conn)
+
+    if "session_id" not in {c["name"] for c in inspect(bind).get_columns("budgets")}:
+        with bind.begin() as conn:
+            conn.exec_driver_sql(
+                f"ALTER TABLE budgets ADD COLUMN session_id VARCHAR NOT NULL DEFAULT '{DEFAULT_SESSION_ID}'"
+            )
+
+    session_columns = {c["name"] for c in inspect(bind).get_columns("user_sessions")}
+    with bind.begin() as conn:
+        if "transactions_frame" not in session_columns:
+            conn.exec_driver_sql("ALTER TABLE user_sessions ADD COLUMN transactions_frame BLOB")
+        if "row_count" not in session_columns:
+            conn.exec_driver_sql("ALTER TABLE user_sessions ADD COLUMN row_count INTEGER")
\ No newline at end of file
@@ -0,0 +1,397 @@
+# backend/nlp.py
+"""Category aliases and the chat question matcher.
+
+Every alias, intent keyword and time phrase is compiled once into a single
+trie-shaped regex. One left-to-right pass of searches over the question,
+each resuming one character after the previous match, finds every
+vocabulary term that occurs in it, overlaps included.
+The results keep the old substring semantics: a term counts when it occurs
+anywhere in the text, and ties are broken by table order, not by position.
+
+Time expressions ("last 3 months", "march 2024", "q2", "from 2024-01-01 to
+2024-03-31", ...) are alternatives of the same regex. They are parsed into a
+time spec that resolve_time_window turns into dates relative to a reference
+day (the latest transaction date), so no database round trip is needed.
+"""
+import functools
+import operator
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+CATEGORY_ALIASES = {
+    "food": ["food", "dining", "groceries", "restaurant", "cafe", "meal", "grocery", "snacks", "dinner", "lunch", "breakfast", "ccd"],
+    "transport": ["transport", "transportation", "uber", "ola", "cab", "taxi", "fuel", "bus", "train", "metro", "petrol", "ride"],
+    "shopping": ["shopping", "amazon", "flipkart", "myntra", "mall", "store", "clothing", "electronics", "purchase", "online"],
+    "bills": ["bills", "utilities", "electricity", "wifi", "phone", "internet", "rent", "water", "mobile", "recharge", "bill", "gas"],
+    "health": ["health", "doctor", "hospital", "pharmacy", "medicine", "healthcare", "gym", "dental"],
+    "entertainment": ["entertainment", "movies", "cinema", "netflix", "game", "concert", "pvr", "ticket", "subscription", "movie", "bowling"],
+    "education": ["education", "school", "college", "tuition", "course", "udemy", "book", "certification"],
+    "investment": ["investment", "stocks", "mutual fund", "dividend", "sip"],
+    "income": ["salary", "income", "freelance", "bonus", "deposit", "payment"]
+}
+
+# Looser words that only decide a chat question's category when no alias matched
+CATEGORY_FALLBACKS = [
+    ("food", ["food", "restaurant", "grocery", "dinner", "lunch", "snack"]),
+    ("entertainment", ["movie", "netflix", "concert", "entertain"]),
+    ("shopping", ["shopping", "amazon", "mall", "store"]),
+    ("transport", ["transport", "petrol", "metro", "uber"]),
+    ("bills", ["bill", "electricity", "water", "mobile"]),
+]
+
+INTENT_KEYWORDS = {
+    "amount": ["how much", "spent", "spend", "expense", "total", "amount"],
+    "growth": ["growing", "trend", "increase"],
+    "ranking": ["biggest", "top", "highest", "largest"],
+    "expense": ["expense", "spend", "purchase"],
+    "listing": ["list", "show", "what are", "which"],
+    "alerts": ["alert", "overspend", "budget", "limit"],
+}
+
+# Fixed phrases matched anywhere in the text, in priority order
+TIME_PHRASES = ["last month", "this month", "this week", "last week"]
+
+TOPN_PATTERN = r"(?:top|biggest|highest)\s*(?P<n>\d+)"
+
+MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+QUESTION_DATE_FORMATS = ['%d-%m-%Y', '%Y-%m-%d', '%m-%d-%Y', '%d-%m-%y']
+
+_DATE = r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4}"
+_YEAR = r"(?:19|20)\d{2}"
+_MONTH = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_RANGE_JOIN = r"\s+(?:to|and|until|till|-)\s+"
+# "may" only counts as a month after "in" or before a year ("may I ..." is not a date)
+_MONTH_WORD = rf"(?:(?!may\b)(?:{_MONTH})|may(?=\s+{_YEAR}\b)|(?<=in )may)"
+
+# Alternatives of the "when" group; their first occurrence is kept per kind
+TIME_PATTERN = "|".join([
+    rf"\b(?:from|between)\s+(?P<range_from>{_DATE}){_RANGE_JOIN}(?P<range_to>{_DATE})",
+    rf"\bsince\s+(?P<since>{_DATE})",
+    rf"\b(?:from|between)\s+(?P<mr_from>{_MONTH_WORD})(?:\s+(?P<mr_from_year>{_YEAR}))?"
+    rf"{_RANGE_JOIN}(?P<mr_to>{_MONTH_WORD})\b(?:\s+(?P<mr_to_year>{_YEAR}))?",
+    r"\b(?:last|past|previous)\s+(?P<last_n>\d+)\s+(?P<last_unit>day|week|month|year)s?\b",
+    r"\b(?P<period_which>this|last|previous)\s+(?P<period_unit>quarter|year)\b",
+    rf"\bq(?P<quarter>[1-4])(?:\s*(?P<quarter_year>{_YEAR}))?\b",
+    rf"\b(?P<month>{_MONTH_WORD})\b(?:\s+(?P<month_year>{_YEAR})\b)?",
+    rf"\b(?P<year>{_YEAR})\b",
+])
+
+# When a question has several time expressions, the first kind in this list wins
+TIME_KIND_PRIORITY = ["range", "since", "month_range", "last_n", "phrase", "period", "quarter", "month", "year"]
+
+
+class QuestionEntities(NamedTuple):
+    """Everything the chat endpoint needs from a question, found in one scan"""
+    category: Optional[str]
+    intent: str
+    keywords: FrozenSet[str]
+    top_n: Optional[int]
+    time_phrase: Optional[str]
+    # Parsed time expression, e.g. ("last_n", 3, "month"); see resolve_time_window
+    time_spec: Optional[tuple] = None
+
+
+# Each vocabulary term maps to a bitmask: one bit per category (aliases in
+# table order, then fallbacks), per intent keyword group and per time phrase.
+# Lower category bits win, which reproduces the old first-match-in-table order.
+_CATEGORY_NAMES = list(CATEGORY_ALIASES) + [name for name, _ in CATEGORY_FALLBACKS]
+_KEYWORD_GROUPS = list(INTENT_KEYWORDS)
+_KEYWORD_SHIFT = len(_CATEGORY_NAMES)
+_TIME_SHIFT = _KEYWORD_SHIFT + len(_KEYWORD_GROUPS)
+_ALIAS_BITS = (1 << len(CATEGORY_ALIASES)) - 1
+_CATEGORY_BITS = (1 << len(_CATEGORY_NAMES)) - 1
+_TIME_BITS = ((1 << len(TIME_PHRASES)) - 1) << _TIME_SHIFT
+
+
+def _vocabulary() -> Dict[str, int]:
+    vocabulary: Dict[str, int] = {}
+
+    def add(term: str, bit: int):
+        vocabulary[term] = vocabulary.get(term, 0) | (1 << bit)
+
+    for rank, (name, aliases) in enumerate(CATEGORY_ALIASES.items()):
+        for term in [name] + aliases:
+            add(term, rank)
+    for offset, (_, words) in enumerate(CATEGORY_FALLBACKS):
+        for term in words:
+            add(term, len(CATEGORY_ALIASES) + offset)
+    for offset, group in enumerate(_KEYWORD_GROUPS):
+        for term in INTENT_KEYWORDS[group]:
+            add(term, _KEYWORD_SHIFT + offset)
+    for offset, phrase in enumerate(TIME_PHRASES):
+        add(phrase, _TIME_SHIFT + offset)
+    return vocabulary
+
+
+def _lowest_bit(mask: int) -> int:
+    return (mask & -mask).bit_length() - 1
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex alternation nested by common prefix, so the longest word at a position matches.
+
+    Branches at each node start with distinct characters, so the engine never
+    tries more than one branch deeply and greedy optionals prefer longer words.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node: dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return render(trie)
+
+
+_VOCABULARY = _vocabulary()
+# A term implies the tokens of every shorter term that is a prefix of it: those
+# start at the same position and are hidden behind the longest match there
+_TERM_MASKS: Dict[str, int] = {
+    term: functools.reduce(operator.or_, (mask for other, mask in _VOCABULARY.items() if term.startswith(other)))
+    for term in _VOCABULARY
+}
+_TERM_RE = re.compile(_trie_pattern(list(_VOCABULARY)))
+# Not wrapped in a lookahead: a plain pattern lets the engine skip ahead to
+# characters that can start a term instead of being entered at every position
+_MATCHER = re.compile(f"(?P<topn>{TOPN_PATTERN})|(?P<when>{TIME_PATTERN})|(?P<term>{_TERM_RE.pattern})")
+
+
+def _parse_question_date(text: str) -> Optional[date]:
+    text = text.replace("/", "-")
+    for fmt in QUESTION_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _month_number(word: str) -> int:
+    return MONTH_NAMES.index(word[:3]) + 1
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+def _time_spec(match: "re.Match") -> Optional[tuple]:
+    """Turn a match of the "when" group into a time spec tuple (None if a date is invalid)"""
+    group = match.group
+    if group("range_from"):
+        start, end = _parse_question_date(group("range_from")), _parse_question_date(group("range_to"))
+        return ("range", min(start, end), max(start, end)) if start and end else None
+    if group("since"):
+        start = _parse_question_date(group("since"))
+        return ("since", start) if start else None
+    if group("mr_from"):
+        return (
+            "month_range",
+            _month_number(group("mr_from")), _optional_int(group("mr_from_year")),
+            _month_number(group("mr_to")), _optional_int(group("mr_to_year")),
+        )
+    if group("last_n"):
+        return ("last_n", int(group("last_n")), group("last_unit"))
+    if group("period_which"):
+        return ("period", "this" if group("period_which") == "this" else "last", group("period_unit"))
+    if group("quarter"):
+        return ("quarter", int(group("quarter")), _optional_int(group("quarter_year")))
+    if group("month"):
+        return ("month", _month_number(group("month")), _optional_int(group("month_year")))
+    return ("year", int(group("year")))
+
+
+def _scan(text: str) -> Tuple[int, Optional[int], Dict[str, Tuple[tuple, str]]]:
+    """Bitmask of every term present in lowercased text, the first top-N count,
+    and the first time spec (with its text) of each kind"""
+    mask = 0
+    top_n = None
+    times: Dict[str, Tuple[tuple, str]] = {}
+    search = _MATCHER.search
+    match = search(text)
+    while match is not None:
+        term = match.group("term")
+        if term is None:
+            if match.group("topn") is not None:
+                if top_n is None:
+                    top_n = int(match.group("n"))
+            else:
+                spec = _time_spec(match)
+                if spec is not None and spec[0] not in times:
+                    times[spec[0]] = (spec, match.group("when"))
+            # A top-N or time expression won the position; a term may still start there
+            term_match = _TERM_RE.match(text, match.start())
+            term = term_match.group() if term_match else None
+        if term is not None:
+            mask |= _TERM_MASKS[term]
+        match = search(text, match.start() + 1)
+    return mask, top_n, times
+
+
+def _best_category(mask: int, include_fallbacks: bool = True) -> Optional[str]:
+    categories = mask & (_CATEGORY_BITS if include_fallbacks else _ALIAS_BITS)
+    return _CATEGORY_NAMES[_lowest_bit(categories)].capitalize() if categories else None
+
+
+def _intent(keywords: FrozenSet[str], category: Optional[str]) -> str:
+    if "amount" in keywords and category:
+        return "sum_by_category"
+    if "growth" in keywords:
+        return "fastest_growing_category"
+    if "ranking" in keywords and "expense" in keywords:
+        return "top_expenses"
+    if "listing" in keywords:
+        return "list_transactions"
+    if "alerts" in keywords:
+        return "spending_alerts"
+    return "fallback"
+
+
+def analyze_question(q: str) -> QuestionEntities:
+    """Category, intent, intent keywords, top-N and time phrase of a chat question in one pass"""
+    mask, top_n, times = _scan(q.lower())
+    category = _best_category(mask)
+    keywords = frozenset(
+        group for offset, group in enumerate(_KEYWORD_GROUPS) if mask >> (_KEYWORD_SHIFT + offset) & 1
+    )
+    phrases = mask & _TIME_BITS
+    if phrases:
+        phrase = TIME_PHRASES[_lowest_bit(phrases) - _TIME_SHIFT]
+        times["phrase"] = (("phrase", phrase), phrase)
+    time_spec, time_phrase = next((times[kind] for kind in TIME_KIND_PRIORITY if kind in times), (None, None))
+    return QuestionEntities(
+        category=category,
+        intent=_intent(keywords, category),
+        keywords=keywords,
+        top_n=top_n,
+        time_phrase=time_phrase,
+        time_spec=time_spec,
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_category(text: str) -> str:
+    if not text:
+        return "Uncategorized"
+    t = text.strip().lower()
+    mask, _, _ = _scan(t)
+    return _best_category(mask, include_fallbacks=False) or t.capitalize()
+
+
+def extract_category(q: str) -> Optional[str]:
+    return analyze_question(q).category
+
+
+def parse_topn(q: str, default: int = 3) -> int:
+    top_n = analyze_question(q).top_n
+    return default if top_n is None else top_n
+
+
+def classify_intent(q: str) -> str:
+    return analyze_question(q).intent
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+
+
+def _shift_month(year: int, month: int, delta: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+def _latest_year_of(month: int, reference: date) -> int:
+    """Year of the most recent occurrence of a month at or before the reference month"""
+    return reference.year if month <= reference.month else reference.year - 1
+
+
+def resolve_time_window(spec: Optional[tuple], reference: date) -> Tuple[Optional[date], Optional[date]]:
+    """Inclusive (start, end) dates for a time spec, relative to the reference day.
+
+    The reference is the latest transaction date, so "last month" means the
+    month before the newest data rather than before today. Periods without a
+    year (a month name, a quarter) resolve to their latest occurrence. "Last N
+    months/years" are whole calendar periods up to and including the reference.
+    """
+    if spec is None:
+        return None, None
+    kind = spec[0]
+
+    if kind == "range":
+        return spec[1], spec[2]
+    if kind == "since":
+        return spec[1], max(spec[1], reference)
+
+    if kind == "phrase":
+        phrase = spec[1]
+        if phrase == "last month":
+            year, month = _shift_month(reference.year, reference.month, -1)
+            return date(year, month, 1), _month_end(year, month)
+        if phrase == "this month":
+            return reference.replace(day=1), _month_end(reference.year, reference.month)
+        if phrase == "this week":
+            start = reference - timedelta(days=reference.weekday())
+            return start, start + timedelta(days=6)
+        if phrase == "last week":
+            start = reference - timedelta(days=reference.weekday() + 7)
+            return start, start + timedelta(days=6)
+
+    if kind == "last_n":
+        n, unit = max(spec[1], 1), spec[2]
+        if unit == "day":
+            return reference - timedelta(days=n - 1), reference
+        if unit == "week":
+            return reference - timedelta(days=7 * n - 1), reference
+        if unit == "month":
+            year, month = _shift_month(reference.year, reference.month, -(n - 1))
+            return date(year, month, 1), reference
+        return date(reference.year - n + 1, 1, 1), reference
+
+    if kind == "period":
+        _, which, unit = spec
+        if unit == "year":
+            year = reference.year - (which == "last")
+            return date(year, 1, 1), date(year, 12, 31)
+        first_month = (reference.month - 1) // 3 * 3 + 1
+        year, month = _shift_month(reference.year, first_month, -3 if which == "last" else 0)
+        return date(year, month, 1), _month_end(*_shift_month(year, month, 2))
+
+    if kind == "quarter":
+        _, quarter, year = spec
+        first_month = (quarter - 1) * 3 + 1
+        if year is None:
+            year = _latest_year_of(first_month, reference)
+        return date(year, first_month, 1), _month_end(year, first_month + 2)
+
+    if kind == "month":
+        _, month, year = spec
+        if year is None:
+            year = _latest_year_of(month, reference)
+        return date(year, month, 1), _month_end(year, month)
+
+    if kind == "month_range":
+        _, first, first_year, last, last_year = spec
+        if last_year is None:
+            last_year = first_year if first_year is not None else _latest_year_of(last, reference)
+        if first_year is None:
+            first_year = last_year if first <= last else last_year - 1
+        start, end = date(first_year, first, 1), _month_end(last_year, last)
+        return (start, end) if start <= end else (date(last_year, last, 1), _month_end(first_year, first))
+
+    if kind == "year":
+        return date(spec[1], 1, 1), date(spec[1], 12, 31)
+
+    return None, None
@@ -0,0 +1,147 @@
+# backend/rollups.py
+"""Materialized monthly/category/merchant rollup of the transactions table.
+
+Dashboard aggregates read from ``transaction_rollups`` so their cost depends
+on months x categories x merchants instead of the number of transactions.
+Rollup rows are partitioned by session like the transactions they summarize.
+Every write to ``transactions`` must go through these helpers in the same
+database transaction so the rollup never drifts from the base table.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func, case, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .lazy import lazy_import
+from .models import DEFAULT_SESSION_ID, Transaction, TransactionRollup
+
+pd = lazy_import("pandas")
+
+ROLLUP_KEY = ["session_id", "month", "category", "merchant", "sign"]
+ROLLUP_COLUMNS = ROLLUP_KEY + ["total", "count"]
+
+
+def whole_month_range(start: date, end: date) -> Optional[Tuple[str, str]]:
+    """('YYYY-MM', 'YYYY-MM') if start..end covers whole calendar months, else None"""
+    if start.day != 1 or (end + timedelta(days=1)).day != 1 or end < start:
+        return None
+    return start.strftime('%Y-%m'), end.strftime('%Y-%m')
+
+
+def rollup_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate normalized transactions (with a session_id column) into rollup rows (key + total + count)."""
+    keyed = pd.DataFrame({
+        "session_id": df["session_id"],
+        "month": pd.to_datetime(df["date"]).dt.strftime("%Y-%m"),
+        "category": df["category"],
+        "merchant": df["merchant"],
+        "sign": (df["amount"] > 0).astype(int) - (df["amount"] < 0).astype(int),
+        "amount": df["amount"].astype(float),
+    })
+    return (
+        keyed.groupby(ROLLUP_KEY, sort=False)["amount"]
+        .agg(total="sum", count="size")
+        .reset_index()
+    )
+
+
+def apply_rollup_delta(db: Session, df: pd.DataFrame, direction: int = 1) -> int:
+    """Add (direction=1) or subtract (direction=-1) a batch of transactions from the rollup.
+
+    Uses an upsert per distinct key, so the cost scales with the number of
+    distinct (session, month, category, merchant, sign) groups in the batch.
+    """
+    if df.empty:
+        return 0
+    delta = rollup_frame(df)
+    delta["total"] *= direction
+    delta["count"] *= direction
+
+    stmt = insert(TransactionRollup.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ROLLUP_KEY,
+        set_={
+            "total": TransactionRollup.__table__.c.total + stmt.excluded.total,
+            "count": TransactionRollup.__table__.c.count + stmt.excluded.count,
+        },
+    )
+    rows = delta.to_dict("records")
+    db.execute(stmt, rows)
+    if direction < 0:
+        db.query(TransactionRollup).filter(TransactionRollup.count <= 0).delete()
+    return len(rows)
+
+
+def clear_rollups(db: Session, session_id: Optional[str] = None) -> None:
+    """Delete one session's rollup rows, or every session's when session_id is None."""
+    query = db.query(TransactionRollup)
+    if session_id is not None:
+        query = query.filter(TransactionRollup.session_id == session_id)
+    query.delete()
+
+
+def grouped_transactions_select(session_id: Optional[str] = None, start: Optional[date] = None, end: Optional[date] = None):
+    """SELECT producing rollup-shaped rows straight from transactions, optionally session- and date-filtered."""
+    month = Transaction.month
+    sign = case((Transaction.amount < 0, -1), (Transaction.amount > 0, 1), else_=0)
+    source = select(
+        Transaction.session_id, month, Transaction.category, Transaction.merchant, sign,
+        func.sum(Transaction.amount), func.count(),
+    )
+    if session_id is not None:
+        source = source.where(Transaction.session_id == session_id)
+    if start and end:
+        source = source.where(Transaction.date.between(start, end))
+    return source.group_by(Transaction.session_id, month, Transaction.category, Transaction.merchant, sign)
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute the whole rollup from the transactions table with one INSERT ... SELECT."""
+    clear_rollups(db)
+    result = db.execute(
+        TransactionRollup.__table__.insert().from_select(ROLLUP_COLUMNS, grouped_transactions_select())
+    )
+    return result.rowcount
+
+
+def load_rollup_rows(
+    db: Session, session_id: str = DEFAULT_SESSION_ID, start: Optional[date] = None, end: Optional[date] = None
+) -> list:
+    """One session's rollup rows for an optional date range, in a single query.
+
+    Unfiltered and whole-month ranges read the rollup table; any other range
+    groups the matching transactions into the same shape with one scan.
+    """
+    if start and end and not whole_month_range(start, end):
+        source = grouped_transactions_select(session_id, start, end)
+    else:
+        r = TransactionRollup.__table__.c
+        source = select(r.session_id, r.month, r.category, r.merchant, r.sign, r.total, r.count)
+        source = source.where(r.session_id == session_id)
+        if start and end:
+            source = source.where(r.month.between(*whole_month_range(start, end)))
+    return db.execute(source).all()
+
+
+def rollup_rows_frame(rows: list) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=ROLLUP_COLUMNS)
+
+
+def load_rollup_frame(
+    db: Session, session_id: str = DEFAULT_SESSION_ID, start: Optional[date] = None, end: Optional[date] = None
+) -> pd.DataFrame:
+    """load_rollup_rows as a DataFrame"""
+    return rollup_rows_frame(load_rollup_rows(db, session_id, start, end))
+
+
+def ensure_rollups(db: Session) -> None:
+    """Build the rollup for databases that predate it (transactions present, rollup empty)."""
+    has_rollups = db.query(TransactionRollup.id).first() is not None
+    has_transactions = db.query(Transaction.id).first() is not None
+    if has_transactions and not has_rollups:
+        rebuild_rollups(db)
+        db.commit()
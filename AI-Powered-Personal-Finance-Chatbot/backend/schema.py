@@ -2,13 +2,19 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
+from .models import DEFAULT_SESSION_ID
+
 class ChatRequest(BaseModel):
     question: str
+    session_id: str = DEFAULT_SESSION_ID
 
 class ChatResponse(BaseModel):
     answer: str
     data: Optional[List[dict]] = None
 
+class CategoryUpdate(BaseModel):
+    category: str
+
 class BudgetCreate(BaseModel):
     category: str
     monthly_budget: float
@@ -0,0 +1,44 @@
+# backend/session_store.py
+"""Decoder for the columnar session payloads of UserSession.transactions_frame.
+
+Sessions uploaded before transactions were partitioned by session kept their
+rows in that column as an ``.npz`` archive with one array per column: dates
+as day numbers, amounts as float64, and text columns dictionary-encoded as
+int32 codes plus a UTF-8 buffer of the distinct values. Nothing writes the
+format any more; startup decodes each stored payload once to move it into
+the transactions table.
+"""
+from __future__ import annotations
+
+import io
+
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SESSION_FORMAT_VERSION = 1
+SESSION_TEXT_COLUMNS = ["description", "merchant", "category"]
+
+
+def _decode_strings(codes: np.ndarray, buffer: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    raw = buffer.tobytes()
+    uniques = np.empty(len(offsets) - 1, dtype=object)
+    uniques[:] = [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(uniques))]
+    return uniques[codes]
+
+
+def decode_frame(payload: bytes) -> pd.DataFrame:
+    """A stored payload as a frame of date (datetime64), description, merchant, amount and category"""
+    with np.load(io.BytesIO(payload), allow_pickle=False) as arrays:
+        if int(arrays["format"]) != SESSION_FORMAT_VERSION:
+            raise ValueError(f"Unsupported session format {int(arrays['format'])}")
+        frame = {
+            "date": pd.to_datetime(arrays["date"].astype("datetime64[D]")),
+            "amount": arrays["amount"],
+        }
+        for column in SESSION_TEXT_COLUMNS:
+            frame[column] = _decode_strings(
+                arrays[f"{column}.codes"], arrays[f"{column}.values"], arrays[f"{column}.offsets"]
+            )
+    return pd.DataFrame(frame, columns=["date", "description", "merchant", "amount", "category"])
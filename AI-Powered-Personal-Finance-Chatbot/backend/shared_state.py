@@ -0,0 +1,87 @@
+# backend/shared_state.py
+"""Data version and change log shared by every worker process using the database.
+
+Each change (upload, clear, budget change, model swap) is appended to the
+``data_changes`` table. The data version is the latest change that touched
+transactions; its creation time is the ``timestamp`` clients see. A worker
+learns about changes made by other workers with ``poll``: one ``PRAGMA
+data_version`` on a dedicated autocommit connection, which only changes when
+another connection has committed something, so the table itself is read only
+after a write.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+# Rows kept in data_changes; older ones are deleted as new changes are recorded
+CHANGE_LOG_ROWS = 1000
+_COLUMNS = "id, reason, session_id, aggregates, bumps_version, created_at"
+
+
+def _as_change(row) -> dict:
+    change_id, reason, session_id, aggregates, bumps_version, created_at = row
+    return {
+        "id": change_id,
+        "reason": reason,
+        "session_id": session_id,
+        "aggregates": json.loads(aggregates),
+        "bumps_version": bool(bumps_version),
+        "created_at": created_at,
+    }
+
+
+class SharedState:
+    def __init__(self, database_path: str, busy_timeout_ms: int = 5000):
+        self._connection = sqlite3.connect(database_path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        self._lock = threading.Lock()
+        self._pragma_version = None
+        self._last_seen_id = 0
+        self._own_ids = set()
+
+    def _query(self, sql: str, parameters=()) -> list:
+        return self._connection.execute(sql, parameters).fetchall()
+
+    def start(self) -> Optional[dict]:
+        """Treat every change recorded so far as seen; returns the latest version change, if any"""
+        with self._lock:
+            self._pragma_version = self._query("PRAGMA data_version")[0][0]
+            self._last_seen_id = self._query("SELECT COALESCE(MAX(id), 0) FROM data_changes")[0][0]
+            rows = self._query(f"SELECT {_COLUMNS} FROM data_changes WHERE bumps_version ORDER BY id DESC LIMIT 1")
+        return _as_change(rows[0]) if rows else None
+
+    def history(self, limit: int) -> List[dict]:
+        """The newest ``limit`` changes, oldest first"""
+        with self._lock:
+            rows = self._query(f"SELECT {_COLUMNS} FROM data_changes ORDER BY id DESC LIMIT ?", (limit,))
+        return [_as_change(row) for row in reversed(rows)]
+
+    def record(self, reason: str, aggregates: Iterable[str], session_id: Optional[str], bumps_version: bool) -> dict:
+        """Append a change. created_at never goes backwards, so it orders data versions across workers"""
+        with self._lock:
+            row = self._query(
+                "INSERT INTO data_changes (reason, session_id, aggregates, bumps_version, created_at) "
+                "SELECT ?, ?, ?, ?, MAX(?, COALESCE(MAX(created_at), 0) + 0.000001) FROM data_changes "
+                f"RETURNING {_COLUMNS}",
+                (reason, session_id, json.dumps(sorted(set(aggregates))), bumps_version, time.time()),
+            )[0]
+            self._query("DELETE FROM data_changes WHERE id <= ?", (row[0] - CHANGE_LOG_ROWS,))
+            # Other workers' changes that landed just before this one are still returned by poll()
+            self._own_ids.add(row[0])
+        return _as_change(row)
+
+    def poll(self) -> List[dict]:
+        """Changes recorded by other workers since the last poll, oldest first"""
+        with self._lock:
+            pragma_version = self._query("PRAGMA data_version")[0][0]
+            if pragma_version == self._pragma_version:
+                return []
+            self._pragma_version = pragma_version
+            rows = self._query(f"SELECT {_COLUMNS} FROM data_changes WHERE id > ? ORDER BY id", (self._last_seen_id,))
+            if rows:
+                self._last_seen_id = rows[-1][0]
+            changes = [_as_change(row) for row in rows if row[0] not in self._own_ids]
+            self._own_ids = {i for i in self._own_ids if i > self._last_seen_id}
+        return changes
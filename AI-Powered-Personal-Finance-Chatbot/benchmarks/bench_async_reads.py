@@ -0,0 +1,165 @@
+"""Read endpoint latency under concurrent load: sync routes vs the async read path.
+
+For each mode (DB_ASYNC_READS=0: sync routes on Starlette's threadpool,
+DB_ASYNC_READS=1: async routes on an AsyncSession over aiosqlite) a fresh
+database is seeded with the sample CSV repeated to N rows, then C concurrent
+clients send a mix of summary, visualization, dashboard and chat requests
+through the ASGI app for a fixed number of requests each. The response and
+chat answer caches are disabled so every request reaches the database. A last
+run repeats the smallest client count while a CSV of the same size is
+uploaded (mode=replace) through the same app, with the clients reading until
+the upload returns, so an upload that holds up the event loop shows up in the
+read latencies.
+
+Sync routes release their Session in a threadpool worker too (FastAPI runs
+the teardown of get_read_db there), so once more clients wait than there
+are threadpool workers and pooled connections, requests can stall until the
+pool's checkout timeout; those show up in the errors column.
+
+Run from the project folder:
+    python -m benchmarks.bench_async_reads                 # 100k rows, 10/50/200 clients
+    python -m benchmarks.bench_async_reads 50000 20 100
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+REQUESTS_PER_CLIENT = 10
+# A request still waiting after this long counts as an error (and its latency as the timeout)
+REQUEST_TIMEOUT_S = 10
+
+REQUEST_MIX = [
+    ("GET", "/summary/by_category", None),
+    ("GET", "/summary/monthly_totals", None),
+    ("GET", "/visualization/category_pie", None),
+    ("GET", "/visualization/top_merchants_by_single_payment", None),
+    ("GET", "/dashboard", None),
+    ("POST", "/chat", {"question": "how much did I spend on food last month"}),
+    ("POST", "/chat", {"question": "top 5 expenses this month"}),
+    ("POST", "/chat", {"question": "which category is growing the fastest?"}),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def upload_body(rows: int) -> bytes:
+    header, *lines = SAMPLE_CSV.read_bytes().splitlines()
+    return b"\n".join([header] + [lines[i % len(lines)] for i in range(rows)]) + b"\n"
+
+
+async def run_load(app, clients: int, until: asyncio.Event = None):
+    """Each client sends REQUESTS_PER_CLIENT requests, or keeps sending until `until` is set"""
+    import httpx
+
+    latencies, errors = [], []
+
+    async def client(offset: int):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as http:
+            i = 0
+            while not until.is_set() if until else i < REQUESTS_PER_CLIENT:
+                method, path, body = REQUEST_MIX[(offset + i) % len(REQUEST_MIX)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(http.request(method, path, json=body), REQUEST_TIMEOUT_S)
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+                except Exception as e:  # timeouts, and QueuePool errors once every connection is checked out
+                    errors.append(type(e).__name__)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run_load_during_upload(app, clients: int, csv: bytes):
+    import httpx
+
+    uploaded = asyncio.Event()
+    result = {}
+
+    async def upload():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as http:
+            started = time.perf_counter()
+            try:
+                response = await http.post(
+                    "/upload_csv", params={"mode": "replace"}, files={"file": ("bench.csv", csv, "text/csv")}
+                )
+                result.update(response.json())
+            finally:
+                result["seconds"] = time.perf_counter() - started
+                uploaded.set()
+
+    (latencies, errors, elapsed), _ = await asyncio.gather(run_load(app, clients, until=uploaded), upload())
+    return latencies, errors, elapsed, result
+
+
+def run_mode(rows: int, concurrency):
+    import pandas as pd
+    from backend import main
+    from backend.db import SessionLocal
+
+    main.ensure_started()
+
+    raw = pd.read_csv(SAMPLE_CSV)
+    raw.columns = [c.strip().lower() for c in raw.columns]
+    sample = main.normalize_transactions_frame(raw)
+    frame = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).head(rows)
+    with SessionLocal() as db:
+        main.bulk_insert_transactions(db, frame)
+        db.commit()
+
+    mode = "async" if os.environ["DB_ASYNC_READS"] == "1" else "sync"
+
+    async def measure():
+        # One event loop for every level: the async engine's pooled connections belong to it
+        await run_load(main.app, 4)  # warm up pools and imports
+        for clients in concurrency:
+            latencies, errors, elapsed = await run_load(main.app, clients)
+            print(
+                f"{mode:>6} | clients {clients:4d} | {len(latencies) / elapsed:7.1f} req/s"
+                f" | p50 {percentile(latencies, 50):8.1f} ms | p99 {percentile(latencies, 99):8.1f} ms"
+                f" | errors {len(errors)}"
+            )
+
+        clients = min(concurrency)
+        latencies, errors, elapsed, upload = await run_load_during_upload(main.app, clients, upload_body(rows))
+        if not upload.get("ok"):
+            print(f"{mode:>6} | upload failed: {upload}")
+            return
+        print(
+            f"{mode:>6} | clients {clients:4d} | {len(latencies) / elapsed:7.1f} req/s"
+            f" | p50 {percentile(latencies, 50):8.1f} ms | p99 {percentile(latencies, 99):8.1f} ms"
+            f" | errors {len(errors)} | during a {upload['seconds']:.1f} s upload, max {max(latencies):.1f} ms"
+        )
+
+    asyncio.run(measure())
+
+
+if __name__ == "__main__":
+    if os.environ.get("BENCH_CHILD"):
+        os.chdir(tempfile.mkdtemp(prefix="bench_async_"))
+        sys.path.insert(0, str(PROJECT_DIR))
+        run_mode(int(sys.argv[1]), [int(c) for c in sys.argv[2:]])
+    else:
+        rows = sys.argv[1] if len(sys.argv) > 1 else "100000"
+        concurrency = sys.argv[2:] or ["10", "50", "200"]
+        for async_reads in ("0", "1"):
+            env = dict(
+                os.environ, DB_ASYNC_READS=async_reads, BENCH_CHILD="1",
+                RESPONSE_CACHE_SIZE="0", CHAT_CACHE_SIZE="0",
+            )
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_async_reads", rows, *concurrency],
+                env=env, cwd=PROJECT_DIR, check=True,
+            )
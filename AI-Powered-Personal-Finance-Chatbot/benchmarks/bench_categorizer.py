@@ -0,0 +1,75 @@
+"""Microbenchmark: per-row vs batched categorizer inference.
+
+Trains the TF-IDF + MultinomialNB categorizer on expenses_one_year.csv, then
+times ai_categorize_transaction in a loop against one ai_categorize_batch call
+over N uncategorized rows sampled from the same descriptions.
+
+Run from the project folder:
+    python -m benchmarks.bench_categorizer            # 10k and 100k rows
+    python -m benchmarks.bench_categorizer 5000 50000
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+
+# backend.main creates its SQLite file and looks for model pickles in the CWD
+os.chdir(tempfile.mkdtemp(prefix="bench_categorizer_"))
+
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+from sklearn.naive_bayes import MultinomialNB  # noqa: E402
+
+from backend import main  # noqa: E402
+
+
+def train_on_sample() -> pd.DataFrame:
+    df = pd.read_csv(SAMPLE_CSV)
+    df.columns = [c.strip().lower() for c in df.columns]
+    df = main.normalize_transactions_frame(df)
+
+    vectorizer = TfidfVectorizer(max_features=1000)
+    X = vectorizer.fit_transform(df["description"] + " " + df["merchant"])
+    model = MultinomialNB().fit(X, df["category"])
+    main.ai_categorizer = {
+        "model": model,
+        "vectorizer": vectorizer,
+        "version": 1,
+        "trained_at": None,
+        "training_rows": len(df),
+        "training_seconds": None,
+    }
+    return df
+
+
+def bench(sample: pd.DataFrame, rows: int):
+    pending = sample.sample(n=rows, replace=True, random_state=42).reset_index(drop=True)
+
+    start = time.perf_counter()
+    per_row = [
+        main.ai_categorize_transaction(d, m)
+        for d, m in zip(pending["description"], pending["merchant"])
+    ]
+    per_row_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched, _ = main.ai_categorize_batch(pending["description"], pending["merchant"])
+    batched_s = time.perf_counter() - start
+
+    assert list(batched) == per_row, "batched predictions differ from per-row predictions"
+    print(
+        f"{rows:>8,} rows | per-row {per_row_s:8.3f}s ({rows / per_row_s:>10,.0f} rows/s)"
+        f" | batched {batched_s:7.3f}s ({rows / batched_s:>12,.0f} rows/s)"
+        f" | {per_row_s / batched_s:6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    sample = train_on_sample()
+    for n in sizes:
+        bench(sample, n)
@@ -0,0 +1,98 @@
+"""Category growth ranking: one grouped query + array math vs a per-category loop.
+
+Fills the rollup table of a fresh database with synthetic expense rows for
+many categories over many years (a few merchants per category and month),
+then times /analytics/category_growth split into the grouped query that
+builds the month x category matrix and the vectorized growth math. The
+baseline runs one monthly query per category and computes the same growth
+numbers in Python, which is what a straightforward per-category
+implementation would do.
+
+Run from the project folder:
+    python -m benchmarks.bench_category_growth              # 300 categories, 10 years
+    python -m benchmarks.bench_category_growth 1000 20
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def timed(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main(categories: int = 300, years: int = 10, merchants: int = 4):
+    os.chdir(tempfile.mkdtemp())
+    import numpy as np
+    from sqlalchemy import func
+    from backend import main as app_main
+    from backend.analytics import category_growth, category_month_matrix
+    from backend.db import SessionLocal, ReadSessionLocal
+    from backend.models import DEFAULT_SESSION_ID, TransactionRollup
+
+    app_main.ensure_started()
+
+    rng = np.random.default_rng(17)
+    months = [f"{2000 + m // 12:04d}-{m % 12 + 1:02d}" for m in range(years * 12)]
+    rows = [
+        {
+            "session_id": DEFAULT_SESSION_ID, "month": month, "category": f"Category {c:04d}",
+            "merchant": f"Merchant {k}", "sign": -1, "total": -float(rng.integers(100, 5000)), "count": 1,
+        }
+        for month in months for c in range(categories) for k in range(merchants)
+    ]
+    with SessionLocal() as db:
+        db.execute(TransactionRollup.__table__.insert(), rows)
+        db.commit()
+
+    def vectorized():
+        with ReadSessionLocal() as db:
+            return category_growth(category_month_matrix(db, DEFAULT_SESSION_ID))
+
+    def matrix_only():
+        with ReadSessionLocal() as db:
+            return category_month_matrix(db, DEFAULT_SESSION_ID)
+
+    def per_category(window=3):
+        ranked = []
+        with ReadSessionLocal() as db:
+            names = [c for (c,) in db.query(TransactionRollup.category).distinct()]
+            for name in names:
+                series = dict(
+                    db.query(TransactionRollup.month, func.sum(TransactionRollup.total))
+                    .filter(TransactionRollup.session_id == DEFAULT_SESSION_ID, TransactionRollup.sign == -1)
+                    .filter(TransactionRollup.category == name)
+                    .group_by(TransactionRollup.month)
+                    .all()
+                )
+                spend = [-series.get(m, 0.0) for m in months]
+                recent = sum(spend[-window:]) / window
+                prior = sum(spend[-2 * window:-window]) / window
+                ranked.append((name, (recent - prior) / prior if prior else None))
+        return sorted(ranked, key=lambda item: -(item[1] or 0))
+
+    matrix_ms, matrix = timed(matrix_only)
+    growth_ms, _ = timed(lambda: category_growth(matrix))
+    vector_ms, ranked = timed(vectorized)
+    loop_ms, baseline = timed(per_category, repeat=1)
+    assert [r["category"] for r in ranked[:10]] == [name for name, _ in baseline[:10]]
+
+    print(f"{categories} categories x {len(months)} months ({len(rows):,} rollup rows)")
+    print(f"{'grouped query + matrix':<28}{matrix_ms:>10.1f} ms")
+    print(f"{'growth math':<28}{growth_ms:>10.2f} ms")
+    print(f"{'category_growth total':<28}{vector_ms:>10.1f} ms")
+    print(f"{'per-category queries':<28}{loop_ms:>10.1f} ms  ({loop_ms / vector_ms:.0f}x slower)")
+    with ReadSessionLocal() as db:
+        endpoint_ms, _ = timed(lambda: app_main.category_growth_ranking(db=db))
+    print(f"{'/analytics/category_growth':<28}{endpoint_ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,110 @@
+"""Categorizing an upload: model on every row vs the persistent prediction memo.
+
+A fresh database gets a synthetic history and a trained categorizer. Then an
+uncategorized synthetic upload is categorized (categorize_uncategorized,
+nothing inserted) three ways:
+
+- model: every uncategorized row goes through the vectorizer and the model
+- memo cold: the memo is empty, so each distinct key is predicted once and
+  stored
+- memo warm: the same descriptions were seen before (last month's upload),
+  so only keys missing from the memo reach the model
+- new version: the warm memo after the model was retrained, as every upload
+  in incremental mode sees it. Rows stored by the previous version are
+  misses, so each distinct key is predicted once and overwritten; this is
+  what a new version costs, since nothing re-predicts the memo in training
+
+once with every description recurring and once with 30% carrying a random
+reference number, which makes most of those keys new. Every variant must
+assign the same categories.
+
+Run from the project folder:
+    python -m benchmarks.bench_category_memo                # 100k-row upload
+    python -m benchmarks.bench_category_memo 1000000 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def timed(fn, repeat=1):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main(rows: int, history: int, repeat: int):
+    os.chdir(tempfile.mkdtemp())
+    from backend import main as app_main
+    from backend.db import ReadSessionLocal, SessionLocal
+    from backend.models import CategoryMemo
+    from benchmarks.synthetic import generate_frame
+
+    app_main.ensure_started()
+    frame = app_main.normalize_transactions_frame(generate_frame(history, seed=1))
+    with SessionLocal() as db:
+        app_main.bulk_insert_transactions(db, frame)
+        db.commit()
+    with ReadSessionLocal() as db:
+        app_main.ai_categorizer = app_main.train_ai_categorization_model(db)
+
+    print(f"{rows:,} uncategorized rows, {history:,} rows of history, median of {repeat}")
+    print(
+        f"{'references':>10} | {'distinct':>8} | {'model':>8} | {'memo cold':>9} | {'memo warm':>9}"
+        f" | {'new version':>11} | warm row hit rate"
+    )
+    for seed, unique_fraction in enumerate((0.0, 0.3), start=2):
+        upload = app_main.normalize_transactions_frame(
+            generate_frame(rows, seed, unique_fraction=unique_fraction, uncategorized_fraction=1.0)
+        )
+        # Last month: same descriptions, other reference numbers
+        previous = app_main.normalize_transactions_frame(
+            generate_frame(rows, seed + 100, unique_fraction=unique_fraction, uncategorized_fraction=1.0)
+        )
+        with SessionLocal() as db:
+            db.query(CategoryMemo).delete()
+            db.commit()
+
+        model_ms, expected = timed(lambda: app_main.categorize_uncategorized(upload.copy())["category"], repeat)
+
+        def with_memo():
+            with SessionLocal() as db:
+                before = app_main.memo_stats.stats()
+                categories = app_main.categorize_uncategorized(upload.copy(), db=db)["category"]
+                db.rollback()
+            after = app_main.memo_stats.stats()
+            hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+            return categories, hits / (hits + misses)
+
+        cold_ms, (cold, _) = timed(with_memo, repeat)
+        with SessionLocal() as db:
+            app_main.categorize_uncategorized(previous.copy(), db=db)
+            db.commit()
+        warm_ms, (warm, hit_rate) = timed(with_memo, repeat)
+        # Same model under the next version number: every stored row is stale, the categories are not
+        trained = app_main.ai_categorizer
+        app_main.ai_categorizer = dict(trained, version=trained["version"] + 1)
+        new_version_ms, (new_version, _) = timed(with_memo, repeat)
+        app_main.ai_categorizer = trained
+        if not (expected.equals(cold) and expected.equals(warm) and expected.equals(new_version)):
+            raise RuntimeError("memoized categories differ from the model's")
+
+        distinct = upload["description"].nunique()
+        print(
+            f"{unique_fraction:>10.0%} | {distinct:>8,} | {model_ms:5.0f} ms | {cold_ms:6.0f} ms | {warm_ms:6.0f} ms"
+            f" | {new_version_ms:8.0f} ms | {hit_rate:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=100_000)
+    parser.add_argument("--history", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.history, args.repeat)
@@ -0,0 +1,67 @@
+"""Chat question parsing: original substring scans vs the compiled single-pass matcher.
+
+For each question of the parity corpus (scripts/check_nlp_parity.py) the
+original path runs what the chat endpoint used to run per request:
+classify_intent (which calls extract_category), extract_category again,
+the time-phrase checks and parse_topn. The compiled path runs
+analyze_question once. normalize_category is timed separately over the
+category labels of the sample CSV repeated many times, both through its
+memo and with the memo bypassed.
+
+Run from the project folder:
+    python -m benchmarks.bench_chat_nlp
+"""
+import time
+from pathlib import Path
+
+from backend import nlp
+from scripts.check_nlp_parity import (
+    build_corpus, legacy_classify_intent, legacy_extract_category, legacy_normalize_category,
+    legacy_parse_topn, legacy_time_phrase,
+)
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+
+
+def per_call_us(fn, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items) * 1e6
+
+
+def legacy_chat_parse(q):
+    question = q.strip().lower()
+    intent = legacy_classify_intent(question)
+    time_phrase = legacy_time_phrase(question)
+    category = legacy_extract_category(question)
+    return intent, time_phrase, category, legacy_parse_topn(question)
+
+
+def compiled_chat_parse(q):
+    return nlp.analyze_question(q.strip().lower())
+
+
+def main():
+    import pandas as pd
+
+    corpus = build_corpus()
+    labels = pd.read_csv(SAMPLE_CSV)["category"].astype(str).tolist() * 20
+
+    legacy_q = per_call_us(legacy_chat_parse, corpus)
+    compiled_q = per_call_us(compiled_chat_parse, corpus)
+    legacy_c = per_call_us(legacy_normalize_category, labels)
+    compiled_c = per_call_us(nlp.normalize_category, labels)
+    uncached_c = per_call_us(nlp.normalize_category.__wrapped__, labels)
+
+    print(f"{'':<28}{'original us':>12}{'compiled us':>12}{'speedup':>9}")
+    print(f"{'chat question (' + str(len(corpus)) + ')':<28}{legacy_q:>12.2f}{compiled_q:>12.2f}{legacy_q / compiled_q:>8.1f}x")
+    print(f"{'normalize_category (' + str(len(labels)) + ')':<28}{legacy_c:>12.2f}{compiled_c:>12.2f}{legacy_c / compiled_c:>8.1f}x")
+    print(f"{'  without memo':<28}{legacy_c:>12.2f}{uncached_c:>12.2f}{legacy_c / uncached_c:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Cold start of a worker: import time, time to first response and first-use costs.
+
+A database seeded with the sample CSV repeated to N rows and a trained
+categorizer is prepared once. Then, R times each, in fresh processes:
+
+- import: `import backend.main` in a new interpreter
+- first response: from launching `uvicorn backend.main:app` until GET /
+  answers (what a restarted or newly scaled worker pays before it serves a
+  health check), with the worker's resident memory at that point
+- first dashboard / first chat: the first data request on that worker, which
+  loads pandas on demand
+- first categorize: an append upload with uncategorized rows, which loads
+  scikit-learn and the memory-mapped categorizer on demand
+
+Run from the project folder:
+    python -m benchmarks.bench_cold_start                 # 20k rows, 5 repeats
+    python -m benchmarks.bench_cold_start 100000 --repeat 3
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+STARTUP_TIMEOUT_S = 60
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import backend.main; print(time.perf_counter() - t)"
+
+
+def seed_database(rows: int):
+    """Runs in the benchmark's working directory, in its own process"""
+    import pandas as pd
+    from backend import main
+    from backend.db import SessionLocal
+
+    main.ensure_started()
+
+    raw = pd.read_csv(SAMPLE_CSV)
+    raw.columns = [c.strip().lower() for c in raw.columns]
+    sample = main.normalize_transactions_frame(raw)
+    frame = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).head(rows)
+    with SessionLocal() as db:
+        main.bulk_insert_transactions(db, frame)
+        db.commit()
+        main.train_ai_categorization_model(db)
+    main.bump_data_version("upload")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def resident_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def uncategorized_csv(batch: int) -> bytes:
+    """200 sample rows without a category; ``batch`` goes into the descriptions so no run sees duplicates"""
+    with open(SAMPLE_CSV, "rb") as f:
+        lines = f.read().decode().splitlines()
+    header, rows = lines[0], lines[1:201]
+    columns = [c.strip().lower() for c in header.split(",")]
+    description, category = columns.index("description"), columns.index("category")
+    cleared = []
+    for row in rows:
+        fields = row.split(",")
+        fields[description] += f" batch {batch}"
+        fields[category] = ""
+        cleared.append(",".join(fields))
+    return "\n".join([header] + cleared).encode()
+
+
+def timed_request(http, method: str, path: str, **kwargs) -> float:
+    started = time.perf_counter()
+    response = http.request(method, path, **kwargs)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def cold_server(workdir: str, env: dict, upload: bytes) -> dict:
+    import httpx
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    launched = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=workdir,
+    )
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        with httpx.Client(base_url=base_url, timeout=60) as http:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+                if time.monotonic() > deadline:
+                    raise RuntimeError("server did not start")
+                try:
+                    if http.get("/").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    time.sleep(0.02)
+            result = {"first_response": time.perf_counter() - launched, "idle_rss_mib": resident_mib(server.pid)}
+            result["first_dashboard"] = timed_request(http, "GET", "/dashboard")
+            result["first_chat"] = timed_request(http, "POST", "/chat", json={"question": "top 5 expenses this month"})
+            result["first_categorize"] = timed_request(
+                http, "POST", "/upload_csv", params={"mode": "append"},
+                files={"file": ("uncategorized.csv", upload, "text/csv")},
+            )
+            result["loaded_rss_mib"] = resident_mib(server.pid)
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(rows: int, repeat: int):
+    workdir = tempfile.mkdtemp(prefix="bench_cold_start_")
+    env = dict(os.environ, LOG_LEVEL="WARNING", PYTHONPATH=str(PROJECT_DIR))
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", str(rows), "--seed-into", workdir],
+        env=env, cwd=PROJECT_DIR, check=True,
+    )
+    samples = {}
+    for batch in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], env=env, cwd=workdir, check=True, capture_output=True, text=True,
+        ).stdout
+        samples.setdefault("import", []).append(float(output.strip().splitlines()[-1]))
+        for name, value in cold_server(workdir, env, uncategorized_csv(batch)).items():
+            samples.setdefault(name, []).append(value)
+
+    print(f"{rows:,} rows, median of {repeat} cold starts")
+    for name, values in samples.items():
+        median = statistics.median(values)
+        print(f"{name:<18}{median:9.1f} MiB" if name.endswith("_mib") else f"{name:<18}{median * 1000:9.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed-into", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_into:
+        # backend.main creates its SQLite file and model pickles in the CWD
+        os.chdir(args.seed_into)
+        seed_database(args.rows)
+    else:
+        run(args.rows, args.repeat)
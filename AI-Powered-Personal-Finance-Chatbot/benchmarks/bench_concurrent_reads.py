@@ -0,0 +1,176 @@
+"""Reader latency over HTTP while a large CSV upload is in flight, per DB profile.
+
+For each DB_PROFILE ("basic" = stock SQLite settings, "performance" = WAL +
+tuned pragmas + read/write session split) a fresh database is seeded with the
+sample CSV and served by a uvicorn process. One client then POSTs a large CSV
+to /upload_csv (mode=replace: parse, normalize, delete + bulk insert, commit)
+while another keeps requesting /summary/by_category and /dashboard on the same
+server until the upload returns. The response cache is disabled so every read
+reaches the database.
+
+Both the upload and the reads go through the server's event loop, so a handler
+that blocks the loop shows up here as read latency of the order of the upload
+time, whatever the database does.
+
+Run from the project folder:
+    python -m benchmarks.bench_concurrent_reads            # 500k rows
+    python -m benchmarks.bench_concurrent_reads 200000
+"""
+import argparse
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+STARTUP_TIMEOUT_S = 60
+UPLOAD_TIMEOUT_S = 600
+READ_PATHS = ["/summary/by_category", "/dashboard"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def seed_database():
+    """Runs in the benchmark's working directory, in its own process"""
+    import pandas as pd
+    from backend import main
+    from backend.db import SessionLocal
+
+    main.ensure_started()
+
+    raw = pd.read_csv(SAMPLE_CSV)
+    raw.columns = [c.strip().lower() for c in raw.columns]
+    with SessionLocal() as db:
+        main.bulk_insert_transactions(db, main.normalize_transactions_frame(raw))
+        db.commit()
+    main.bump_data_version("upload")
+
+
+def upload_body(rows: int) -> bytes:
+    header, *lines = SAMPLE_CSV.read_bytes().splitlines()
+    body = io.BytesIO()
+    body.write(header + b"\n")
+    for i in range(rows):
+        body.write(lines[i % len(lines)] + b"\n")
+    return body.getvalue()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(base_url: str, server: subprocess.Popen):
+    import httpx
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run_profile(profile: str, body: bytes, rows: int):
+    import httpx
+
+    workdir = tempfile.mkdtemp(prefix="bench_reads_")
+    env = dict(
+        os.environ, DB_PROFILE=profile, RESPONSE_CACHE_SIZE="0", CHAT_CACHE_SIZE="0",
+        LOG_LEVEL="WARNING", PYTHONPATH=str(PROJECT_DIR),
+    )
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_concurrent_reads", "--seed-into", workdir],
+        env=env, cwd=PROJECT_DIR, check=True,
+    )
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=workdir,
+    )
+    try:
+        wait_until_up(base_url, server)
+        latencies, errors, result = [], [], {}
+        ready = threading.Event()
+        done = threading.Event()
+
+        def uploader():
+            ready.wait()
+            started = time.perf_counter()
+            try:
+                response = httpx.post(
+                    base_url + "/upload_csv", params={"mode": "replace"}, timeout=UPLOAD_TIMEOUT_S,
+                    files={"file": ("bench.csv", body, "text/csv")},
+                )
+                result.update(response.json())
+            finally:
+                result["seconds"] = time.perf_counter() - started
+                done.set()
+
+        def reader():
+            with httpx.Client(base_url=base_url, timeout=UPLOAD_TIMEOUT_S) as http:
+                for path in READ_PATHS:  # warm the connection and the handlers
+                    http.get(path)
+                ready.set()
+                while not done.is_set():
+                    path = READ_PATHS[len(latencies) % len(READ_PATHS)]
+                    started = time.perf_counter()
+                    try:
+                        if http.get(path).status_code != 200:
+                            errors.append(path)
+                    except httpx.HTTPError as e:
+                        errors.append(type(e).__name__)
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+        threads = [threading.Thread(target=reader), threading.Thread(target=uploader)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not result.get("ok") or result.get("inserted") != rows:
+        print(f"{profile:>12} | upload failed: {result}")
+    elif not latencies:
+        print(f"{profile:>12} | upload {result['seconds']:6.2f}s | no reads completed")
+    else:
+        print(
+            f"{profile:>12} | upload {result['seconds']:6.2f}s | reads {len(latencies):5d}"
+            f" | p50 {percentile(latencies, 50):8.1f} ms | p99 {percentile(latencies, 99):8.1f} ms"
+            f" | max {max(latencies):8.1f} ms | errors {len(errors)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=500_000)
+    parser.add_argument("--seed-into", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_into:
+        # backend.main creates its SQLite file and model pickles in the CWD
+        os.chdir(args.seed_into)
+        seed_database()
+    else:
+        body = upload_body(args.rows)
+        print(f"{args.rows:,}-row upload, {os.cpu_count()} CPUs")
+        for profile in ("basic", "performance"):
+            run_profile(profile, body, args.rows)
@@ -0,0 +1,93 @@
+"""Categorizer training: incremental update vs full rebuild as history grows.
+
+For each history size a fresh database is filled with synthetic rows, then
+timed on it:
+
+- full hashed: the incremental model built from every row (what a replace
+  upload or POST /model/train costs)
+- full TF-IDF: the previous refit of TfidfVectorizer + MultinomialNB on every
+  row (MODEL_TRAINING=full)
+- update: BATCH new rows are appended and the hashed model is extended with
+  them; this is what every upload and category correction pays
+- save: writing one checkpoint, which depends on the feature count and the
+  number of categories, not on the history
+
+Holdout accuracy (every 10th id, never trained on) is printed for each model.
+Synthetic descriptions map to one category each, so expect it near 100%;
+the check is that the update does not lose accuracy against a rebuild.
+
+Run from the project folder:
+    python -m benchmarks.bench_incremental_training                   # 50k and 200k rows, 1k new
+    python -m benchmarks.bench_incremental_training 20000 100000 500000 --batch 5000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def timed(fn, repeat=1):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def accuracy(categorizer) -> str:
+    return f"{categorizer['holdout_accuracy']:.1%} of {categorizer['holdout_rows']}"
+
+
+def main(sizes, batch: int, repeat: int):
+    os.chdir(tempfile.mkdtemp())
+    from backend import main as app_main
+    from backend.categorizer import train_incremental
+    from backend.db import ReadSessionLocal, SessionLocal
+    from backend.models import Transaction
+    from benchmarks.synthetic import generate_frame
+
+    app_main.ensure_started()
+    # Keep the one-off scikit-learn import out of the first timing
+    import sklearn.feature_extraction.text  # noqa: F401
+    import sklearn.naive_bayes  # noqa: F401
+
+    def insert(rows: int, seed: int):
+        frame = app_main.normalize_transactions_frame(generate_frame(rows, seed))
+        with SessionLocal() as db:
+            app_main.bulk_insert_transactions(db, frame)
+            db.commit()
+
+    print(f"{batch:,} new rows per update, median of {repeat}")
+    print(f"{'history':>10} | {'full hashed':>11} | {'full TF-IDF':>11} | {'update':>9} | {'save':>7} | holdout accuracy")
+    for seed, rows in enumerate(sizes):
+        with SessionLocal() as db:
+            db.query(Transaction).delete()
+            db.commit()
+        insert(rows, seed)
+        with ReadSessionLocal() as db:
+            full_ms, base = timed(lambda: train_incremental(db))
+            tfidf_ms, tfidf = timed(lambda: app_main.fit_tfidf_categorizer(db))
+
+        insert(batch, seed + 1000)
+        with ReadSessionLocal() as db:
+            # train_incremental copies the base, so every repeat extends the same model
+            update_ms, updated = timed(lambda: train_incremental(db, base), repeat)
+        save_ms, _ = timed(lambda: app_main.save_categorizer(updated))
+        if not updated["incremental"] or updated["new_rows"] > batch:
+            raise RuntimeError(f"update retrained {updated['new_rows']} rows instead of the new ones")
+
+        print(
+            f"{rows:>10,} | {full_ms:8.0f} ms | {tfidf_ms:8.0f} ms | {update_ms:6.0f} ms | {save_ms:4.0f} ms"
+            f" | full {accuracy(base)}, TF-IDF {accuracy(tfidf)}, updated {accuracy(updated)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[50_000, 200_000])
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.sizes or [50_000, 200_000], args.batch, args.repeat)
@@ -0,0 +1,187 @@
+"""Read throughput of uvicorn with 1..N worker processes sharing one database.
+
+A fresh database is seeded with the sample CSV repeated to N rows, then for
+each worker count a `uvicorn backend.main:app --workers W` server is started
+on it and C client processes (keep-alive connections, one request at a time
+each) send a mix of summary, visualization, dashboard and chat requests for a
+fixed duration. The response and chat answer caches are disabled so every
+request does its database and pandas work; with them on, most requests are
+cache hits and scaling says little.
+
+After each run one CSV is uploaded through a single worker and every worker
+must then report its timestamp and serve the new data, which checks that the
+data version is shared rather than per process.
+
+Clients run on the same machine as the server, so use fewer clients than
+cores or the load generator competes with the workers.
+
+Run from the project folder:
+    python -m benchmarks.bench_workers                    # 100k rows, 1/2/4 workers, 8 clients
+    python -m benchmarks.bench_workers 50000 1 2 4 8 --clients 16 --seconds 20
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+STARTUP_TIMEOUT_S = 60
+# Unmeasured load before each run: the port answers as soon as one worker is up,
+# while the others may still be importing and warming their pools
+WARMUP_S = 5
+
+REQUEST_MIX = [
+    ("GET", "/summary/by_category", None),
+    ("GET", "/summary/monthly_totals", None),
+    ("GET", "/visualization/category_pie", None),
+    ("GET", "/visualization/top_merchants_by_single_payment", None),
+    ("GET", "/dashboard", None),
+    ("POST", "/chat", {"question": "how much did I spend on food last month"}),
+    ("POST", "/chat", {"question": "top 5 expenses this month"}),
+    ("POST", "/chat", {"question": "which category is growing the fastest?"}),
+]
+
+
+def seed_database(rows: int):
+    """Runs in the benchmark's working directory, in its own process"""
+    import pandas as pd
+    from backend import main
+    from backend.db import SessionLocal
+
+    main.ensure_started()
+
+    raw = pd.read_csv(SAMPLE_CSV)
+    raw.columns = [c.strip().lower() for c in raw.columns]
+    sample = main.normalize_transactions_frame(raw)
+    frame = pd.concat([sample] * (rows // len(sample) + 1), ignore_index=True).head(rows)
+    with SessionLocal() as db:
+        main.bulk_insert_transactions(db, frame)
+        db.commit()
+    main.bump_data_version("upload")
+
+
+def client_loop(base_url: str, offset: int, seconds: float, results):
+    import httpx
+
+    done = errors = 0
+    with httpx.Client(base_url=base_url, timeout=30) as http:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            method, path, body = REQUEST_MIX[(offset + done) % len(REQUEST_MIX)]
+            try:
+                if http.request(method, path, json=body).status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            done += 1
+    results.put((done, errors))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(base_url: str, server: subprocess.Popen):
+    import httpx
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def check_shared_version(base_url: str, workers: int) -> str:
+    """Upload through one worker, then make sure every connection sees the new version and data"""
+    import httpx
+
+    with open(SAMPLE_CSV, "rb") as f:
+        upload = httpx.post(
+            base_url + "/upload_csv", params={"mode": "append"}, timeout=60,
+            files={"file": ("more.csv", f.read().replace(b"-2024,", b"-2028,"), "text/csv")},
+        ).json()
+    # New connections are spread over the workers by the kernel; ask from many of them
+    stale = 0
+    for _ in range(workers * 10):
+        with httpx.Client(base_url=base_url) as http:
+            dashboard = http.get("/dashboard").json()
+            if dashboard["timestamp"] != upload["timestamp"] or "2028" not in str(dashboard["monthly_trend"]["months"]):
+                stale += 1
+    return "ok" if stale == 0 else f"{stale} stale responses"
+
+
+def run(rows: int, worker_counts, clients: int, seconds: float):
+    workdir = tempfile.mkdtemp(prefix="bench_workers_")
+    env = dict(os.environ, RESPONSE_CACHE_SIZE="0", CHAT_CACHE_SIZE="0", LOG_LEVEL="WARNING", PYTHONPATH=str(PROJECT_DIR))
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_workers", str(rows), "--seed-into", workdir],
+        env=env, cwd=PROJECT_DIR, check=True,
+    )
+    print(f"{rows:,} rows, {clients} clients, {seconds:.0f} s per run, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in worker_counts:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning"],
+            env=env, cwd=workdir,
+        )
+        try:
+            wait_until_up(base_url, server)
+            client_loop(base_url, 0, WARMUP_S, multiprocessing.Queue())
+            results = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(target=client_loop, args=(base_url, offset, seconds, results))
+                for offset in range(clients)
+            ]
+            started = time.perf_counter()
+            for p in processes:
+                p.start()
+            totals = [results.get() for _ in processes]
+            elapsed = time.perf_counter() - started
+            for p in processes:
+                p.join()
+            done, errors = sum(t[0] for t in totals), sum(t[1] for t in totals)
+            throughput = done / elapsed
+            baseline = baseline or throughput
+            consistency = check_shared_version(base_url, workers)
+            print(
+                f"workers {workers:2d} | {throughput:7.1f} req/s | {throughput / baseline:4.2f}x"
+                f" | errors {errors} | shared version after upload: {consistency}"
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="?", type=int, default=100_000)
+    parser.add_argument("workers", nargs="*", type=int, default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed-into", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_into:
+        # backend.main creates its SQLite file and model pickles in the CWD
+        os.chdir(args.seed_into)
+        seed_database(args.rows)
+    else:
+        run(args.rows, args.workers or [1, 2, 4], args.clients, args.seconds)
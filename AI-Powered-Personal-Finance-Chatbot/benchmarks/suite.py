@@ -0,0 +1,237 @@
+"""End-to-end benchmark suite over synthetic datasets of increasing size.
+
+For every size a fresh process and database time, in order:
+
+* CSV upload through /upload_csv (up to DIRECT_UPLOAD_MAX_ROWS) and through
+  /upload_csv/stream, the streaming ingest included
+* categorizer training on the uploaded rows and batched inference
+* every GET /summary/* and /visualization/* route, /dashboard and
+  /analytics/category_growth
+* /chat, one question per intent
+* a session upload and /session/{id}/analytics, cold and warm
+
+Response and chat caches are disabled so every read reaches the database.
+Results go to a JSON file (benchmarks/results/<commit>.json by default) so
+two commits can be compared:
+
+Run from the project folder:
+    python -m benchmarks.suite                              # 10k and 100k rows
+    python -m benchmarks.suite 10000 1000000 10000000 --repeat 3
+    python -m benchmarks.suite --compare old.json new.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = PROJECT_DIR / "benchmarks" / "results"
+SEED = 0
+# Share of generated rows left uncategorized for the categorizer to fill in
+UNCATEGORIZED_FRACTION = 0.05
+# /upload_csv and /session/{id}/upload read the whole file into memory
+DIRECT_UPLOAD_MAX_ROWS = 1_000_000
+INFERENCE_MAX_ROWS = 1_000_000
+TRAINING_TIMEOUT_S = 600
+
+READ_PREFIXES = ("/summary/", "/visualization/")
+EXTRA_READ_PATHS = ("/dashboard", "/analytics/category_growth")
+CHAT_QUESTIONS = {
+    "sum_by_category": "how much did I spend on food last month",
+    "top_expenses": "top 5 expenses this year",
+    "list_transactions": "show my shopping transactions in march",
+    "spending_alerts": "am I over budget?",
+    "fastest_growing_category": "which category is growing the fastest?",
+    "fallback": "what is my total spending in 2024",
+}
+
+
+def summarize(samples_ms):
+    return {
+        "median_ms": round(statistics.median(samples_ms), 3),
+        "min_ms": round(min(samples_ms), 3),
+        "max_ms": round(max(samples_ms), 3),
+        "runs": len(samples_ms),
+    }
+
+
+def timed(fn, repeat=1):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples), result
+
+
+def wait_for_training(main):
+    deadline = time.monotonic() + TRAINING_TIMEOUT_S
+    while main.model_training_state["in_progress"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def run_size(rows: int, repeat: int) -> dict:
+    import pandas as pd
+    from fastapi.testclient import TestClient
+    from benchmarks.synthetic import write_csv
+    from backend import main
+    from backend.db import ReadSessionLocal
+    from backend.nlp import analyze_question
+
+    client = TestClient(main.app)
+    results = {}
+
+    def check(response, name):
+        body = response.json()
+        if response.status_code != 200 or (isinstance(body, dict) and body.get("ok") is False):
+            raise RuntimeError(f"{name}: HTTP {response.status_code} {str(body)[:200]}")
+        return body
+
+    def upload(path, url, name):
+        with open(path, "rb") as f:
+            return check(client.post(url, files={"file": ("transactions.csv", f, "text/csv")}), name)
+
+    csv_path = Path("transactions.csv")
+    results["generate_csv"], _ = timed(
+        lambda: write_csv(csv_path, rows, SEED, uncategorized_fraction=UNCATEGORIZED_FRACTION)
+    )
+    results["generate_csv"]["mib"] = round(csv_path.stat().st_size / 2**20, 1)
+
+    if rows <= DIRECT_UPLOAD_MAX_ROWS:
+        results["upload_csv"], _ = timed(lambda: upload(csv_path, "/upload_csv", "upload_csv"))
+        # The first upload starts training in a background thread; keep it out of later timings
+        wait_for_training(main)
+
+    # TestClient runs the ingest background task before returning
+    results["upload_csv_stream"], job = timed(lambda: upload(csv_path, "/upload_csv/stream", "upload_csv_stream"))
+    status = check(client.get(job["status_url"]), "upload_status")
+    if status["status"] != "completed":
+        raise RuntimeError(f"streaming upload ended as {status['status']}: {status.get('error')}")
+    wait_for_training(main)
+
+    with ReadSessionLocal() as db:
+        results["train_categorizer"], categorizer = timed(lambda: main.train_ai_categorization_model(db))
+    main.ai_categorizer = categorizer
+
+    sample = pd.read_csv(csv_path, nrows=min(rows, INFERENCE_MAX_ROWS))
+    sample = main.normalize_transactions_frame(sample)
+    results["categorize_batch"], _ = timed(
+        lambda: main.ai_categorize_batch(sample["description"], sample["merchant"]), repeat
+    )
+    results["categorize_batch"]["rows"] = len(sample)
+    del sample
+
+    read_paths = sorted(
+        route.path for route in main.app.routes
+        if "GET" in getattr(route, "methods", ()) and route.path.startswith(READ_PREFIXES)
+    ) + list(EXTRA_READ_PATHS)
+    for path in read_paths:
+        check(client.get(path), path)  # warm-up
+        results[f"GET {path}"], _ = timed(lambda: check(client.get(path), path), repeat)
+
+    for intent, question in CHAT_QUESTIONS.items():
+        resolved = analyze_question(question).intent
+        if resolved != intent:
+            raise RuntimeError(f"{question!r} resolves to {resolved}, expected {intent}")
+        check(client.post("/chat", json={"question": question}), "/chat")  # warm-up
+        results[f"POST /chat {intent}"], _ = timed(
+            lambda: check(client.post("/chat", json={"question": question}), "/chat"), repeat
+        )
+
+    if rows <= DIRECT_UPLOAD_MAX_ROWS:
+        session_id = check(client.post("/session/create"), "session_create")["session_id"]
+        results["session_upload"], _ = timed(
+            lambda: upload(csv_path, f"/session/{session_id}/upload", "session_upload")
+        )
+        analytics = f"/session/{session_id}/analytics"
+        results["GET /session/{id}/analytics"], _ = timed(lambda: check(client.get(analytics), analytics), repeat)
+
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(sizes, repeat: int, out: Path):
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": SEED,
+        "sizes": {},
+    }
+    for rows in sizes:
+        with tempfile.TemporaryDirectory(prefix="bench_suite_") as workdir:
+            result_path = Path(workdir) / "result.json"
+            env = dict(os.environ, BENCH_CHILD="1", RESPONSE_CACHE_SIZE="0", CHAT_CACHE_SIZE="0")
+            # The app's ingest logging goes to the child's stdout; keep the report readable
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.suite", str(rows), "--repeat", str(repeat),
+                 "--out", str(result_path), "--workdir", workdir],
+                env=env, cwd=PROJECT_DIR, check=True, stdout=subprocess.DEVNULL,
+            )
+            report["sizes"][str(rows)] = json.loads(result_path.read_text())
+        print_results(rows, report["sizes"][str(rows)])
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nWrote {out}")
+
+
+def print_results(rows: int, results: dict):
+    print(f"\n{rows:,} rows")
+    for name, timing in results.items():
+        print(f"  {name:<52}{timing['median_ms']:>12.1f} ms")
+
+
+def compare(old_path: Path, new_path: Path):
+    """Median of every benchmark in both files, with new/old ratios"""
+    old, new = json.loads(old_path.read_text()), json.loads(new_path.read_text())
+    print(f"{old['commit']} -> {new['commit']}")
+    for rows, results in new["sizes"].items():
+        before = old["sizes"].get(rows)
+        if not before:
+            continue
+        print(f"\n{int(rows):,} rows")
+        for name, timing in results.items():
+            if name not in before:
+                continue
+            was, now = before[name]["median_ms"], timing["median_ms"]
+            ratio = now / was if was else float("inf")
+            flag = "  slower" if ratio > 1.1 else "  faster" if ratio < 0.9 else ""
+            print(f"  {name:<52}{was:>12.1f}{now:>12.1f} ms  {ratio:5.2f}x{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per read, chat and inference benchmark")
+    parser.add_argument("--out", type=Path, help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"))
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    elif os.environ.get("BENCH_CHILD"):
+        # backend.main creates its SQLite file and model pickles in the CWD
+        os.chdir(args.workdir)
+        sys.path.insert(0, str(PROJECT_DIR))
+        args.out.write_text(json.dumps(run_size(args.sizes[0], args.repeat)))
+    else:
+        run_suite(args.sizes, args.repeat, args.out or RESULTS_DIR / f"{git_commit()}.json")
@@ -0,0 +1,111 @@
+"""Deterministic synthetic transactions modeled on expenses_one_year.csv.
+
+Every (description, category) pair of the sample becomes a profile with its
+relative frequency and amount range; generated rows pick profiles with the
+same frequencies and draw integer amounts uniformly from each profile's
+range, so category, merchant and income/expense mixes match the sample at
+any size. Dates run chronologically over 1-10 years ending on the sample's
+last day. A share of descriptions get a reference suffix ("Uber ride #48213")
+so text is not limited to the sample's 36 strings, and a share of rows can
+be left uncategorized to exercise the categorizer.
+
+Output depends only on (rows, seed, options): rows are generated in chunks
+from per-chunk seeds, so a 10M-row file never has to fit in memory and the
+rows do not depend on the chunk size the caller asks for.
+
+    python -m benchmarks.synthetic 1000000 /tmp/transactions_1m.csv
+"""
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+GENERATOR_CHUNK_ROWS = 250_000
+ROWS_PER_DAY = 2  # the sample has 728 rows over 2024
+MAX_YEARS = 10
+
+
+class Profile(NamedTuple):
+    descriptions: np.ndarray
+    categories: np.ndarray
+    weights: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    last_day: date
+
+
+def load_profile(path: Path = SAMPLE_CSV) -> Profile:
+    sample = pd.read_csv(path)
+    sample.columns = [c.strip().lower() for c in sample.columns]
+    stats = sample.groupby(["description", "category"], sort=True)["amount"].agg(["count", "min", "max"]).reset_index()
+    last_day = pd.to_datetime(sample["date"], format="%d-%m-%Y").max().date()
+    return Profile(
+        descriptions=stats["description"].to_numpy(dtype=object),
+        categories=stats["category"].to_numpy(dtype=object),
+        weights=(stats["count"] / stats["count"].sum()).to_numpy(),
+        low=stats["min"].to_numpy(dtype=np.int64),
+        high=stats["max"].to_numpy(dtype=np.int64),
+        last_day=last_day,
+    )
+
+
+def date_span_days(rows: int) -> int:
+    years = min(MAX_YEARS, max(1, -(-rows // (ROWS_PER_DAY * 365))))
+    return years * 365
+
+
+def generate_chunks(
+    rows: int, seed: int = 0, unique_fraction: float = 0.3, uncategorized_fraction: float = 0.0,
+    chunk_rows: int = GENERATOR_CHUNK_ROWS, profile: Profile = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the rows as CSV-shaped frames (date, description, amount, category)"""
+    profile = profile or load_profile()
+    days = date_span_days(rows)
+    first_day = profile.last_day - timedelta(days=days - 1)
+    day_labels = pd.date_range(first_day, periods=days, freq="D").strftime("%d-%m-%Y").to_numpy(dtype=object)
+    for chunk_no, start in enumerate(range(0, rows, GENERATOR_CHUNK_ROWS)):
+        rng = np.random.default_rng([seed, chunk_no])
+        n = min(GENERATOR_CHUNK_ROWS, rows - start)
+        picks = rng.choice(len(profile.weights), size=n, p=profile.weights)
+        amounts = rng.integers(profile.low[picks], profile.high[picks], endpoint=True)
+
+        descriptions = pd.Series(profile.descriptions[picks])
+        suffixed = rng.random(n) < unique_fraction
+        references = pd.Series(rng.integers(10_000, 100_000, size=n)).astype(str)
+        descriptions = descriptions.where(~suffixed, descriptions + " #" + references)
+
+        categories = pd.Series(profile.categories[picks])
+        categories = categories.where(rng.random(n) >= uncategorized_fraction, "")
+
+        # Chronological: row i falls on day floor(i * days / rows)
+        day_offsets = (np.arange(start, start + n, dtype=np.int64) * days) // rows
+        frame = pd.DataFrame({
+            "date": day_labels[day_offsets],
+            "description": descriptions,
+            "amount": amounts,
+            "category": categories,
+        })
+        # Split to at most chunk_rows rows; the row stream is the same for any chunk size
+        for offset in range(0, n, chunk_rows):
+            yield frame.iloc[offset:offset + chunk_rows].reset_index(drop=True)
+
+
+def generate_frame(rows: int, seed: int = 0, **options) -> pd.DataFrame:
+    return pd.concat(list(generate_chunks(rows, seed, **options)), ignore_index=True)
+
+
+def write_csv(path, rows: int, seed: int = 0, **options) -> Path:
+    path = Path(path)
+    with open(path, "w", newline="") as out:
+        for i, chunk in enumerate(generate_chunks(rows, seed, **options)):
+            chunk.to_csv(out, header=i == 0, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    written = write_csv(sys.argv[2], int(sys.argv[1]), seed=int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    print(f"{written} ({written.stat().st_size / 2**20:.1f} MiB)")
@@ -1,18 +1,28 @@
-import React, { useEffect, useState } from 'react'
+import React, { useEffect, useRef, useState } from 'react'
 import Uploader from './components/Uploader'
 import Chat from './components/Chat'
 import Charts from './components/Charts'
 import {
-  getByCategory,
-  getTopMerchants,
-  getMonthlyTotals,
-  getCategoryPieChart,
-  getMonthlyTrendChart,
-  getIncomeVsExpenses,
-  getTopMerchantsByTotal,
-  getTopMerchantsBySingle
+  getDashboard, subscribeToChanges, getByCategory, getTopMerchants, getMonthlyTotals, getCategoryPieChart,
+  getMonthlyTrendChart, getIncomeVsExpenses, getTopMerchantsByTotal, getTopMerchantsBySingle
 } from './api'
 
+// Single-chart requests by /dashboard key, which is also the aggregate name the change feed reports
+const CHART_FETCHERS = {
+  by_category: getByCategory,
+  top_merchants: () => getTopMerchants(5),
+  monthly_totals: getMonthlyTotals,
+  category_pie: getCategoryPieChart,
+  monthly_trend: getMonthlyTrendChart,
+  income_vs_expenses: getIncomeVsExpenses,
+  top_merchants_by_total: () => getTopMerchantsByTotal(10),
+  top_merchants_by_single: () => getTopMerchantsBySingle(10),
+}
+// Above this many changed charts one /dashboard request is cheaper than one request each
+const MAX_SINGLE_CHART_FETCHES = 2
+// Changes arriving this close together (e.g. the chunks of a streaming upload) cause one refetch
+const CHANGE_DEBOUNCE_MS = 300
+
 export default function App() {
   const [byCategory, setByCategory] = useState([])
   const [topMerchants, setTopMerchants] = useState([])
@@ -22,52 +32,70 @@ export default function App() {
   const [incomeVsExpenses, setIncomeVsExpenses] = useState(null)
   const [topMerchantsByTotal, setTopMerchantsByTotal] = useState(null)
   const [topMerchantsBySingle, setTopMerchantsBySingle] = useState(null)
+  // True while the change feed is connected; uploads then refresh through it
+  const live = useRef(false)
+
+  const setters = {
+    by_category: setByCategory,
+    top_merchants: setTopMerchants,
+    monthly_totals: setMonthlyTotals,
+    category_pie: setCategoryPie,
+    monthly_trend: setMonthlyTrend,
+    income_vs_expenses: setIncomeVsExpenses,
+    top_merchants_by_total: setTopMerchantsByTotal,
+    top_merchants_by_single: setTopMerchantsBySingle,
+  }
 
   const refresh = async () => {
     try {
-      const [
-        byCat,
-        merchants,
-        monthly,
-        pie,
-        trend,
-        incomeVsExp,
-        merchantsByTotal,
-        merchantsBySingle
-      ] = await Promise.all([
-        getByCategory(),
-        getTopMerchants(),
-        getMonthlyTotals(),
-        getCategoryPieChart(),
-        getMonthlyTrendChart(),
-        getIncomeVsExpenses(),
-        getTopMerchantsByTotal(),
-        getTopMerchantsBySingle()
-      ])
-
-      setByCategory(byCat)
-      setTopMerchants(merchants)
-      setMonthlyTotals(monthly)
-      setCategoryPie(pie)
-      setMonthlyTrend(trend)
-      setIncomeVsExpenses(incomeVsExp)
-      setTopMerchantsByTotal(merchantsByTotal)
-      setTopMerchantsBySingle(merchantsBySingle)
+      // One request computes every chart from the same data snapshot
+      const dashboard = await getDashboard()
+      Object.entries(setters).forEach(([key, set]) => set(dashboard[key]))
     } catch (err) {
       console.error("Error refreshing data:", err)
     }
   }
 
-  // Load data once at startup
-  useEffect(() => { refresh() }, [])
+  const refreshCharts = async (keys) => {
+    if (keys.length > MAX_SINGLE_CHART_FETCHES) return refresh()
+    try {
+      await Promise.all(keys.map(async (key) => setters[key](await CHART_FETCHERS[key]())))
+    } catch (err) {
+      console.error("Error refreshing charts:", err)
+    }
+  }
+
+  // Load data once at startup, then refetch only the charts the change feed reports
+  useEffect(() => {
+    refresh()
+    let pending = new Set()
+    let timer = null
+    const unsubscribe = subscribeToChanges(
+      (change) => {
+        change.aggregates.filter((key) => key in CHART_FETCHERS).forEach((key) => pending.add(key))
+        if (pending.size === 0 || timer) return
+        timer = setTimeout(() => {
+          const keys = [...pending]
+          pending = new Set()
+          timer = null
+          refreshCharts(keys)
+        }, CHANGE_DEBOUNCE_MS)
+      },
+      (connected) => { live.current = connected }
+    )
+    return () => {
+      clearTimeout(timer)
+      unsubscribe()
+    }
+  }, [])
 
   return (
     <div style={{ maxWidth: 960, margin: '0 auto', padding: 16, fontFamily: 'system-ui, sans-serif' }}>
       <h1>AI-Powered Personal Finance Chatbot</h1>
       <p style={{ color: '#666' }}>Upload your transactions CSV, see insights, and ask questions.</p>
 
-      {/* Upload CSV and auto-refresh data */}
-      <Uploader onUploaded={refresh} />
+      {/* Upload CSV; the change feed refreshes the charts, or this callback if it is down */}
+      <Uploader onUploaded={() => { if (!live.current) refresh() }} />
 
       <h2>Summaries</h2>
       <Charts
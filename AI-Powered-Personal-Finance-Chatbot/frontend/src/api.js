@@ -1,36 +1,42 @@
 const API_BASE = "http://localhost:8000";
 
+// Last ETag and payload per GET url. The backend tags summary, visualization and
+// dashboard responses with the data version, so a 304 means the cached payload is current.
+const etagCache = new Map();
+
 // A generic helper function to reduce repetition and improve error handling
 async function fetchData(endpoint, options = {}) {
   try {
-    let url = `${API_BASE}${endpoint}`;
+    const url = `${API_BASE}${endpoint}`;
     const finalOptions = { ...options }; // Create a mutable copy of options
 
-    // --- AGGRESSIVE CACHE-BUSTING LOGIC START ---
     const method = finalOptions.method || 'GET';
-    if (method.toUpperCase() === 'GET') {
-      // 1. Add unique timestamp to URL
-      const separator = url.includes('?') ? '&' : '?';
-      url += `${separator}_=${new Date().getTime()}`;
-
-      // 2. Add explicit no-cache headers to the request
-      finalOptions.headers = {
-        ...finalOptions.headers,
-        'Cache-Control': 'no-cache, no-store, must-revalidate',
-        'Pragma': 'no-cache',
-        'Expires': '0',
-      };
+    const isGet = method.toUpperCase() === 'GET';
+    const cached = isGet ? etagCache.get(url) : undefined;
+    if (isGet) {
+      // Revalidate with the server instead of cache-busting; we keep our own copy
+      finalOptions.cache = 'no-store';
+      if (cached) {
+        finalOptions.headers = { ...finalOptions.headers, 'If-None-Match': cached.etag };
+      }
     }
-    // --- AGGRESSIVE CACHE-BUSTING LOGIC END ---
 
     const res = await fetch(url, finalOptions);
+    if (res.status === 304 && cached) {
+      return cached.data;
+    }
     if (!res.ok) {
       console.error(`HTTP error! status: ${res.status} for endpoint: ${endpoint}`);
       throw new Error(`HTTP error! status: ${res.status}`);
     }
     const contentType = res.headers.get("content-type");
     if (contentType && contentType.indexOf("application/json") !== -1) {
-        return res.json();
+        const data = await res.json();
+        const etag = res.headers.get("ETag");
+        if (isGet && etag) {
+          etagCache.set(url, { etag, data });
+        }
+        return data;
     }
     return;
 
@@ -41,15 +47,30 @@ async function fetchData(endpoint, options = {}) {
 }
 
 
-export async function uploadCsv(file) {
+// mode: "replace" swaps out all data, "append" adds only rows not stored yet
+export async function uploadCsv(file, mode = "replace") {
   const fd = new FormData();
   fd.append("file", file);
-  return fetchData('/upload_csv', {
+  return fetchData(`/upload_csv?mode=${mode}`, {
     method: "POST",
     body: fd
   });
 }
 
+// Streaming upload for large files: returns a job id to poll with getUploadStatus
+export async function uploadCsvStream(file, mode = "replace") {
+  const fd = new FormData();
+  fd.append("file", file);
+  return fetchData(`/upload_csv/stream?mode=${mode}`, {
+    method: "POST",
+    body: fd
+  });
+}
+
+export function getUploadStatus(jobId) {
+  return fetchData(`/upload/${jobId}/status`);
+}
+
 export function getByCategory() {
   return fetchData('/summary/by_category');
 }
@@ -86,6 +107,14 @@ export async function getIncomeVsExpenses() {
   }
 }
 
+// All dashboard payloads (summaries, charts and alerts) in one round trip
+export function getDashboard(startDate, endDate) {
+  const params = startDate && endDate
+    ? `?start_date=${encodeURIComponent(startDate)}&end_date=${encodeURIComponent(endDate)}`
+    : '';
+  return fetchData(`/dashboard${params}`);
+}
+
 export function setBudget(category, monthly_budget) {
   return fetchData(`/budgets?category=${encodeURIComponent(category)}&monthly_budget=${monthly_budget}`, {
     method: "POST"
@@ -114,6 +143,21 @@ export function chat(question) {
   });
 }
 
+// Live change feed: calls onChange({ reason, aggregates, version, ... }) for every
+// upload, clear, budget change or model swap of the session, and onStatus(true/false)
+// as the connection opens and drops. EventSource reconnects by itself and the
+// server replays missed events. Returns a function that closes the stream.
+export function subscribeToChanges(onChange, onStatus = () => {}, sessionId = 'default') {
+  const source = new EventSource(`${API_BASE}/events?session_id=${encodeURIComponent(sessionId)}`);
+  const handler = (event) => onChange(JSON.parse(event.data));
+  source.addEventListener('data_version', handler);
+  // Sent when missed events could not be replayed; it names every aggregate
+  source.addEventListener('resync', handler);
+  source.onopen = () => onStatus(true);
+  source.onerror = () => onStatus(false);
+  return () => source.close();
+}
+
 export async function checkServerStatus() {
   try {
     const res = await fetch(`${API_BASE}/`);
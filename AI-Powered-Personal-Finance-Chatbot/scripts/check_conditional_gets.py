@@ -0,0 +1,75 @@
+"""Check that cached read endpoints answer a repeated request with 304 Not Modified.
+
+Seeds a throwaway database from expenses_one_year.csv and requests every
+path below twice, the second time with the first response's ETag in
+If-None-Match, which must come back 304 without a body. After an append
+changes the data, the old ETag must get a full 200 response again. Any
+other status is printed and the script exits non-zero.
+
+Run from the project folder:
+    python scripts/check_conditional_gets.py
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+SAMPLE_CSV = PROJECT_DIR.parent / "expenses_one_year.csv"
+
+os.chdir(tempfile.mkdtemp(prefix="conditional_gets_"))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend import main  # noqa: E402
+
+CACHED_PATHS = [
+    "/dashboard",
+    "/dashboard?start_date=01-03-2024&end_date=31-05-2024",
+    "/summary/by_category",
+    "/visualization/category_pie",
+    "/analytics/category_growth",
+]
+
+
+def upload(client: TestClient, csv: bytes, mode: str):
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.post("/upload_csv", params={"mode": mode}, files={"file": ("sample.csv", csv, "text/csv")})
+
+
+def main_check() -> int:
+    client = TestClient(main.app)
+    csv = SAMPLE_CSV.read_bytes()
+    upload(client, csv, "replace")
+    failures = []
+
+    etags = {}
+    for path in CACHED_PATHS:
+        first = client.get(path)
+        etag = first.headers.get("etag")
+        if first.status_code != 200 or not etag:
+            failures.append(f"{path}: first request {first.status_code}, ETag {etag!r}")
+            continue
+        etags[path] = etag
+        second = client.get(path, headers={"If-None-Match": etag})
+        if second.status_code != 304 or second.content:
+            failures.append(f"{path}: repeated request {second.status_code} with {len(second.content)} body bytes")
+
+    # A new year of the same statement: every aggregate changes
+    upload(client, csv.replace(b"-2024,", b"-2025,"), "append")
+    for path, etag in etags.items():
+        after = client.get(path, headers={"If-None-Match": etag})
+        if after.status_code != 200:
+            failures.append(f"{path}: {after.status_code} for the old ETag after an append")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print(f"{len(CACHED_PATHS)} cached paths checked, {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,160 @@
+"""Check that sessions stored before partitioning keep their data.
+
+Seeds a throwaway database the way the original /session/{id}/upload left
+it: the session's transactions only as a JSON payload on user_sessions. A
+second session has a payload and newer rows of its own. After startup moves
+the payloads into the transactions table, the first session must report the
+same analytics the original payload endpoint computed, the second must keep
+its own rows, both must be listed with data and no payload may be left.
+
+Then payloads are stored on two more sessions after startup, as a worker
+still running older code would, and the whole sample CSV is appended to
+them through /upload_csv and /upload_csv/stream. The payload's rows must be
+kept and count as duplicates, so each session ends up with every row once.
+Any difference is printed and the script exits non-zero.
+
+Run from the project folder:
+    python scripts/check_legacy_sessions.py
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+SAMPLE_CSV = PROJECT_DIR.parent / "expenses_one_year.csv"
+
+os.chdir(tempfile.mkdtemp(prefix="legacy_sessions_"))
+sys.path.insert(0, str(PROJECT_DIR))
+
+import pandas as pd  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend import main  # noqa: E402
+from backend.db import SessionLocal, engine  # noqa: E402
+from backend.models import Base, UserSession, upgrade_schema  # noqa: E402
+
+LEGACY_ROWS = 700
+NEWER_ROWS = 28
+APPENDS = {"late": "/upload_csv", "late-stream": "/upload_csv/stream"}
+
+
+def legacy_payload(raw: pd.DataFrame) -> str:
+    """transactions_data as the original session upload stored it"""
+    df = raw.copy()
+    df['date'] = df['date'].apply(main.parse_csv_date)
+    df['category'] = df['category'].fillna("Uncategorized").apply(main.normalize_category)
+    df['merchant'] = df['description'].fillna("").apply(main.extract_merchant)
+    df['amount'] = pd.to_numeric(df['amount'], errors="coerce")
+    return df.dropna(subset=["amount", "date"]).to_json()
+
+
+def legacy_analytics(payload: str) -> dict:
+    """The original /session/{id}/analytics, computed from the payload"""
+    df = pd.read_json(io.StringIO(payload))
+    monthly = df.groupby(df['date'].dt.to_period('M'))['amount'].sum().reset_index()
+    monthly['date'] = monthly['date'].astype(str)
+    return {
+        "summary": {
+            "total_income": float(df[df['amount'] > 0]['amount'].sum()),
+            "total_expenses": float(df[df['amount'] < 0]['amount'].sum()),
+            "net_balance": float(df['amount'].sum()),
+            "transaction_count": len(df),
+        },
+        "by_category": df.groupby('category')['amount'].sum().reset_index().to_dict('records'),
+        "by_month": monthly.to_dict('records'),
+    }
+
+
+def seed(raw: pd.DataFrame) -> str:
+    """Write both sessions before startup runs; returns the first session's payload"""
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    payload = legacy_payload(raw.head(LEGACY_ROWS))
+    newer = main.normalize_transactions_frame(raw.tail(NEWER_ROWS).copy())
+    with SessionLocal() as db:
+        db.add(UserSession(session_id="legacy", session_name="Legacy", transactions_data=payload))
+        db.add(UserSession(session_id="rewritten", session_name="Rewritten", transactions_data=payload))
+        main.bulk_insert_transactions(db, newer, session_id="rewritten")
+        db.commit()
+    return payload
+
+
+def differences(name: str, expected: dict, actual: dict) -> list:
+    found = []
+    for key, value in expected["summary"].items():
+        if round(actual["summary"][key], 2) != round(value, 2):
+            found.append(f"{name} {key}: expected {value}, got {actual['summary'][key]}")
+    for part, label in (("by_category", "category"), ("by_month", "date")):
+        want = {row[label]: round(row["amount"], 2) for row in expected[part]}
+        got = {row[label]: round(row["amount"], 2) for row in actual[part]}
+        if want != got:
+            found.append(f"{name} {part}: expected {want}, got {got}")
+    return found
+
+
+def store_late_payloads(payload: str):
+    with SessionLocal() as db:
+        for session_id in APPENDS:
+            db.add(UserSession(session_id=session_id, session_name=session_id, transactions_data=payload))
+        db.commit()
+
+
+def append_sample(client: TestClient, session_id: str) -> dict:
+    with open(SAMPLE_CSV, "rb") as f, contextlib.redirect_stdout(io.StringIO()):
+        response = client.post(
+            APPENDS[session_id], params={"mode": "append", "session_id": session_id},
+            files={"file": ("sample.csv", f, "text/csv")},
+        ).json()
+    if "status_url" in response:
+        # The TestClient runs the streaming job's background task before returning
+        job = client.get(response["status_url"]).json()
+        return {"inserted": job["rows_processed"], "duplicates": job["duplicates"]}
+    return response
+
+
+def main_check() -> int:
+    raw = pd.read_csv(SAMPLE_CSV)
+    raw.columns = [c.strip().lower() for c in raw.columns]
+    payload = seed(raw)
+    failures = []
+
+    with contextlib.redirect_stderr(io.StringIO()), TestClient(main.app) as client:
+        expected = legacy_analytics(payload)
+        failures += differences("legacy", expected, client.get("/session/legacy/analytics").json())
+
+        rewritten = client.get("/session/rewritten/analytics").json()["summary"]["transaction_count"]
+        if rewritten != NEWER_ROWS:
+            failures.append(f"rewritten: expected its {NEWER_ROWS} rows, got {rewritten}")
+
+        listed = {s["session_id"]: s["has_data"] for s in client.get("/sessions").json()}
+        for session_id in ("legacy", "rewritten"):
+            if not listed.get(session_id):
+                failures.append(f"{session_id}: not listed with data ({listed})")
+
+        store_late_payloads(payload)
+        for session_id in APPENDS:
+            result = append_sample(client, session_id)
+            if (result.get("inserted"), result.get("duplicates")) != (len(raw) - LEGACY_ROWS, LEGACY_ROWS):
+                failures.append(
+                    f"{session_id}: expected {len(raw) - LEGACY_ROWS} inserted and {LEGACY_ROWS} duplicates, got {result}"
+                )
+            count = client.get(f"/session/{session_id}/analytics").json()["summary"]["transaction_count"]
+            if count != len(raw):
+                failures.append(f"{session_id}: expected {len(raw)} rows after the append, got {count}")
+
+    with SessionLocal() as db:
+        left = db.query(UserSession.session_id).filter(main.HAS_SESSION_PAYLOAD).all()
+    if left:
+        failures.append(f"payloads left after startup and appends: {[s for (s,) in left]}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print(f"{LEGACY_ROWS}-row legacy sessions checked at startup and on append, {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
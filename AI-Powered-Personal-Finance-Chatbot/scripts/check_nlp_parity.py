@@ -0,0 +1,256 @@
+"""Check that the compiled chat matcher gives the same answers as the original substring scans.
+
+The original normalize_category / extract_category / parse_topn /
+classify_intent / time-phrase checks are kept below verbatim as the
+reference. A corpus of chat questions built from every alias, keyword and
+time phrase, plus random word salads drawn from the same vocabulary, is run
+through both and any difference is printed; the script exits non-zero on a
+mismatch.
+
+The time expressions added since (ranges, "last N days", months, quarters,
+years) are checked separately against a table of expected windows, and the
+original phrases are resolved against the original window code for every day
+of a few years.
+
+Run from the project folder:
+    python scripts/check_nlp_parity.py
+"""
+import random
+import re
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend import nlp  # noqa: E402
+
+# --- Reference implementation (main.py before the compiled matcher) ---
+LEGACY_ALIASES = {
+    "food": ["food", "dining", "groceries", "restaurant", "cafe", "meal", "grocery", "snacks", "dinner", "lunch", "breakfast", "ccd"],
+    "transport": ["transport", "transportation", "uber", "ola", "cab", "taxi", "fuel", "bus", "train", "metro", "petrol", "ride"],
+    "shopping": ["shopping", "amazon", "flipkart", "myntra", "mall", "store", "clothing", "electronics", "purchase", "online"],
+    "bills": ["bills", "utilities", "electricity", "wifi", "phone", "internet", "rent", "water", "mobile", "recharge", "bill", "gas"],
+    "health": ["health", "doctor", "hospital", "pharmacy", "medicine", "healthcare", "gym", "dental"],
+    "entertainment": ["entertainment", "movies", "cinema", "netflix", "game", "concert", "pvr", "ticket", "subscription", "movie", "bowling"],
+    "education": ["education", "school", "college", "tuition", "course", "udemy", "book", "certification"],
+    "investment": ["investment", "stocks", "mutual fund", "dividend", "sip"],
+    "income": ["salary", "income", "freelance", "bonus", "deposit", "payment"]
+}
+
+
+def legacy_normalize_category(text: str) -> str:
+    if not text:
+        return "Uncategorized"
+    t = text.strip().lower()
+    for k, vals in LEGACY_ALIASES.items():
+        if t == k or any(v in t for v in vals):
+            return k.capitalize()
+    return t.capitalize()
+
+
+def legacy_extract_category(q: str) -> Optional[str]:
+    ql = q.lower()
+    for k, vals in LEGACY_ALIASES.items():
+        if k in ql or any(v in ql for v in vals):
+            return k.capitalize()
+    if any(word in ql for word in ["food", "restaurant", "grocery", "dinner", "lunch", "snack"]):
+        return "Food"
+    if any(word in ql for word in ["movie", "netflix", "concert", "entertain"]):
+        return "Entertainment"
+    if any(word in ql for word in ["shopping", "amazon", "mall", "store"]):
+        return "Shopping"
+    if any(word in ql for word in ["transport", "petrol", "metro", "uber"]):
+        return "Transport"
+    if any(word in ql for word in ["bill", "electricity", "water", "mobile"]):
+        return "Bills"
+    return None
+
+
+def legacy_parse_topn(q: str, default: int = 3) -> int:
+    m = re.search(r"(top|biggest|highest)\s*(\d+)", q.lower())
+    return int(m.group(2)) if m else default
+
+
+def legacy_classify_intent(q: str) -> str:
+    ql = q.lower()
+    if any(word in ql for word in ["how much", "spent", "spend", "expense", "total", "amount"]) and legacy_extract_category(ql):
+        return "sum_by_category"
+    if "growing" in ql or "trend" in ql or "increase" in ql:
+        return "fastest_growing_category"
+    if any(word in ql for word in ["biggest", "top", "highest", "largest"]) and any(word in ql for word in ["expense", "spend", "purchase"]):
+        return "top_expenses"
+    if any(word in ql for word in ["list", "show", "what are", "which"]):
+        return "list_transactions"
+    if any(word in ql for word in ["alert", "overspend", "budget", "limit"]):
+        return "spending_alerts"
+    return "fallback"
+
+
+def legacy_time_phrase(q: str) -> Optional[str]:
+    ql = q.lower()
+    for phrase in ["last month", "this month", "this week", "last week"]:
+        if phrase in ql:
+            return phrase
+    return None
+
+
+def legacy_time_window(phrase: str, today: date):
+    if phrase == "last month":
+        if today.month == 1:
+            last_month = 12
+            year = today.year - 1
+        else:
+            last_month = today.month - 1
+            year = today.year
+        start = date(year, last_month, 1)
+        if last_month == 12:
+            end = date(year + 1, 1, 1) - timedelta(days=1)
+        else:
+            end = date(year, last_month + 1, 1) - timedelta(days=1)
+        return start, end
+    if phrase == "this month":
+        start = today.replace(day=1)
+        if start.month == 12:
+            end = date(start.year + 1, 1, 1) - timedelta(days=1)
+        else:
+            end = date(start.year, start.month + 1, 1) - timedelta(days=1)
+        return start, end
+    if phrase == "this week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if phrase == "last week":
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=6)
+    return None, None
+
+
+def legacy_answers(q: str):
+    return (legacy_classify_intent(q), legacy_extract_category(q), legacy_parse_topn(q), legacy_time_phrase(q))
+
+
+def compiled_answers(q: str):
+    entities = nlp.analyze_question(q)
+    top_n = 3 if entities.top_n is None else entities.top_n
+    # Only the original phrases existed before; other time expressions are new
+    spec = entities.time_spec
+    phrase = spec[1] if spec is not None and spec[0] == "phrase" else None
+    return (entities.intent, entities.category, top_n, phrase)
+
+
+# --- Extended time expressions: (question, reference day, expected window) ---
+REFERENCE = date(2024, 8, 20)
+TIME_CASES = [
+    ("spent on food in the last 10 days", REFERENCE, (date(2024, 8, 11), date(2024, 8, 20))),
+    ("past 2 weeks", REFERENCE, (date(2024, 8, 7), date(2024, 8, 20))),
+    ("last 3 months of shopping", REFERENCE, (date(2024, 6, 1), date(2024, 8, 20))),
+    ("previous 1 year", REFERENCE, (date(2024, 1, 1), date(2024, 8, 20))),
+    ("last 3 months", date(2024, 2, 10), (date(2023, 12, 1), date(2024, 2, 10))),
+    ("food in march", REFERENCE, (date(2024, 3, 1), date(2024, 3, 31))),
+    ("food in december", REFERENCE, (date(2023, 12, 1), date(2023, 12, 31))),
+    ("bills for feb 2024", REFERENCE, (date(2024, 2, 1), date(2024, 2, 29))),
+    ("what did I spend in may", REFERENCE, (date(2024, 5, 1), date(2024, 5, 31))),
+    ("may 2023 rent", REFERENCE, (date(2023, 5, 1), date(2023, 5, 31))),
+    ("may I see my expenses", REFERENCE, (None, None)),
+    ("q1", REFERENCE, (date(2024, 1, 1), date(2024, 3, 31))),
+    ("top 5 expenses in q4", REFERENCE, (date(2023, 10, 1), date(2023, 12, 31))),
+    ("q3 2023", REFERENCE, (date(2023, 7, 1), date(2023, 9, 30))),
+    ("this quarter", REFERENCE, (date(2024, 7, 1), date(2024, 9, 30))),
+    ("last quarter", date(2024, 2, 1), (date(2023, 10, 1), date(2023, 12, 31))),
+    ("this year", REFERENCE, (date(2024, 1, 1), date(2024, 12, 31))),
+    ("last year", REFERENCE, (date(2023, 1, 1), date(2023, 12, 31))),
+    ("total in 2023", REFERENCE, (date(2023, 1, 1), date(2023, 12, 31))),
+    ("from 2024-01-05 to 2024-02-10", REFERENCE, (date(2024, 1, 5), date(2024, 2, 10))),
+    ("between 10/03/2024 and 01/03/2024", REFERENCE, (date(2024, 3, 1), date(2024, 3, 10))),
+    ("since 2024-08-01", REFERENCE, (date(2024, 8, 1), date(2024, 8, 20))),
+    ("from jan to mar", REFERENCE, (date(2024, 1, 1), date(2024, 3, 31))),
+    ("from nov to feb 2024", REFERENCE, (date(2023, 11, 1), date(2024, 2, 29))),
+    ("between oct 2022 and jan 2023", REFERENCE, (date(2022, 10, 1), date(2023, 1, 31))),
+    # A range beats a fixed phrase, and a fixed phrase beats a bare year
+    ("from 2024-01-01 to 2024-01-31, not last month", REFERENCE, (date(2024, 1, 1), date(2024, 1, 31))),
+    ("last month of 2023", REFERENCE, (date(2024, 7, 1), date(2024, 7, 31))),
+    ("laptop 7", REFERENCE, (None, None)),
+]
+
+
+def time_mismatches():
+    found = []
+    for question, reference, expected in TIME_CASES:
+        actual = nlp.resolve_time_window(nlp.analyze_question(question).time_spec, reference)
+        if actual != expected:
+            found.append((question, expected, actual))
+    day = date(2022, 1, 1)
+    while day < date(2025, 1, 1):
+        for phrase in nlp.TIME_PHRASES:
+            actual = nlp.resolve_time_window(nlp.analyze_question(f"spend {phrase}").time_spec, day)
+            if actual != legacy_time_window(phrase, day):
+                found.append((f"{phrase} @ {day}", legacy_time_window(phrase, day), actual))
+        day += timedelta(days=1)
+    return found
+
+
+# --- Corpus ---
+TEMPLATES = [
+    "how much did I spend on {term} {time}",
+    "show my {term} transactions {time}",
+    "top {n} {term} expenses {time}",
+    "what are my biggest{n} purchases on {term}",
+    "which {term} category is growing the fastest?",
+    "total amount spent at {term}",
+    "any budget alerts for {term}?",
+    "list everything {time}",
+    "highest {n} payments {time}",
+    "Did I overspend on {term} {time}?",
+    "{term}",
+    "hello there",
+]
+TIMES = ["last month", "this month", "this week", "last week", "", "in 2024"]
+EXTRA_WORDS = [
+    "snack", "entertain", "chocolate", "override", "gossip", "business", "vocabulary", "parent",
+    "facebook", "vegas", "laptop 7", "stopwatch", "Groceries", "RENT", "trending", "limits",
+]
+
+
+def vocabulary():
+    words = {w for name, aliases in LEGACY_ALIASES.items() for w in [name] + aliases}
+    words |= {w for _, ws in nlp.CATEGORY_FALLBACKS for w in ws}
+    words |= {w for ws in nlp.INTENT_KEYWORDS.values() for w in ws}
+    words |= set(nlp.TIME_PHRASES) | set(EXTRA_WORDS)
+    return sorted(words)
+
+
+def build_corpus(random_questions: int = 5000, seed: int = 7):
+    words = vocabulary()
+    rng = random.Random(seed)
+    corpus = [
+        template.format(term=term, time=time, n=rng.choice(["", " 5", "10", " 3"]))
+        for template in TEMPLATES for term in words for time in TIMES
+    ]
+    for _ in range(random_questions):
+        picked = rng.sample(words, rng.randint(1, 5))
+        glue = rng.choice([" ", "", "-", " and "])
+        corpus.append(glue.join(picked))
+    return corpus
+
+
+def main() -> int:
+    corpus = build_corpus()
+    mismatches = [(q, legacy_answers(q), compiled_answers(q)) for q in corpus if legacy_answers(q) != compiled_answers(q)]
+    categories = vocabulary() + ["", "  Food ", "Uncategorized", "misc", "Dining Out", "utilities/water"]
+    mismatches += [
+        (c, legacy_normalize_category(c), nlp.normalize_category(c))
+        for c in categories if legacy_normalize_category(c) != nlp.normalize_category(c)
+    ]
+    mismatches += time_mismatches()
+    for question, expected, actual in mismatches[:20]:
+        print(f"MISMATCH {question!r}: expected {expected}, got {actual}")
+    print(
+        f"{len(corpus)} questions, {len(categories)} category labels and {len(TIME_CASES)} time expressions checked, "
+        f"{len(mismatches)} mismatches"
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Check that the vectorized upload normalization matches the original per-row path.
+
+normalize_transactions_frame parses dates, normalizes categories and
+extracts merchants column-wise. The reference below is the original upload
+code: parse_csv_date, normalize_category and extract_merchant applied row by
+row with .apply, then the same numeric amount coercion and dropna. Both run
+on expenses_one_year.csv and on a small frame of edge cases (mixed date
+formats and separators, blank and missing values, punctuation-only
+descriptions, unparseable amounts); any differing column is printed and the
+script exits non-zero.
+
+Run from the project folder:
+    python scripts/check_normalize_parity.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from backend import main as backend  # noqa: E402
+
+SAMPLE_CSV = Path(__file__).resolve().parents[2] / "expenses_one_year.csv"
+
+EDGE_CASES = pd.DataFrame({
+    "date": ["01-02-2024", "2024-02-03", "02/14/2024", "05/03/24", " 07-08-2024 ", "2024/12/31", "31-12-2023", "13-13-13"],
+    "description": ["Uber ride #123", "  ", None, "!!!", "AMAZON.IN order", "Netflix", "Rent - March", "Salary"],
+    "amount": ["-250", "100.5", "abc", "-99", None, "-499", "-15000", "50000"],
+    "category": ["Transport", None, "", "  food ", "SHOPPING", "Entertainment", "rent", "Income"],
+})
+
+
+def per_row(df: pd.DataFrame) -> pd.DataFrame:
+    """upload_csv before vectorization"""
+    df['date'] = df['date'].apply(backend.parse_csv_date)
+    df['category'] = df['category'].fillna("Uncategorized").apply(backend.normalize_category)
+    df['merchant'] = df['description'].fillna("").apply(backend.extract_merchant)
+    df['amount'] = pd.to_numeric(df['amount'], errors="coerce")
+    return df.dropna(subset=["amount", "date"])
+
+
+def mismatches(name: str, raw: pd.DataFrame) -> list:
+    raw.columns = [c.strip().lower() for c in raw.columns]
+    expected = per_row(raw.copy())
+    actual = backend.normalize_transactions_frame(raw.copy())
+    if not expected.index.equals(actual.index):
+        return [f"{name}: kept rows differ ({len(expected)} per row, {len(actual)} vectorized)"]
+    found = []
+    for column in expected.columns:
+        same = (expected[column] == actual[column]) | (expected[column].isna() & actual[column].isna())
+        for row in np.flatnonzero(~same.to_numpy())[:5]:
+            found.append(
+                f"{name} row {expected.index[row]} {column}: "
+                f"expected {expected[column].iloc[row]!r}, got {actual[column].iloc[row]!r}"
+            )
+    return found
+
+
+def main() -> int:
+    found = mismatches(SAMPLE_CSV.name, pd.read_csv(SAMPLE_CSV)) + mismatches("edge cases", EDGE_CASES.copy())
+    for line in found[:20]:
+        print(f"MISMATCH {line}")
+    print(f"{SAMPLE_CSV.name} and {len(EDGE_CASES)} edge cases checked, {len(found)} mismatches")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
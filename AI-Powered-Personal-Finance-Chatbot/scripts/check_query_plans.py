@@ -0,0 +1,122 @@
+"""Check that every summary, dashboard and chat query reads transactions through an index.
+
+Seeds a throwaway database from expenses_one_year.csv, calls the read
+endpoints, chat intents and the rollup rebuild query, captures each SELECT
+they send to SQLite (sync engines and the async read engine alike) and runs
+EXPLAIN QUERY PLAN on it. Any plan step that scans the transactions table
+without an index is reported and the script exits non-zero. It also fails
+when fewer than MIN_DISTINCT_QUERIES distinct queries were captured, so a
+read path the listeners no longer see cannot make the check pass vacuously.
+
+Run from the project folder:
+    python scripts/check_query_plans.py
+"""
+import contextlib
+import io
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parents[1]
+SAMPLE_CSV = PROJECT_DIR.parent / "expenses_one_year.csv"
+
+os.chdir(tempfile.mkdtemp(prefix="query_plans_"))
+sys.path.insert(0, str(PROJECT_DIR))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from backend import main  # noqa: E402
+from backend.db import async_read_engine, engine, read_engine, ReadSessionLocal  # noqa: E402
+from backend.rollups import grouped_transactions_select  # noqa: E402
+
+READ_REQUESTS = [
+    "/summary/by_category",
+    "/summary/by_category?start_date=01-03-2024&end_date=31-05-2024",
+    "/summary/by_category?start_date=03-03-2024&end_date=20-05-2024",
+    "/summary/top_merchants",
+    "/summary/top_merchants?start_date=03-03-2024&end_date=20-05-2024",
+    "/summary/monthly_totals",
+    "/visualization/category_pie",
+    "/visualization/monthly_trend",
+    "/visualization/top_merchants_by_total_spending",
+    "/visualization/top_merchants_by_single_payment",
+    "/visualization/income_vs_expenses",
+    "/dashboard",
+    "/dashboard?start_date=03-03-2024&end_date=20-05-2024",
+    "/spending-alerts",
+]
+CHAT_QUESTIONS = [
+    "How much did I spend on food last month?",
+    "How much did I spend on transport?",
+    "Top 5 expenses this month",
+    "What are my biggest expenses?",
+    "Show my shopping transactions last week",
+    "List transactions",
+    "Any budget alerts?",
+    "Entertainment",
+]
+TABLE_STEP = re.compile(r"\b(SCAN|SEARCH) transactions\b")
+# Distinct transactions queries the requests above produced when this check was last updated
+MIN_DISTINCT_QUERIES = 15
+
+
+def capture_selects():
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "transactions" in statement:
+            captured.append((statement, parameters))
+
+    targets = {engine, read_engine}
+    if async_read_engine is not None:
+        # Async reads run their statements through the sync engine inside the AsyncEngine
+        targets.add(async_read_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", record)
+    return captured
+
+
+def main_check() -> int:
+    client = TestClient(main.app)
+    with open(SAMPLE_CSV, "rb") as f, contextlib.redirect_stdout(io.StringIO()):
+        client.post("/upload_csv", files={"file": ("sample.csv", f, "text/csv")})
+
+    captured = capture_selects()
+    for path in READ_REQUESTS:
+        main.response_cache.clear()
+        client.get(path)
+    for question in CHAT_QUESTIONS:
+        client.post("/chat", json={"question": question})
+    # Full rollup rebuild (startup backfill)
+    with ReadSessionLocal() as db:
+        db.execute(grouped_transactions_select()).all()
+
+    db_path = engine.url.database
+    conn = sqlite3.connect(db_path)
+    conn.execute("ANALYZE")
+    failures = 0
+    seen = set()
+    for statement, parameters in captured:
+        if statement in seen:
+            continue
+        seen.add(statement)
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+        unindexed = [step for step in plan if TABLE_STEP.search(step) and "INDEX" not in step]
+        status = "FAIL" if unindexed else "ok"
+        failures += bool(unindexed)
+        print(f"[{status}] {' '.join(statement.split())[:110]}")
+        for step in plan:
+            print(f"         {step}")
+    print(f"\n{len(seen)} distinct queries on transactions, {failures} without an index")
+    if len(seen) < MIN_DISTINCT_QUERIES:
+        print(f"FAIL: expected at least {MIN_DISTINCT_QUERIES} distinct queries; some reads were not captured")
+        return 1
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())